@@ -0,0 +1,514 @@
+"""
+Ingestion benchmark'ı
+
+Sentetik tb_X / tb_X_Hist tablolarını SQLite veya DuckDB'de oluşturur, her motor için
+ilk yükleme (init) ve artımlı senkronizasyon (sync) çalıştırır ve sonuçları JSON olarak
+raporlar: satır/sn, yazılan byte, süre ve en yüksek RSS.
+
+Her motor kaynak veritabanının kendi kopyası üzerinde ve ayrı bir süreçte çalışır; bellek
+ölçümü önceki motorlardan etkilenmez. Değişiklikler seed'e göre üretildiği için aynı
+parametrelerle her çalıştırma aynı veriyi işler.
+
+Motorlar:
+    db_parquet              DatabaseToParquet, tek dosya
+    db_parquet_bucketed     DatabaseToParquet, bucket_size ile
+    db_parquet_duckdb       DatabaseToParquet, sync_engine="duckdb"
+    db_parquet_connectorx   DatabaseToParquet, reader_backend="connectorx" (sadece SQLite)
+    parquet_sync            ParquetSynchronizer (sadece SQLite; init ölçümüne state'i
+                            oluşturan ilk sync dahildir)
+    delta_merge             delta_parquet_manager.write_delta_merge
+
+Kaynağın desteklemediği motorlar sonuçta `error` alanıyla raporlanır. DuckDB kaynağında
+DatabaseToParquet için SQLAlchemy dialect'i gerekir: pip install duckdb-engine
+
+Kullanım:
+    python benchmark.py --rows 1000000 --change-rate 0.01 --syncs 3 --output bench.json
+    python benchmark.py --source duckdb --engines db_parquet db_parquet_duckdb
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from db_parquet.metrics import rss_bytes
+
+
+TABLE = "tb_X"
+PRIMARY_KEY = "ID"
+COLUMNS = ["ID", "Ad", "Kod", "Tutar", "Adet", "Tarih", "Guncelleme"]
+VERSION_COLUMN = "Guncelleme"  # ParquetSynchronizer için artan zaman damgası
+BASE_STAMP = datetime(2024, 1, 1)
+
+ENGINES = [
+    "db_parquet",
+    "db_parquet_bucketed",
+    "db_parquet_duckdb",
+    "db_parquet_connectorx",
+    "parquet_sync",
+    "delta_merge",
+]
+
+# n sütunundan sentetik satır üretir (SQLite ve DuckDB'de aynı sonucu verir)
+_ROW_SQL = """
+    {n}, 'Urun ' || {n}, printf('K%08d', {n}), ({n} * 7919 % 100000) / 100.0, {n} % 50,
+    printf('2024-%02d-%02d', {n} % 12 + 1, {n} % 28 + 1), ?
+"""
+
+_SEQUENCE_SQL = {
+    "sqlite": "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {rows}) SELECT {row} FROM seq",
+    "duckdb": "SELECT {row} FROM (SELECT range AS n FROM range(1, {rows} + 1)) seq",
+}
+
+_COLUMN_TYPES = "ID BIGINT PRIMARY KEY, Ad VARCHAR(100), Kod VARCHAR(20), Tutar DOUBLE, Adet INTEGER, Tarih VARCHAR(10), Guncelleme VARCHAR(19)"
+_HIST_TYPES = "Hist_ID BIGINT PRIMARY KEY, Hist_Islem INTEGER, ID BIGINT, Ad VARCHAR(100), Kod VARCHAR(20), Tutar DOUBLE, Adet INTEGER, Tarih VARCHAR(10), Guncelleme VARCHAR(19)"
+
+
+@dataclass
+class PhaseResult:
+    """Bir motorun tek bir aşamasının (init veya sync) ölçümü"""
+    engine: str
+    phase: str  # "init" veya "sync"
+    round: int  # init için 0, sync için 1..N
+    rows: int  # İşlenen kaynak satırı (init: tablo, sync: history değişikliği)
+    wall_seconds: float = 0.0
+    rows_per_sec: float = 0.0
+    bytes_written: Optional[int] = None  # Sürecin write() ile yazdığı byte (temp dosyalar dahil)
+    output_bytes: int = 0  # Aşama sonunda çıktının diskteki boyutu
+    output_rows: Optional[int] = None  # Aşama sonunda çıktıdaki satır sayısı
+    peak_rss_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+# --------------------------------------------------------------------------
+# Ölçüm yardımcıları
+# --------------------------------------------------------------------------
+
+def _bytes_written() -> Optional[int]:
+    """Sürecin şimdiye kadar write() ile yazdığı toplam byte"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if psutil is not None:
+        return psutil.Process().io_counters().write_bytes
+    return None
+
+
+class _PeakMemory:
+    """Blok süresince RSS'i arka planda örnekler ve en yüksek değeri tutar"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._update()
+
+    def _update(self) -> None:
+        rss = rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self._update()
+        return False
+
+
+def _directory_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def _output_size(path: str) -> int:
+    """Çıktının boyutu; bucket klasörlerinde sadece yayınlanmış manifest'in referans verdiği dosyalar"""
+    from db_parquet.buckets import MANIFEST_FILE, BucketManifest
+
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return _directory_size(path)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = BucketManifest.from_json(f.read())
+    # Önceki versiyonlar (.backup) ve yayınlanmamış dosyalar çıktıya dahil değil
+    return os.path.getsize(manifest_path) + sum(os.path.getsize(os.path.join(path, name)) for name in manifest.files())
+
+
+def _measure(result: PhaseResult, run: Callable[[], None], output_path: str, count: Callable[[], int]) -> PhaseResult:
+    """run'ı ölçer ve sonucu result'a yazar; hata diğer aşamaları durdurmaz"""
+    written_before = _bytes_written()
+    with _PeakMemory() as memory:
+        start_time = time.perf_counter()
+        try:
+            run()
+        except (Exception, SystemExit) as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.wall_seconds = time.perf_counter() - start_time
+
+    written_after = _bytes_written()
+    if written_before is not None and written_after is not None:
+        result.bytes_written = written_after - written_before
+    result.peak_rss_bytes = memory.peak
+    result.rows_per_sec = result.rows / result.wall_seconds if result.wall_seconds else 0.0
+    if os.path.exists(output_path):
+        result.output_bytes = _output_size(output_path)
+        try:
+            result.output_rows = count()
+        except Exception:
+            result.output_rows = None
+    return result
+
+
+# --------------------------------------------------------------------------
+# Sentetik kaynak
+# --------------------------------------------------------------------------
+
+def _connect(source: str, db_path: str):
+    if source == "sqlite":
+        import sqlite3
+        return sqlite3.connect(db_path)
+    import duckdb
+    return duckdb.connect(db_path)
+
+
+def _stamp(round_number: int) -> str:
+    return (BASE_STAMP + timedelta(minutes=round_number)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def create_source(source: str, db_path: str, rows: int) -> None:
+    """tb_X ve her satır için bir insert kaydı içeren tb_X_Hist'i oluşturur"""
+    columns = ", ".join(COLUMNS)
+    con = _connect(source, db_path)
+    try:
+        con.execute(f"CREATE TABLE {TABLE} ({_COLUMN_TYPES})")
+        con.execute(f"CREATE TABLE {TABLE}_Hist ({_HIST_TYPES})")
+        con.execute(
+            f"INSERT INTO {TABLE} ({columns}) "
+            + _SEQUENCE_SQL[source].format(rows=rows, row=_ROW_SQL.format(n="n")),
+            [_stamp(0)],
+        )
+        con.execute(
+            f"INSERT INTO {TABLE}_Hist (Hist_ID, Hist_Islem, {columns}) "
+            f"SELECT ID, 1, {columns} FROM {TABLE}"
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+def change_plan(rows: int, change_rate: float, round_number: int, seed: int) -> Dict[str, List[int]]:
+    """Bir sync turunda değişecek ID'leri üretir (%80 update, %10 delete, %10 insert)
+
+    Update'ler tek, delete'ler çift ID'lerden seçilir; böylece silinmiş bir satır
+    sonraki turlarda güncellenmez.
+    """
+    total = max(1, int(rows * change_rate))
+    deletes = total // 10
+    inserts = total // 10
+    updates = total - deletes - inserts
+
+    rng = random.Random(seed * 1_000_003 + round_number)
+    odd = range(1, rows + 1, 2)
+    even = range(2, rows + 1, 2)
+    first_insert = rows + (round_number - 1) * inserts + 1
+    return {
+        "update": rng.sample(odd, min(updates, len(odd))),
+        "delete": rng.sample(even, min(deletes, len(even))),
+        "insert": list(range(first_insert, first_insert + inserts)),
+    }
+
+
+def apply_changes(source: str, db_path: str, plan: Dict[str, List[int]], round_number: int) -> int:
+    """Planı ana tabloya uygular ve history kayıtlarını yazar, history satır sayısını döner"""
+    columns = ", ".join(COLUMNS)
+    stamp = _stamp(round_number)
+    next_hist_id = f"(SELECT MAX(Hist_ID) FROM {TABLE}_Hist) + row_number() OVER (ORDER BY ID)"
+
+    con = _connect(source, db_path)
+    try:
+        con.execute("CREATE TEMP TABLE bench_ids (ID BIGINT, Op INTEGER)")
+        con.executemany(
+            "INSERT INTO bench_ids VALUES (?, ?)",
+            [(i, 1) for i in plan["update"]] + [(i, 2) for i in plan["insert"]] + [(i, 0) for i in plan["delete"]],
+        )
+        con.execute(
+            f"UPDATE {TABLE} SET Ad = 'Guncel ' || ID, Tutar = Tutar + 1, {VERSION_COLUMN} = ? "
+            f"WHERE ID IN (SELECT ID FROM bench_ids WHERE Op = 1)",
+            [stamp],
+        )
+        con.execute(
+            f"INSERT INTO {TABLE} ({columns}) SELECT {_ROW_SQL.format(n='ID')} FROM bench_ids WHERE Op = 2",
+            [stamp],
+        )
+        con.execute(
+            f"INSERT INTO {TABLE}_Hist (Hist_ID, Hist_Islem, {columns}) "
+            f"SELECT {next_hist_id}, 1, {columns} FROM {TABLE} "
+            f"WHERE ID IN (SELECT ID FROM bench_ids WHERE Op IN (1, 2))"
+        )
+        con.execute(f"DELETE FROM {TABLE} WHERE ID IN (SELECT ID FROM bench_ids WHERE Op = 0)")
+        con.execute(
+            f"INSERT INTO {TABLE}_Hist (Hist_ID, Hist_Islem, ID) "
+            f"SELECT {next_hist_id}, 0, ID FROM bench_ids WHERE Op = 0"
+        )
+        con.execute("DROP TABLE bench_ids")
+        con.commit()
+    finally:
+        con.close()
+    return sum(len(ids) for ids in plan.values())
+
+
+# --------------------------------------------------------------------------
+# Motorlar
+# --------------------------------------------------------------------------
+
+def _sqlalchemy_url(source: str, db_path: str) -> str:
+    return f"{source}:///{os.path.abspath(db_path)}"
+
+
+def _connectorx_uri(source: str, db_path: str) -> str:
+    if source != "sqlite":
+        raise ValueError(f"connectorx {source} kaynağını desteklemiyor")
+    return f"sqlite://{os.path.abspath(db_path)}"
+
+
+def _engine(name: str, source: str, db_path: str, out_dir: str, options: dict) -> Tuple[Callable, Callable, str, Callable]:
+    """Motor için (init, sync, çıktı yolu, çıktı satır sayısı) döndürür"""
+    import polars as pl
+
+    if name.startswith("db_parquet"):
+        from db_parquet import DatabaseToParquet, TableConfig
+
+        config_options = {}
+        if name == "db_parquet_bucketed":
+            config_options["bucket_size"] = options["bucket_size"]
+        elif name == "db_parquet_duckdb":
+            config_options["sync_engine"] = "duckdb"
+        elif name == "db_parquet_connectorx":
+            config_options["reader_backend"] = "connectorx"
+            config_options["connectorx_uri"] = _connectorx_uri(source, db_path)
+
+        output = os.path.join(out_dir, "x" if "bucket_size" in config_options else "x.parquet")
+        config = TableConfig(
+            table_name=TABLE,
+            columns=COLUMNS,
+            primary_key=PRIMARY_KEY,
+            output_file=output,
+            batch_size=options["batch_size"],
+            **config_options,
+        )
+        converter = DatabaseToParquet(_sqlalchemy_url(source, db_path), config)
+
+        def count() -> int:
+            return converter._scan_parquet(output).select(pl.len()).collect().item()
+
+        return converter.init_parquet, converter.sync_changes, output, count
+
+    if name == "parquet_sync":
+        from parquet_sync_manager import ParquetSynchronizer
+
+        manager = ParquetSynchronizer(_connectorx_uri(source, db_path), out_dir, chunk=options["bucket_size"])
+        sync_options = dict(table=TABLE, pk=PRIMARY_KEY, ver=VERSION_COLUMN, cols=COLUMNS, use_ts=True)
+        output = os.path.join(out_dir, TABLE)
+
+        def init() -> None:
+            manager.init(table=TABLE, pk=PRIMARY_KEY, cols=COLUMNS)
+            manager.sync(**sync_options)
+
+        def count() -> int:
+            # Klasörde yedek versiyonlar da durur; sadece manifest'teki dosyalar (deltalar çözülerek) sayılır
+            return manager.scan(TABLE, PRIMARY_KEY).select(pl.len()).collect().item()
+
+        return init, lambda: manager.sync(**sync_options), output, count
+
+    if name == "delta_merge":
+        from delta_parquet_manager import write_delta_merge
+
+        output = os.path.join(out_dir, TABLE)
+        columns = ", ".join(COLUMNS)
+
+        def run() -> None:
+            write_delta_merge(
+                output,
+                _connectorx_uri(source, db_path),
+                f"SELECT Hist_ID, Hist_Islem, {columns} FROM {TABLE}_Hist",
+                order_by_column="Hist_ID",
+                key_column=PRIMARY_KEY,
+                limit=options["batch_size"],
+            )
+
+        def count() -> int:
+            return pl.scan_delta(output).select(pl.len()).collect().item()
+
+        return run, run, output, count
+
+    raise ValueError(f"Bilinmeyen motor: {name} ({', '.join(ENGINES)})")
+
+
+def run_engine(name: str, source: str, db_path: str, out_dir: str, options: dict) -> List[dict]:
+    """Motoru init + N sync turu olarak çalıştırır (ayrı süreçte çağrılır)"""
+    results: List[PhaseResult] = []
+    # Kütüphanelerin ilerleme çıktıları JSON raporu bozmasın
+    with contextlib.redirect_stdout(sys.stderr):
+        init_result = PhaseResult(engine=name, phase="init", round=0, rows=options["rows"])
+        try:
+            init, sync, output, count = _engine(name, source, db_path, out_dir, options)
+        except (Exception, SystemExit) as e:
+            init_result.error = f"{type(e).__name__}: {e}"
+            return [asdict(init_result)]
+
+        results.append(_measure(init_result, init, output, count))
+        if init_result.error is None:
+            for round_number in range(1, options["syncs"] + 1):
+                plan = change_plan(options["rows"], options["change_rate"], round_number, options["seed"])
+                changed = apply_changes(source, db_path, plan, round_number)
+                sync_result = PhaseResult(engine=name, phase="sync", round=round_number, rows=changed)
+                results.append(_measure(sync_result, sync, output, count))
+
+    return [asdict(result) for result in results]
+
+
+# --------------------------------------------------------------------------
+# Çalıştırma
+# --------------------------------------------------------------------------
+
+def _environment() -> dict:
+    versions = {}
+    for module in ("polars", "pyarrow", "duckdb", "connectorx", "deltalake", "sqlalchemy"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def run_benchmark(
+    source: str = "sqlite",
+    rows: int = 100_000,
+    change_rate: float = 0.01,
+    syncs: int = 1,
+    engines: Optional[List[str]] = None,
+    batch_size: int = 100_000,
+    bucket_size: Optional[int] = None,
+    seed: int = 42,
+    work_dir: Optional[str] = None,
+) -> dict:
+    """Benchmark'ı çalıştırır ve JSON'a çevrilebilir raporu döndürür"""
+    engines = engines or ENGINES
+    options = {
+        "source": source,
+        "rows": rows,
+        "change_rate": change_rate,
+        "syncs": syncs,
+        "batch_size": batch_size,
+        "bucket_size": bucket_size or max(rows // 8, 1),
+        "seed": seed,
+    }
+
+    keep = work_dir is not None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="db_parquet_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        base_db = os.path.join(work_dir, f"source.{source}")
+        if os.path.exists(base_db):
+            os.unlink(base_db)
+        create_source(source, base_db, rows)
+
+        results = []
+        context = multiprocessing.get_context("spawn")
+        for name in engines:
+            engine_dir = os.path.join(work_dir, name)
+            shutil.rmtree(engine_dir, ignore_errors=True)
+            os.makedirs(engine_dir)
+            db_path = os.path.join(engine_dir, os.path.basename(base_db))
+            shutil.copyfile(base_db, db_path)
+            out_dir = os.path.join(engine_dir, "out")
+            os.makedirs(out_dir)
+
+            print(f"[benchmark] {name} çalışıyor...", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results.extend(pool.submit(run_engine, name, source, db_path, out_dir, options).result())
+
+        return {
+            "created": datetime.now().isoformat(),
+            "config": options,
+            "environment": _environment(),
+            "results": results,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="DatabaseToParquet / ParquetSynchronizer / Delta ingestion benchmark'ı")
+    parser.add_argument("--source", choices=["sqlite", "duckdb"], default="sqlite")
+    parser.add_argument("--rows", type=int, default=100_000, help="tb_X satır sayısı")
+    parser.add_argument("--change-rate", type=float, default=0.01, help="Her sync turunda değişen satır oranı")
+    parser.add_argument("--syncs", type=int, default=1, help="Sync turu sayısı")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--bucket-size", type=int, default=None, help="Varsayılan: rows / 8")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", default=None, help="Verilirse veritabanı ve çıktılar silinmez")
+    parser.add_argument("--output", default=None, help="JSON rapor dosyası (varsayılan: stdout)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        source=args.source,
+        rows=args.rows,
+        change_rate=args.change_rate,
+        syncs=args.syncs,
+        engines=args.engines,
+        batch_size=args.batch_size,
+        bucket_size=args.bucket_size,
+        seed=args.seed,
+        work_dir=args.work_dir,
+    )
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
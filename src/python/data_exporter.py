@@ -1,24 +1,28 @@
 from collections.abc import Buffer
 from io import BytesIO
+from typing import Optional
 import polars as pl
 import connectorx as cx
+from db_parquet.profile import WriterProfile
 
 def to_polar(db_uri: str, query: str) -> pl.DataFrame:   
     return cx.read_sql(db_uri, query, return_type="polars")
 
-def to_parquet(db_uri: str, query: str) -> Buffer:   
+def to_parquet(db_uri: str, query: str, writer_profile: Optional[WriterProfile] = None) -> Buffer:   
     df = to_polar(db_uri, query)
+    profile = writer_profile or WriterProfile()
     with BytesIO() as out_stream:
-        df.write_parquet(out_stream, compression="zstd", use_pyarrow=True, pyarrow_options={"row_group_size": 100_000})
+        df.write_parquet(out_stream, **profile.polars_options())
         return out_stream.getvalue()
 
-def to_parquet_dataset(query: str, dataset: dict[str, pl.DataFrame]) -> Buffer:   
+def to_parquet_dataset(query: str, dataset: dict[str, pl.DataFrame], writer_profile: Optional[WriterProfile] = None) -> Buffer:   
     ctx = pl.SQLContext()
     for name, df in dataset.items():
         ctx.register(name, df)
 
+    profile = writer_profile or WriterProfile()
     with BytesIO() as out_stream:
-        ctx.execute(query).collect().write_parquet(out_stream, compression="zstd", use_pyarrow=True, pyarrow_options={"row_group_size": 100_000})
+        ctx.execute(query).collect().write_parquet(out_stream, **profile.polars_options())
         return out_stream.getvalue()
 
 if __name__ == "__main__":
@@ -1,5 +1,11 @@
 from .config import TableConfig, S3Config
+from .buckets import BucketManifest, BucketInfo
+from .profile import WriterProfile
 from .converter import DatabaseToParquet
+from .runner import MultiTableRunner, RunReport, TableRunResult
+from .maintenance import ParquetMaintenance, MaintenanceReport
+from .metrics import RunMetrics, prometheus_text
+from .journal import RunJournal
 from .connections import (
     get_mssql_connection,
     get_mssql_connection_with_auth,
@@ -13,7 +19,18 @@ from .connections import (
 __all__ = [
     'TableConfig',
     'S3Config',
+    'BucketManifest',
+    'BucketInfo',
+    'WriterProfile',
     'DatabaseToParquet',
+    'MultiTableRunner',
+    'RunReport',
+    'TableRunResult',
+    'ParquetMaintenance',
+    'MaintenanceReport',
+    'RunMetrics',
+    'prometheus_text',
+    'RunJournal',
     'get_mssql_connection',
     'get_mssql_connection_with_auth',
     'get_mssql_simple',
@@ -0,0 +1,245 @@
+"""
+Bucket layout yardımcıları
+
+Bucket layout'ta output_file tek bir dosya değil, bir klasördür. Klasörde
+primary key aralıklarına göre bölünmüş parquet dosyaları ve hangi bucket'ın
+hangi dosyada olduğunu tutan küçük bir manifest bulunur:
+
+    urun/
+    ├── _manifest.json
+    ├── part_0_v3.parquet      # ID 0 - 999.999, versiyon 3
+    └── part_1_v1.parquet      # ID 1.000.000 - 1.999.999, versiyon 1
+
+Dosyalar yerinde güncellenmez; değişen bucket yeni versiyon adıyla yazılır ve
+manifest değiştirilerek yayınlanır. Okuyucular sadece manifest'te listelenen
+dosyaları okuduğu için yarım yazılmış dosya görmezler.
+
+Manifest her bucket için satır sayısı, byte boyutu ve kolon min/max değerlerini de
+taşır; okuyucular dosya listesini ve budamayı (prune) klasörü listelemeden ve
+footer'ları açmadan tek bir küçük okumayla yapar.
+"""
+
+import json
+import math
+import os
+from datetime import date, datetime
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow.parquet as pq
+
+
+MANIFEST_FILE = "_manifest.json"
+
+
+@dataclass
+class BucketInfo:
+    """Tek bir bucket dosyasının bilgileri"""
+    file: str
+    rows: int = 0
+    min_key: Any = None
+    max_key: Any = None
+    size: int = 0  # Dosyaların byte boyutu
+    columns: Dict[str, List[Any]] = field(default_factory=dict)  # kolon -> [min, max]
+    deltas: List[str] = field(default_factory=list)  # Merge-on-read delta dosyaları (eskiden yeniye)
+
+    def overlaps(self, ranges: Dict[str, Tuple[Any, Any]], primary_key: Optional[str] = None) -> bool:
+        """Bucket'ta ranges'a ({kolon: (min, max)}, uçlar dahil) uyan satır olabilir mi"""
+        for column, (low, high) in ranges.items():
+            bounds = self.columns.get(column)
+            if bounds is None and column == primary_key:
+                bounds = [_stat_value(self.min_key), _stat_value(self.max_key)]
+            if bounds is None or None in bounds:
+                continue
+            try:
+                if low is not None and _stat_value(low) > bounds[1]:
+                    return False
+                if high is not None and _stat_value(high) < bounds[0]:
+                    return False
+            except TypeError:
+                # İstatistik ile sorgu değeri karşılaştırılamıyor; bucket okunur
+                continue
+        return True
+
+
+@dataclass
+class BucketManifest:
+    """Bucket layout manifest'i (hangi bucket hangi dosyada)"""
+    primary_key: str
+    bucket_size: int
+    version: int = 0
+    hist_id: Optional[int] = None  # Bu versiyonda uygulanmış son Hist_ID
+    checkpoint: Optional[str] = None  # Bu versiyonda uygulanmış son RowVersion / zaman damgası
+    buckets: Dict[int, BucketInfo] = field(default_factory=dict)
+
+    def bucket_of(self, key: int) -> int:
+        """PK değerine göre bucket numarasını döndürür"""
+        return key // self.bucket_size
+
+    def file_name(self, bucket: int) -> str:
+        """Bucket için bu versiyona ait dosya adını döndürür"""
+        return f"part_{bucket}_v{self.version}.parquet"
+
+    def files(self) -> List[str]:
+        """Bucket sırasına göre dosya adlarını (varsa deltalarıyla) döndürür"""
+        return [name for b in sorted(self.buckets) for name in [self.buckets[b].file, *self.buckets[b].deltas]]
+
+    def prune(self, ranges: Optional[Dict[str, Tuple[Any, Any]]] = None) -> Dict[int, BucketInfo]:
+        """
+        ranges'a ({kolon: (min, max)}, uçlar dahil, None sınırsız) uyan satır içerebilecek
+        bucket'ları döndürür. İstatistiği olmayan kolonlar bucket'ı elemez.
+        """
+        return {b: info for b, info in sorted(self.buckets.items()) if info.overlaps(ranges or {}, self.primary_key)}
+
+    @property
+    def row_count(self) -> int:
+        """Toplam satır sayısı"""
+        return sum(info.rows for info in self.buckets.values())
+
+    @property
+    def size(self) -> int:
+        """Toplam byte boyutu"""
+        return sum(info.size for info in self.buckets.values())
+
+    def next_version(self) -> "BucketManifest":
+        """Mevcut bucket'ları taşıyan bir sonraki versiyonu oluşturur"""
+        return BucketManifest(
+            primary_key=self.primary_key,
+            bucket_size=self.bucket_size,
+            version=self.version + 1,
+            hist_id=self.hist_id,
+            checkpoint=self.checkpoint,
+            buckets=dict(self.buckets),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "version": self.version,
+            "primary_key": self.primary_key,
+            "bucket_size": self.bucket_size,
+            "hist_id": self.hist_id,
+            "checkpoint": self.checkpoint,
+            "row_count": self.row_count,
+            "size": self.size,
+            "buckets": {
+                str(bucket): {
+                    "file": info.file,
+                    "rows": info.rows,
+                    "min_key": info.min_key,
+                    "max_key": info.max_key,
+                    "size": info.size,
+                    "columns": info.columns,
+                    "deltas": info.deltas,
+                }
+                for bucket, info in sorted(self.buckets.items())
+            },
+        }, indent=2, default=str)
+
+    @classmethod
+    def from_json(cls, text: str) -> "BucketManifest":
+        data = json.loads(text)
+        return cls(
+            primary_key=data["primary_key"],
+            bucket_size=data["bucket_size"],
+            version=data.get("version", 0),
+            hist_id=data.get("hist_id"),
+            checkpoint=data.get("checkpoint"),
+            buckets={
+                int(bucket): BucketInfo(**info)
+                for bucket, info in data.get("buckets", {}).items()
+            },
+        )
+
+
+def unreferenced_files(old: Optional[BucketManifest], *keep: Optional[BucketManifest]) -> List[str]:
+    """old manifest'te olup keep manifest'lerinin hiçbirinde olmayan dosyaları döndürür"""
+    if old is None:
+        return []
+    kept = {name for manifest in keep if manifest is not None for name in manifest.files()}
+    return [name for name in old.files() if name not in kept]
+
+
+def abort_upload(s3_file) -> None:
+    """s3fs ile açılmış yazma dosyasının multipart upload'ını iptal eder; mevcut nesneye dokunulmaz"""
+    s3_file.discard()
+    # Kapanmış sayılmazsa __del__ içindeki close() yarım veriyi yüklemeye çalışır
+    s3_file.closed = True
+
+
+def _stat_value(value: Any) -> Any:
+    """İstatistik değerini JSON'a yazılan (ve karşılaştırılan) haline çevirir; desteklenmiyorsa None"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if isinstance(value, datetime):
+        # ISO formatı metin olarak doğru sıralanır; ayraç str(datetime) ve SQL ile aynı
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value
+    return None
+
+
+def column_ranges(metadata: pq.FileMetaData) -> Dict[str, Optional[List[Any]]]:
+    """
+    Footer row group istatistiklerinden kolon [min, max] değerlerini döndürür.
+    İstatistiği eksik ya da karşılaştırılamayan (binary, decimal) kolonlar None olur.
+    """
+    ranges: Dict[str, Optional[List[Any]]] = {}
+    for index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(index)
+        for column_index in range(row_group.num_columns):
+            column = row_group.column(column_index)
+            name = column.path_in_schema
+            stats = column.statistics
+            bounds = None
+            if (
+                stats is not None
+                and stats.has_min_max
+                and getattr(stats, "is_min_exact", True)
+                and getattr(stats, "is_max_exact", True)
+            ):
+                low, high = _stat_value(stats.min), _stat_value(stats.max)
+                if low is not None and high is not None and type(low) is type(high):
+                    bounds = [low, high]
+            ranges[name] = _merge_range(ranges[name], bounds) if name in ranges else bounds
+    return ranges
+
+
+def _merge_range(a: Optional[List[Any]], b: Optional[List[Any]]) -> Optional[List[Any]]:
+    if a is None or b is None or type(a[0]) is not type(b[0]):
+        return None
+    return [min(a[0], b[0]), max(a[1], b[1])]
+
+
+def describe_bucket(root: str, file: str, primary_key: str, deltas: Optional[List[str]] = None) -> BucketInfo:
+    """
+    Local bucket dosyası (ve deltaları) için BucketInfo oluşturur; sadece footer'lar okunur.
+    Deltalı bucket'larda rows çözülmemiş toplamdır (üst sınır), min/max tüm dosyaları kapsar.
+    """
+    deltas = list(deltas or [])
+    rows, size = 0, 0
+    columns: Dict[str, Optional[List[Any]]] = {}
+    for name in [file, *deltas]:
+        path = os.path.join(root, name)
+        metadata = pq.read_metadata(path)
+        rows += metadata.num_rows
+        size += os.path.getsize(path)
+        for column, bounds in column_ranges(metadata).items():
+            # Dosyada olmayan kolon o dosyada NULL'dur; aralığı daraltmaz
+            columns[column] = _merge_range(columns[column], bounds) if column in columns else bounds
+    columns = {column: bounds for column, bounds in columns.items() if bounds is not None}
+    key_bounds = columns.get(primary_key, [None, None])
+    return BucketInfo(
+        file=file,
+        rows=rows,
+        min_key=key_bounds[0],
+        max_key=key_bounds[1],
+        size=size,
+        columns=columns,
+        deltas=deltas,
+    )
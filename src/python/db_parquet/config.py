@@ -1,5 +1,7 @@
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
+
+from .profile import WriterProfile
 
 
 @dataclass
@@ -9,6 +11,8 @@ class S3Config:
     secret_key: Optional[str] = None
     endpoint_url: Optional[str] = None  # MinIO, LocalStack vb. için
     region: Optional[str] = None
+    streaming_upload: bool = False  # Çıktıyı local temp dosya olmadan multipart upload ile yaz
+    multipart_chunk_size: int = 64 * 1024 * 1024  # Multipart part boyutu (S3 minimum 5 MB)
     
     def to_storage_options(self) -> Dict[str, Any]:
         """fsspec/s3fs için storage_options döndürür"""
@@ -37,11 +41,27 @@ class TableConfig:
     output_file: Optional[str] = None
     batch_size: int = 100_000
     s3_config: Optional[S3Config] = None
+    bucket_size: Optional[int] = None  # Verilirse output_file PK aralığı bazlı bucket klasörü olur
+    init_parallelism: int = 1  # > 1 ise init_parquet PK aralıklarını bu kadar bağlantıyla paralel okur
+    sync_engine: str = "polars"  # "duckdb": bellek limitli, diske taşan (out-of-core) sync motoru
+    memory_limit: str = "2GB"  # sync_engine="duckdb" için bellek bütçesi
+    spill_directory: Optional[str] = None  # Bellek aşıldığında kullanılacak klasör (varsayılan: temp)
+    writer_profile: Optional[Union[WriterProfile, str]] = None  # WriterProfile veya hazır profil adı
+    reader_backend: str = "sqlalchemy"  # "connectorx": satırları Python objesine çevirmeden Arrow olarak okur
+    connectorx_uri: Optional[str] = None  # connectorx bağlantı adresi (varsayılan: engine URL'inden türetilir)
     
     def __post_init__(self):
+        if self.sync_engine not in ("polars", "duckdb"):
+            raise ValueError(f"Desteklenmeyen sync_engine: {self.sync_engine} (polars, duckdb)")
+        if self.reader_backend not in ("sqlalchemy", "connectorx"):
+            raise ValueError(f"Desteklenmeyen reader_backend: {self.reader_backend} (sqlalchemy, connectorx)")
+        if isinstance(self.writer_profile, str):
+            # "fast-lookup" bloom filter'ları primary key üzerine yazar
+            self.writer_profile = WriterProfile.preset(self.writer_profile, key_columns=[self.primary_key])
         if self.output_file is None:
-            # tb_Urun -> urun.parquet
-            self.output_file = f"{self.table_name.lower().replace('tb_', '')}.parquet"
+            # tb_Urun -> urun.parquet (bucket layout için: urun)
+            name = self.table_name.lower().replace('tb_', '')
+            self.output_file = name if self.is_bucketed else f"{name}.parquet"
     
     @property
     def hist_table_name(self) -> str:
@@ -53,6 +73,11 @@ class TableConfig:
         """output_file bir S3 path mi kontrol eder"""
         return self.output_file and self.output_file.startswith("s3://")
     
+    @property
+    def is_bucketed(self) -> bool:
+        """Bucket layout (klasör + manifest) kullanılıyor mu kontrol eder"""
+        return self.bucket_size is not None
+    
     @property
     def storage_options(self) -> Optional[Dict[str, Any]]:
         """S3 için storage options döndürür"""
@@ -1,14 +1,60 @@
+import logging
 import os
+import posixpath
+import re
 import tempfile
-import time
+import json
 import shutil
-from typing import Iterator, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Tuple, Union, Optional
 
 import polars as pl
+import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 from sqlalchemy import create_engine, Engine
 
+from .buckets import MANIFEST_FILE, BucketInfo, BucketManifest, abort_upload, unreferenced_files
 from .config import TableConfig
+from .metrics import MeteredWriter, RunMetrics
+from .outofcore import OutOfCoreMerger
+from .profile import open_parquet_writer
+
+
+logger = logging.getLogger(__name__)
+
+
+# Parquet footer key-value metadata anahtarları
+HIST_ID_METADATA_KEY = "db_parquet.hist_id"
+ROW_COUNT_METADATA_KEY = "db_parquet.row_count"
+
+# Sorgulardaki :parametre yer tutucuları
+_PARAMETER_PATTERN = re.compile(r"(?<![:\w]):(\w+)")
+
+
+def _sql_literal(value) -> str:
+    """Parametre değerini SQL literal'ine çevirir (bind parametresi desteklemeyen connectorx için)"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class _OutputSink:
+    """Çıktı dosyası için yazma hedefi (local temp dosya veya S3 multipart upload)"""
+    
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.discarded = False
+    
+    def discard(self) -> None:
+        """Yazılanları yayınlamadan bırakır (örn. veri bulunamadığında)"""
+        self.discarded = True
 
 
 class DatabaseToParquet:
@@ -34,9 +80,14 @@ class DatabaseToParquet:
         """
         self.config = table_config
         self._fs = None  # Lazy initialization for S3 filesystem
+        self.metrics = RunMetrics(table_config.table_name)  # Son init/sync çalıştırmasının metrikleri
         
         if isinstance(connection, str):
-            self.engine = create_engine(connection)
+            pool_options = {}
+            if table_config.init_parallelism > 5:
+                # Varsayılan havuz (5 + 10 overflow) paralel init için yetmeyebilir
+                pool_options = {"pool_size": table_config.init_parallelism, "max_overflow": 0}
+            self.engine = create_engine(connection, **pool_options)
             self._owns_engine = True
         else:
             self.engine = connection
@@ -64,8 +115,9 @@ class DatabaseToParquet:
         """Local dosyayı S3'e yükler"""
         fs = self._get_s3_fs()
         s3_key = s3_path.replace("s3://", "")
-        fs.put(local_path, s3_key)
-        print(f"[{self.config.table_name}] S3'e yüklendi: {s3_path}")
+        with self.metrics.span("upload", bytes=os.path.getsize(local_path)):
+            fs.put(local_path, s3_key)
+        logger.info(f"[{self.config.table_name}] S3'e yüklendi: {s3_path}")
     
     def _copy_s3(self, src: str, dst: str) -> None:
         """S3'te dosya kopyalar"""
@@ -81,24 +133,261 @@ class DatabaseToParquet:
         if fs.exists(s3_key):
             fs.rm(s3_key)
     
+    def _delete_path(self, path: str) -> None:
+        """Dosyayı siler (local veya S3)"""
+        if path.startswith("s3://"):
+            self._delete_s3(path)
+        elif os.path.exists(path):
+            os.unlink(path)
+    
+    def _join_path(self, *parts: str) -> str:
+        """Yol parçalarını birleştirir (S3 için her zaman '/')"""
+        if self.config.is_s3_path:
+            return posixpath.join(*parts)
+        return os.path.join(*parts)
+    
+    def _read_text(self, path: str) -> Optional[str]:
+        """Metin dosyasını okur, dosya yoksa None döner (local veya S3)"""
+        if path.startswith("s3://"):
+            fs = self._get_s3_fs()
+            s3_key = path.replace("s3://", "")
+            if not fs.exists(s3_key):
+                return None
+            return fs.cat_file(s3_key).decode("utf-8")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    
+    def _write_text(self, path: str, text: str) -> None:
+        """Metin dosyasını atomik olarak yazar (local: temp + rename, S3: tek PUT)"""
+        if path.startswith("s3://"):
+            fs = self._get_s3_fs()
+            fs.pipe_file(path.replace("s3://", ""), text.encode("utf-8"))
+            return
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    
+    @property
+    def _streams_to_s3(self) -> bool:
+        """Çıktı local temp dosya yerine doğrudan S3'e mi yazılıyor"""
+        return self.config.is_s3_path and self.config.s3_config is not None and self.config.s3_config.streaming_upload
+    
+    def _backup_s3(self, output: str) -> None:
+        """Üzerine yazılmadan önce mevcut S3 nesnesini yedekler
+        
+        streaming_upload açıksa ve bucket'ta versioning varsa nesne kopyalanmaz;
+        önceki versiyona işaret eden küçük bir `.backup.json` yazılır.
+        """
+        if not self._file_exists(output):
+            return
+        
+        if self._streams_to_s3:
+            info = self._get_s3_fs().info(output.replace("s3://", ""))
+            version_id = info.get("VersionId")
+            if version_id:
+                backup_path = f"{output}.backup.json"
+                self._write_text(backup_path, json.dumps({
+                    "path": output,
+                    "version_id": version_id,
+                    "etag": info.get("ETag"),
+                    "size": info.get("size"),
+                    "created": datetime.now().isoformat(),
+                }))
+                logger.info(f"[{self.config.table_name}] S3 yedek referansı: {backup_path} ({version_id})")
+                return
+        
+        backup_path = f"{output}.backup"
+        with self.metrics.span("finalize"):
+            self._copy_s3(output, backup_path)
+        logger.info(f"[{self.config.table_name}] S3 yedek: {backup_path}")
+    
+    @contextmanager
+    def _open_output(self, backup: bool = True) -> Iterator[_OutputSink]:
+        """Çıktı için yazma hedefi açar; blok hatasız biterse çıktıyı yayınlar
+        
+        S3'te streaming_upload açıksa row group'lar üretildikçe multipart part olarak
+        yüklenir ve nesne upload sonda tamamlandığında atomik olarak değişir; hata
+        durumunda upload iptal edilir. Aksi halde local temp dosyaya yazılıp
+        _finalize_output ile hedefe taşınır.
+        """
+        if self._streams_to_s3:
+            fs = self._get_s3_fs()
+            s3_file = fs.open(
+                self.config.output_file.replace("s3://", ""),
+                "wb",
+                block_size=self.config.s3_config.multipart_chunk_size,
+            )
+            sink = _OutputSink(s3_file)
+            try:
+                yield sink
+            except BaseException:
+                abort_upload(s3_file)
+                raise
+            
+            if sink.discarded:
+                abort_upload(s3_file)
+                return
+            if backup:
+                # Upload tamamlanana kadar mevcut nesne değişmez
+                self._backup_s3(self.config.output_file)
+            # Son part ve multipart tamamlama; önceki part'lar encode sırasında yüklendi
+            with self.metrics.span("upload", bytes=s3_file.tell()):
+                s3_file.close()
+            logger.info(f"[{self.config.table_name}] S3'e yüklendi: {self.config.output_file}")
+            return
+        
+        temp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(mode='w+b', suffix='.parquet', delete=False) as temp_file:
+                temp_path = temp_file.name
+                sink = _OutputSink(temp_file)
+                yield sink
+            
+            if not sink.discarded:
+                self._finalize_output(temp_path, backup=backup)
+                temp_path = None  # Başarılı, silme
+        
+        finally:
+            # Hata durumunda temp dosyayı temizle
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
     def _finalize_output(self, temp_path: str, backup: bool = True) -> None:
         """Temp dosyayı hedef konuma taşır (local veya S3)"""
         output = self.config.output_file
         
         if self.config.is_s3_path:
             # S3 için
-            if backup and self._file_exists(output):
-                backup_path = f"{output}.backup"
-                self._copy_s3(output, backup_path)
-                print(f"[{self.config.table_name}] S3 yedek: {backup_path}")
+            if backup:
+                self._backup_s3(output)
             self._upload_to_s3(temp_path, output)
         else:
             # Local için
-            if backup and os.path.exists(output):
-                backup_path = f"{output}.backup"
-                os.replace(output, backup_path)
-                print(f"[{self.config.table_name}] Yedek dosya: {backup_path}")
-            os.replace(temp_path, output)
+            with self.metrics.span("finalize", bytes=os.path.getsize(temp_path)):
+                if backup and os.path.exists(output):
+                    backup_path = f"{output}.backup"
+                    os.replace(output, backup_path)
+                    logger.info(f"[{self.config.table_name}] Yedek dosya: {backup_path}")
+                os.replace(temp_path, output)
+    
+    def _manifest_path(self, backup: bool = False) -> str:
+        """Bucket layout manifest yolunu döndürür"""
+        path = self._join_path(self.config.output_file, MANIFEST_FILE)
+        return f"{path}.backup" if backup else path
+    
+    def _read_manifest(self, backup: bool = False) -> Optional[BucketManifest]:
+        """Bucket manifest'ini okur, yoksa None döner"""
+        text = self._read_text(self._manifest_path(backup))
+        if text is None:
+            return None
+        return BucketManifest.from_json(text)
+    
+    def _output_exists(self) -> bool:
+        """Hedef çıktının (dosya veya bucket manifest'i) var olup olmadığını kontrol eder"""
+        if self.config.is_bucketed:
+            return self._file_exists(self._manifest_path())
+        return self._file_exists(self.config.output_file)
+    
+    def _publish_buckets(self, temp_dir: str, manifest: BucketManifest, written: List[str]) -> None:
+        """Yazılan bucket dosyalarını hedefe taşır ve yeni manifest'i yayınlar
+        
+        Manifest en son yazılır; yayınlanana kadar okuyucular eski versiyonu görür.
+        Önceki manifest `.backup` olarak saklanır, ikisinde de olmayan dosyalar silinir.
+        """
+        output = self.config.output_file
+        if not self.config.is_s3_path:
+            os.makedirs(output, exist_ok=True)
+        
+        for name in written:
+            local_path = os.path.join(temp_dir, name)
+            target_path = self._join_path(output, name)
+            if self.config.is_s3_path:
+                self._upload_to_s3(local_path, target_path)
+            else:
+                with self.metrics.span("finalize", bytes=os.path.getsize(local_path)):
+                    os.replace(local_path, target_path)
+        
+        with self.metrics.span("finalize"):
+            previous = self._read_manifest()
+            old_backup = self._read_manifest(backup=True)
+            if previous is not None:
+                self._write_text(self._manifest_path(backup=True), previous.to_json())
+            self._write_text(self._manifest_path(), manifest.to_json())
+            logger.info(f"[{self.config.table_name}] Manifest yayınlandı: v{manifest.version} "
+                        f"({len(written)} bucket yazıldı, toplam {len(manifest.buckets)} bucket)")
+            
+            # Ne yeni manifest'te ne de yedekte kalan eski dosyaları temizle
+            for name in unreferenced_files(old_backup, manifest, previous):
+                self._delete_path(self._join_path(output, name))
+    
+    def _watermark_metadata(self, hist_id: Optional[int], row_count: Optional[int] = None) -> Dict[str, str]:
+        """Footer'a yazılacak watermark metadata'sını oluşturur"""
+        metadata = {}
+        if row_count is not None:
+            metadata[ROW_COUNT_METADATA_KEY] = str(row_count)
+        if hist_id is not None:
+            metadata[HIST_ID_METADATA_KEY] = str(hist_id)
+        return metadata
+    
+    def _open_writer(self, where, schema: pa.Schema) -> MeteredWriter:
+        """Writer profiline göre parquet writer açar; yazma süresi encode fazına eklenir"""
+        return MeteredWriter(open_parquet_writer(where, schema, self.config.writer_profile), self.metrics)
+    
+    def _read_footer(self, path: str) -> pq.FileMetaData:
+        """Sadece parquet footer'ını okur (S3'te range request ile)"""
+        if path.startswith("s3://"):
+            fs = self._get_s3_fs()
+            with fs.open(path.replace("s3://", ""), "rb") as f:
+                return pq.read_metadata(f)
+        return pq.read_metadata(path)
+    
+    def _hist_id_from_statistics(self, paths: List[str]) -> Optional[int]:
+        """Row group istatistiklerinden en yüksek Hist_ID'yi bulur, eksik istatistikte None döner"""
+        hist_id = None
+        for path in paths:
+            footer = self._read_footer(path)
+            index = footer.schema.to_arrow_schema().get_field_index(self.config.hist_id_column)
+            if index < 0:
+                return None
+            for i in range(footer.num_row_groups):
+                statistics = footer.row_group(i).column(index).statistics
+                if statistics is None or not statistics.has_min_max:
+                    return None
+                hist_id = statistics.max if hist_id is None else max(hist_id, statistics.max)
+        return hist_id
+    
+    def _read_hist_id(self) -> Optional[int]:
+        """Çıktıya en son uygulanan Hist_ID'yi okur
+        
+        Sırasıyla footer metadata'sı / manifest, row group istatistikleri ve
+        son çare olarak Hist_ID sütununun taranması denenir.
+        """
+        output = self.config.output_file
+        if self.config.is_bucketed:
+            manifest = self._read_manifest()
+            if manifest.hist_id is not None:
+                return manifest.hist_id
+            paths = [self._join_path(output, name) for name in manifest.files()]
+        else:
+            value = (self._read_footer(output).metadata or {}).get(HIST_ID_METADATA_KEY.encode())
+            if value is not None:
+                return int(value)
+            paths = [output]
+        
+        hist_id = self._hist_id_from_statistics(paths)
+        if hist_id is not None:
+            return hist_id
+        
+        return (
+            self._scan_parquet(output)
+            .select(pl.col(self.config.hist_id_column))
+            .max()
+            .collect()
+            .item()
+        )
     
     def _get_column_list(self, include_hist: bool = False) -> str:
         """Sütun listesini string olarak döndürür"""
@@ -107,7 +396,77 @@ class DatabaseToParquet:
             cols.extend([self.config.hist_id_column, self.config.hist_operation_column])
         return ', '.join(cols)
     
-    def _read_changes(self, hist_id: int) -> Iterator[pl.DataFrame]:
+    def _connectorx_uri(self) -> str:
+        """connectorx bağlantı adresini döndürür
+        
+        Verilmemişse engine URL'inden türetilir: SQLAlchemy driver eki (mssql+pyodbc -> mssql)
+        ve ODBC driver parametresi atılır.
+        """
+        if self.config.connectorx_uri:
+            return self.config.connectorx_uri
+        url = self.engine.url
+        url = url.set(drivername=url.get_backend_name()).difference_update_query(["driver"])
+        return url.render_as_string(hide_password=False)
+    
+    def _read_query(self, query: str, parameters: Optional[Dict] = None, connection=None) -> Iterator[pa.Table]:
+        """Sorguyu batch_size'lık Arrow tabloları halinde okur
+        
+        reader_backend="connectorx" ise RecordBatch'ler doğrudan Arrow olarak gelir;
+        satırlar Python objesine ve Polars DataFrame'e çevrilmez.
+        
+        Args:
+            query: :isim yer tutuculu SQL sorgusu
+            parameters: Yer tutucu değerleri
+            connection: Okuma süresince tutulan pool bağlantısı (verilmezse havuzdan alınır).
+                connectorx kendi bağlantısını açar; pool bağlantısı yine de tutulur ki
+                kaynak başına bağlantı limiti iki backend'de de geçerli olsun.
+        """
+        if connection is None:
+            with self._connect() as conn:
+                yield from self._read_query(query, parameters, connection=conn)
+            return
+        
+        if self.config.reader_backend == "connectorx":
+            try:
+                import connectorx as cx
+            except ImportError:
+                raise ImportError("reader_backend='connectorx' için connectorx kurulu olmalı: pip install connectorx")
+            
+            if parameters:
+                query = _PARAMETER_PATTERN.sub(lambda m: _sql_literal(parameters[m.group(1)]), query)
+            reader = cx.read_sql(
+                self._connectorx_uri(),
+                query,
+                return_type="arrow_stream",
+                batch_size=self.config.batch_size,
+            )
+            for batch in self.metrics.timed(reader, "fetch", rows=len, bytes=lambda b: b.nbytes):
+                if batch.num_rows:
+                    yield pa.Table.from_batches([batch])
+            return
+        
+        batches = pl.read_database(
+            query=query,
+            connection=connection.execution_options(stream_results=True),
+            iter_batches=True,
+            batch_size=self.config.batch_size,
+            execute_options={"parameters": parameters} if parameters else None,
+        )
+        for df in self.metrics.timed(batches, "fetch", rows=len):
+            with self.metrics.span("convert", rows=df.height) as span:
+                table = df.to_arrow()
+                span.add(bytes=table.nbytes)
+            yield table
+    
+    @contextmanager
+    def _connect(self):
+        """Havuzdan bağlantı alır; bekleme süresi queue_wait fazına eklenir"""
+        with self.metrics.span("queue_wait"):
+            conn = self.engine.connect()
+        with conn:
+            yield conn
+    
+    def _read_changes(self, hist_id: int) -> Iterator[pa.Table]:
         """Belirtilen Hist_ID'den sonraki değişiklikleri okur"""
         query = f"""
             SELECT {self._get_column_list(include_hist=True)}
@@ -116,107 +475,423 @@ class DatabaseToParquet:
             ORDER BY {self.config.hist_id_column}
         """
         
-        for df in pl.read_database(
-            query=query,
-            connection=self.engine.execution_options(stream_results=True),
-            iter_batches=True,
-            batch_size=self.config.batch_size,
-            execute_options={"parameters": {"hist_id": hist_id}}
-        ):
-            yield df
+        yield from self._read_query(query, {"hist_id": hist_id})
     
-    def init_parquet(self) -> None:
-        """Ana tablodan ilk Parquet dosyasını oluşturur (temp file üzerinden)"""
-        start_time = time.time()
-        row_count = 0
-        temp_file_path = None
+    def _read_table(self) -> Iterator[pa.Table]:
+        """Ana tablonun tamamını güncel Hist_ID ile birlikte okur"""
+        if self.engine.dialect.name == "mssql":
+            query = f"""
+                DECLARE @{self.config.hist_id_column} BIGINT
+                SELECT @{self.config.hist_id_column} = MAX({self.config.hist_id_column}) 
+                FROM {self.config.hist_table_name}
+                
+                SELECT {self._get_column_list()}, 
+                       @{self.config.hist_id_column} as {self.config.hist_id_column}, 
+                       {self.config.hist_operation_column} = 1
+                FROM {self.config.table_name}
+            """
+        else:
+            # T-SQL değişkeni olmayan veritabanları (PostgreSQL, SQLite, DuckDB) için
+            query = f"""
+                SELECT {self._get_column_list()},
+                       (SELECT MAX({self.config.hist_id_column}) FROM {self.config.hist_table_name})
+                           AS {self.config.hist_id_column},
+                       1 AS {self.config.hist_operation_column}
+                FROM {self.config.table_name}
+            """
         
+        yield from self._read_query(query)
+    
+    def _read_max_hist_id(self) -> Optional[int]:
+        """History tablosundaki en yüksek Hist_ID'yi okur"""
+        query = f"SELECT MAX({self.config.hist_id_column}) AS max_id FROM {self.config.hist_table_name}"
+        return pl.read_database(query, self.engine).item()
+    
+    def _plan_ranges(self, partition_num: int) -> List[tuple]:
+        """PK uzayını NTILE ile yaklaşık eşit satır sayılı aralıklara böler"""
+        pk = self.config.primary_key
         query = f"""
-            DECLARE @{self.config.hist_id_column} BIGINT
-            SELECT @{self.config.hist_id_column} = MAX({self.config.hist_id_column}) 
-            FROM {self.config.hist_table_name}
-            
-            SELECT {self._get_column_list()}, 
-                   @{self.config.hist_id_column} as {self.config.hist_id_column}, 
-                   {self.config.hist_operation_column} = 1
+            SELECT Part, MIN({pk}) AS BeginPart, MAX({pk}) AS EndPart
+            FROM (
+                SELECT NTILE({partition_num}) OVER (ORDER BY {pk}) AS Part, {pk}
+                FROM {self.config.table_name}
+            ) r
+            GROUP BY Part
+            ORDER BY Part
+        """
+        return [
+            (row["BeginPart"], row["EndPart"])
+            for row in pl.read_database(query, self.engine).iter_rows(named=True)
+        ]
+    
+    def _read_range(self, begin, end, hist_id: Optional[int]) -> Iterator[pa.Table]:
+        """Ana tablonun bir PK aralığını kendi bağlantısı üzerinden okur"""
+        query = f"""
+            SELECT {self._get_column_list()}
             FROM {self.config.table_name}
+            WHERE {self.config.primary_key} BETWEEN :begin AND :end
         """
         
+        with self._connect() as conn:
+            for table in self._read_query(query, {"begin": begin, "end": end}, connection=conn):
+                yield (
+                    table
+                    .append_column(self.config.hist_id_column, pa.repeat(pa.scalar(hist_id, pa.int64()), table.num_rows))
+                    .append_column(self.config.hist_operation_column, pa.repeat(pa.scalar(1, pa.int64()), table.num_rows))
+                )
+    
+    def _write_range(self, part_path: str, begin, end, hist_id: Optional[int]) -> int:
+        """Bir PK aralığını kendi part dosyasına yazar, yazılan satır sayısını döner"""
+        writer = None
+        row_count = 0
         try:
-            with tempfile.NamedTemporaryFile(mode='w+b', suffix='.parquet', delete=False) as temp_file:
-                temp_file_path = temp_file.name
+            for table in self._read_range(begin, end, hist_id):
+                if writer is None:
+                    writer = self._open_writer(part_path, table.schema)
+                writer.write_table(table)
+                row_count += table.num_rows
+        finally:
+            if writer:
+                writer.close()
+        
+        logger.info(f"[{self.config.table_name}] Aralık {begin} - {end} yazıldı: {row_count:,} satır.")
+        return row_count
+    
+    def _init_parallel(self) -> int:
+        """PK aralıklarını ayrı bağlantılarla paralel okur, part dosyalarını birleştirir"""
+        parallelism = self.config.init_parallelism
+        hist_id = self._read_max_hist_id()
+        ranges = self._plan_ranges(parallelism)
+        logger.info(f"[{self.config.table_name}] {len(ranges)} aralık, {parallelism} bağlantı ile okunuyor...")
+        
+        temp_dir = tempfile.mkdtemp(prefix=f"{self.config.table_name}_")
+        try:
+            part_paths = [os.path.join(temp_dir, f"range_{i}.parquet") for i in range(len(ranges))]
+            with ThreadPoolExecutor(max_workers=parallelism) as pool:
+                futures = [
+                    pool.submit(self._write_range, part_path, begin, end, hist_id)
+                    for part_path, (begin, end) in zip(part_paths, ranges)
+                ]
+                row_count = sum(future.result() for future in futures)
+            
+            if row_count == 0:
+                return 0
+            
+            # Part'lar PK sırasında; şema farklarını (örn. tamamı NULL sütun) gevşek birleştir
+            parts = pl.concat(
+                [pl.scan_parquet(path) for path in part_paths if os.path.exists(path)],
+                how="vertical_relaxed",
+            )
+            
+            batches = self.metrics.timed(parts.collect_batches(chunk_size=self.config.batch_size), "convert", rows=len)
+            if self.config.is_bucketed:
+                return self._write_buckets(batches)
+            
+            with self._open_output(backup=True) as sink:
                 writer = None
-                
-                for i, df in enumerate(pl.read_database(
-                    query=query,
-                    connection=self.engine.execution_options(stream_results=True),
-                    iter_batches=True,
-                    batch_size=self.config.batch_size
-                )):
-                    table = df.to_arrow()
-                    
+                for batch in batches:
+                    table = batch.to_arrow()
                     if writer is None:
-                        writer = pq.ParquetWriter(temp_file, table.schema)
-                    
+                        writer = self._open_writer(sink.file, table.schema)
                     writer.write_table(table)
-                    row_count += len(df)
-                    print(f"[{self.config.table_name}] Parça {i+1} işlendi. Toplam: {row_count:,} satır.")
+                writer.add_key_value_metadata(self._watermark_metadata(hist_id, row_count))
+                writer.close()
+            return row_count
+        
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _init_file(self) -> int:
+        """Ana tablodan tek dosyalık çıktıyı oluşturur, yazılan satır sayısını döner"""
+        row_count = 0
+        hist_id = None
+        
+        with self._open_output(backup=True) as sink:
+            writer = None
+            
+            for i, table in enumerate(self._read_table()):
+                if writer is None:
+                    writer = self._open_writer(sink.file, table.schema)
                 
-                if writer:
-                    writer.close()
+                writer.write_table(table)
+                row_count += table.num_rows
+                hist_id = pc.max(table[self.config.hist_id_column]).as_py()
+                logger.info(f"[{self.config.table_name}] Parça {i+1} işlendi. Toplam: {row_count:,} satır.")
             
-            # Başarılı ise dosyayı hedef konuma taşı (local veya S3)
-            if row_count > 0:
-                self._finalize_output(temp_file_path, backup=True)
-                temp_file_path = None  # Başarılı, silme
+            if writer:
+                writer.add_key_value_metadata(self._watermark_metadata(hist_id, row_count))
+                writer.close()
+            
+            # Veri yoksa mevcut çıktıya dokunma
+            if row_count == 0:
+                sink.discard()
+        
+        return row_count
+    
+    def _write_buckets(self, batches: Iterator[pl.DataFrame]) -> int:
+        """Batch'leri bucket layout'ta yazar ve yayınlar, yazılan satır sayısını döner
+        
+        Her batch PK aralığına göre bölünür ve her bucket kendi writer'ına yazılır.
+        """
+        pk = self.config.primary_key
+        row_count = 0
+        
+        previous = self._read_manifest()
+        manifest = BucketManifest(
+            primary_key=pk,
+            bucket_size=self.config.bucket_size,
+            version=previous.version + 1 if previous else 1,
+        )
+        
+        temp_dir = tempfile.mkdtemp(prefix=f"{self.config.table_name}_")
+        writers = {}
+        try:
+            for i, df in enumerate(batches):
+                with self.metrics.span("convert", rows=df.height):
+                    df = df.with_columns((pl.col(pk) // manifest.bucket_size).alias("__bucket"))
+                    parts = df.partition_by("__bucket", as_dict=True)
                 
-                elapsed = (time.time() - start_time) / 60
-                print(f"[{self.config.table_name}] İlk yükleme tamamlandı! Süre: {elapsed:.2f} dk")
+                for (bucket,), part in parts.items():
+                    table = part.drop("__bucket").to_arrow()
+                    info = manifest.buckets.get(bucket)
+                    if info is None:
+                        info = manifest.buckets[bucket] = BucketInfo(file=manifest.file_name(bucket))
+                        writers[bucket] = self._open_writer(os.path.join(temp_dir, info.file), table.schema)
+                    
+                    writers[bucket].write_table(table)
+                    key_min, key_max = part[pk].min(), part[pk].max()
+                    info.rows += part.height
+                    info.min_key = key_min if info.min_key is None else min(info.min_key, key_min)
+                    info.max_key = key_max if info.max_key is None else max(info.max_key, key_max)
+                
+                row_count += len(df)
+                batch_hist_id = df[self.config.hist_id_column].max()
+                if batch_hist_id is not None:
+                    manifest.hist_id = max(manifest.hist_id or batch_hist_id, batch_hist_id)
+                logger.info(f"[{self.config.table_name}] Parça {i+1} işlendi. Toplam: {row_count:,} satır.")
+            
+            for writer in writers.values():
+                writer.close()
+            writers.clear()
+            
+            if row_count > 0:
+                self._publish_buckets(temp_dir, manifest, manifest.files())
+            return row_count
+        
+        finally:
+            for writer in writers.values():
+                writer.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def init_parquet(self) -> None:
+        """Ana tablodan ilk Parquet dosyasını oluşturur (temp file üzerinden)
+        
+        init_parallelism > 1 ise PK aralıkları ayrı bağlantılarla paralel okunur.
+        """
+        self.metrics = RunMetrics(self.config.table_name, action="init")
+        
+        try:
+            if self.config.init_parallelism > 1:
+                row_count = self._init_parallel()
+            elif self.config.is_bucketed:
+                row_count = self._write_buckets(map(pl.from_arrow, self._read_table()))
+            else:
+                row_count = self._init_file()
+            
+            self.metrics.finish()
+            if row_count > 0:
+                logger.info(f"[{self.config.table_name}] İlk yükleme tamamlandı! {self.metrics.summary()}")
             else:
-                print(f"[{self.config.table_name}] Veri bulunamadı!")
+                logger.info(f"[{self.config.table_name}] Veri bulunamadı!")
         
         except Exception as e:
-            print(f"\n!!! HATA !!!: {e}")
+            self.metrics.finish(success=False, error=str(e))
+            logger.error(f"[{self.config.table_name}] HATA: {e}")
             raise
-        
-        finally:
-            # Hata durumunda temp dosyayı temizle
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
     
     def _scan_parquet(self, path: str) -> pl.LazyFrame:
-        """Parquet dosyasını scan eder (local veya S3)"""
+        """Parquet dosyasını scan eder (local veya S3)
+        
+        Bucket layout'ta çıktı klasörü verilirse manifest'teki dosyalar tek tablo olarak okunur.
+        """
+        source = path
+        if self.config.is_bucketed and path == self.config.output_file:
+            manifest = self._read_manifest()
+            source = [self._join_path(path, name) for name in manifest.files()]
         if path.startswith("s3://"):
-            return pl.scan_parquet(path, storage_options=self.config.storage_options)
-        return pl.scan_parquet(path)
+            return pl.scan_parquet(source, storage_options=self.config.storage_options)
+        return pl.scan_parquet(source)
+    
+    def _sync_file(self, change_df: pl.LazyFrame, hist_id: int) -> None:
+        """Tekilleştirilmiş değişiklikleri tek dosyalık çıktıya uygular"""
+        with self._open_output(backup=True) as sink:
+            parquet_writer = None
+            row_count = 0
+            
+            # Aktif kayıtlar (Hist_Islem > 0) ve mevcut dosyadan değişmeyen kayıtlar
+            upserts = change_df.filter(pl.col(self.config.hist_operation_column) > 0)
+            unchanged = (
+                self._scan_parquet(self.config.output_file)
+                .join(change_df, on=self.config.primary_key, how="anti")
+            )
+            for frame in (upserts, unchanged):
+                batches = frame.collect_batches(chunk_size=self.config.batch_size)
+                for batch in self.metrics.timed(batches, "convert", rows=len):
+                    table = batch.to_arrow()
+                    if parquet_writer is None:
+                        parquet_writer = self._open_writer(sink.file, table.schema)
+                    parquet_writer.write_table(table)
+                    row_count += len(batch)
+            
+            if parquet_writer is None:
+                # Tüm kayıtlar silinmiş; şemayı koruyarak boş dosya yaz
+                schema = pl.DataFrame(schema=unchanged.collect_schema()).to_arrow().schema
+                parquet_writer = self._open_writer(sink.file, schema)
+            
+            parquet_writer.add_key_value_metadata(self._watermark_metadata(hist_id, row_count))
+            parquet_writer.close()
+    
+    def _write_dataframe(self, df: pl.DataFrame, path: str) -> None:
+        """DataFrame'i writer profiline göre parquet olarak yazar"""
+        profile = self.config.writer_profile
+        with self.metrics.span("encode", rows=df.height, bytes=df.estimated_size()):
+            if profile is None:
+                df.write_parquet(path)
+            else:
+                df.write_parquet(path, **profile.polars_options())
+    
+    def _iter_bucket_changes(self, change_df: pl.LazyFrame, bucket_size: int) -> Iterator[tuple]:
+        """Tekilleştirilmiş değişiklikleri (bucket, DataFrame) olarak döndürür"""
+        pk = self.config.primary_key
+        if self.config.sync_engine == "duckdb":
+            # Değişiklikler diske PK sıralı yazıldı; her bucket ayrı okunur, bellekte
+            # aynı anda sadece bir bucket'ın değişiklikleri bulunur
+            with self.metrics.span("convert"):
+                buckets = change_df.select((pl.col(pk) // bucket_size).unique().sort()).collect().to_series()
+            for bucket in buckets:
+                with self.metrics.span("convert") as span:
+                    bucket_changes = change_df.filter(
+                        pl.col(pk).is_between(bucket * bucket_size, (bucket + 1) * bucket_size, closed="left")
+                    ).collect()
+                    span.add(rows=bucket_changes.height)
+                yield bucket, bucket_changes
+            return
+        
+        with self.metrics.span("convert") as span:
+            changes = change_df.with_columns((pl.col(pk) // bucket_size).alias("__bucket")).collect()
+            parts = changes.partition_by("__bucket", as_dict=True)
+            span.add(rows=changes.height)
+        for (bucket,), bucket_changes in parts.items():
+            yield bucket, bucket_changes.drop("__bucket")
+    
+    def _sync_out_of_core(self, change_file_path: str, hist_id: int) -> None:
+        """Değişiklikleri DuckDB ile bellek limitli olarak uygular (sync_engine="duckdb")"""
+        temp_dir = tempfile.mkdtemp(prefix=f"{self.config.table_name}_")
+        try:
+            with OutOfCoreMerger(self.config, filesystem=self._get_s3_fs()) as merger:
+                deduped_path = os.path.join(temp_dir, "changes.parquet")
+                with self.metrics.span("convert"):
+                    merger.dedup_changes(change_file_path, deduped_path)
+                
+                if self.config.is_bucketed:
+                    self._sync_buckets(pl.scan_parquet(deduped_path), hist_id)
+                    return
+                
+                # Satır sayısı zaten footer'da (num_rows); burada sadece Hist_ID yazılır
+                output_path = os.path.join(temp_dir, "output.parquet")
+                with self.metrics.span("encode"):
+                    merger.merge(
+                        deduped_path,
+                        [self.config.output_file],
+                        output_path,
+                        metadata=self._watermark_metadata(hist_id),
+                    )
+            
+            self._finalize_output(output_path, backup=True)
+        
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _sync_buckets(self, change_df: pl.LazyFrame, hist_id: int) -> None:
+        """Tekilleştirilmiş değişiklikleri bucket layout'a uygular
+        
+        Sadece değişen PK'ları içeren bucket'lar yeniden yazılır,
+        diğer bucket dosyalarına dokunulmaz.
+        """
+        pk = self.config.primary_key
+        manifest = self._read_manifest().next_version()
+        manifest.hist_id = hist_id
+        
+        temp_dir = tempfile.mkdtemp(prefix=f"{self.config.table_name}_")
+        written = []
+        try:
+            for bucket, bucket_changes in self._iter_bucket_changes(change_df, manifest.bucket_size):
+                upserts = bucket_changes.filter(pl.col(self.config.hist_operation_column) > 0)
+                
+                frames = [upserts.lazy()]
+                current = manifest.buckets.get(bucket)
+                if current is not None:
+                    # Bucket'tan değişmeyen kayıtlar
+                    frames.append(
+                        self._scan_parquet(self._join_path(self.config.output_file, current.file))
+                        .join(bucket_changes.lazy().select(pk), on=pk, how="anti")
+                    )
+                
+                with self.metrics.span("convert"):
+                    df = pl.concat(frames, how="vertical_relaxed").sort(pk).collect()
+                if df.is_empty():
+                    # Bucket'taki tüm kayıtlar silinmiş
+                    manifest.buckets.pop(bucket, None)
+                    continue
+                
+                info = BucketInfo(
+                    file=manifest.file_name(bucket),
+                    rows=df.height,
+                    min_key=df[pk].min(),
+                    max_key=df[pk].max(),
+                )
+                self._write_dataframe(df, os.path.join(temp_dir, info.file))
+                manifest.buckets[bucket] = info
+                written.append(info.file)
+            
+            self._publish_buckets(temp_dir, manifest, written)
+        
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
     
     def sync_changes(self) -> bool:
         """Değişiklikleri senkronize eder. Değişiklik varsa True döner."""
-        start_time = time.time()
+        self.metrics = RunMetrics(self.config.table_name, action="sync")
+        try:
+            has_changes = self._sync_changes()
+        except Exception as e:
+            self.metrics.finish(success=False, error=str(e))
+            raise
         
-        # Mevcut en yüksek Hist_ID'yi al
-        current_hist_id = (
-            self._scan_parquet(self.config.output_file)
-            .select(pl.col(self.config.hist_id_column))
-            .max()
-            .collect()
-            .item()
-        )
-        print(f"[{self.config.table_name}] Mevcut {self.config.hist_id_column}: {current_hist_id}")
+        self.metrics.finish()
+        if has_changes:
+            logger.info(f"[{self.config.table_name}] Senkronizasyon tamamlandı! {self.metrics.summary()}")
+        return has_changes
+    
+    def _sync_changes(self) -> bool:
+        # Son uygulanan Hist_ID (footer metadata / manifest'ten O(1))
+        current_hist_id = self._read_hist_id()
+        logger.info(f"[{self.config.table_name}] Mevcut {self.config.hist_id_column}: {current_hist_id}")
         
         writer = None
         has_changes = False
+        last_hist_id = current_hist_id
         
         with tempfile.NamedTemporaryFile(mode='w+b', suffix='.parquet', delete=False) as change_file:
             change_file_path = change_file.name
             
             # Değişiklikleri geçici dosyaya yaz
-            for change_df in self._read_changes(current_hist_id):
+            for table in self._read_changes(current_hist_id):
                 has_changes = True
-                table = change_df.to_arrow()
+                last_hist_id = pc.max(table[self.config.hist_id_column]).as_py()
                 
                 if writer is None:
-                    writer = pq.ParquetWriter(change_file, schema=table.schema)
+                    writer = MeteredWriter(pq.ParquetWriter(change_file, schema=table.schema), self.metrics)
                 
                 writer.write_table(table)
             
@@ -224,67 +899,46 @@ class DatabaseToParquet:
                 writer.close()
         
         if not has_changes:
-            print(f"[{self.config.table_name}] Değişiklik bulunamadı.")
+            logger.info(f"[{self.config.table_name}] Değişiklik bulunamadı.")
             os.unlink(change_file_path)
             return False
         
-        output_file_path = None
         try:
             # Değişiklikleri işle
-            change_df = (
-                pl.scan_parquet(change_file_path)
-                .sort(self.config.hist_id_column)
-                .unique(subset=[self.config.primary_key], keep="last")
-            )
-            
-            parquet_writer = None
-            with tempfile.NamedTemporaryFile(mode='w+b', suffix='.parquet', delete=False) as output_file:
-                output_file_path = output_file.name
-                
-                # Aktif kayıtları yaz (Hist_Islem > 0)
-                for batch in change_df.filter(
-                    pl.col(self.config.hist_operation_column) > 0
-                ).collect_batches(chunk_size=self.config.batch_size):
-                    table = batch.to_arrow()
-                    if parquet_writer is None:
-                        parquet_writer = pq.ParquetWriter(output_file, schema=table.schema)
-                    parquet_writer.write_table(table)
+            if self.config.sync_engine == "duckdb":
+                self._sync_out_of_core(change_file_path, last_hist_id)
+            else:
+                change_df = (
+                    pl.scan_parquet(change_file_path)
+                    .sort(self.config.hist_id_column)
+                    .unique(subset=[self.config.primary_key], keep="last")
+                )
                 
-                if parquet_writer:
-                    # Mevcut dosyadan değişmeyen kayıtları ekle
-                    for batch in (
-                        self._scan_parquet(self.config.output_file)
-                        .join(change_df, on=self.config.primary_key, how="anti")
-                        .collect_batches(chunk_size=self.config.batch_size)
-                    ):
-                        parquet_writer.write(batch.to_arrow())
-                    
-                    parquet_writer.close()
-            
-            # Dosyaları hedef konuma taşı (local veya S3)
-            if parquet_writer:
-                self._finalize_output(output_file_path, backup=True)
-                output_file_path = None  # Başarılı
+                if self.config.is_bucketed:
+                    self._sync_buckets(change_df, last_hist_id)
+                else:
+                    self._sync_file(change_df, last_hist_id)
             
         finally:
             # Geçici dosyaları temizle
             if os.path.exists(change_file_path):
                 os.unlink(change_file_path)
-            if output_file_path and os.path.exists(output_file_path):
-                os.unlink(output_file_path)
         
-        elapsed = (time.time() - start_time) / 60
-        print(f"[{self.config.table_name}] Senkronizasyon tamamlandı! Süre: {elapsed:.2f} dk")
         return True
     
-    def run(self, force_init: bool = False) -> None:
-        """Ana çalıştırma metodu. Dosya yoksa init, varsa sync yapar."""
-        if force_init or not self._file_exists(self.config.output_file):
-            print(f"[{self.config.table_name}] İlk yükleme başlatılıyor...")
+    def run(self, force_init: bool = False) -> Tuple[str, bool]:
+        """Ana çalıştırma metodu. Dosya yoksa init, varsa sync yapar.
+        
+        Returns:
+            (action, changed): "init" veya "sync" ve çıktının değişip değişmediği
+        """
+        if force_init or not self._output_exists():
+            logger.info(f"[{self.config.table_name}] İlk yükleme başlatılıyor...")
             self.init_parquet()
-        else:
-            print(f"[{self.config.table_name}] Değişiklikler senkronize ediliyor...")
-            self.sync_changes()
+            return "init", True
+        
+        logger.info(f"[{self.config.table_name}] Değişiklikler senkronize ediliyor...")
+        return "sync", self.sync_changes()
     
     def dispose(self) -> None:
         """Kaynakları temizler (sadece engine'i biz oluşturduysak)"""
@@ -0,0 +1,128 @@
+"""
+Uzun süren yüklemeler için kaldığı yerden devam (resume) journal'ı
+
+Çalıştırma boyunca tamamlanan her aralık ve ürettiği çıktı, sadece sona eklenen
+(append-only) bir JSON lines dosyasına yazılır; her kayıt fsync edilir. Çalıştırma
+yarıda kalırsa (bağlantı kopması, süreç ölmesi) aynı parametrelerle tekrar
+başlatıldığında journal okunur, tamamlanan aralıklar atlanır ve sadece yarım kalanlar
+tekrar işlenir. Çalıştırma hatasız biterse journal silinir.
+
+Dosya formatı:
+
+    {"event": "run", "run_id": "...", "key": {...}, "started": "...", ...}
+    {"event": "done", "time": "...", "range": 1000000, "file": "part_1.parquet", "rows": 999812}
+    ...
+
+İlk satır çalıştırmayı tanımlar; key (tablo, kolonlar, chunk vb.) farklıysa eski
+journal geçersiz sayılır ve yeni çalıştırma başlar. Yazılırken kesilmiş son satır
+yok sayılır.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class RunJournal:
+    """Tamamlanan aralıkları ve çıktı dosyalarını kaydeden append-only journal"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Journal dosyası (local)
+        """
+        self.path = path
+        self.header: Dict[str, Any] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def run_id(self) -> str:
+        return self.header.get("run_id")
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        # Karşılaştırma dosyadan okunan hal ile yapılır (tuple -> list, datetime -> str)
+        return json.loads(json.dumps(value, default=str))
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Süreç yazarken ölmüş; sonraki satırlar da güvenilmez
+                    break
+        return records
+
+    def _append(self, record: Dict[str, Any], mode: str = "a") -> None:
+        with open(self.path, mode, encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self, key: Dict[str, Any]) -> bool:
+        """
+        Aynı key ile yarım kalmış çalıştırma varsa onu yükler ve True döndürür.
+        Dosyaya yazmaz; eşleşme yoksa journal olduğu gibi kalır.
+        """
+        records = self._load()
+        if records and records[0].get("event") == "run" and records[0].get("key") == self._normalize(key):
+            self.header, self.entries = records[0], records[1:]
+            logger.info(f"Journal: {self.path} kaldığı yerden devam ediyor ({len(self.entries)} kayıt)")
+            return True
+        return False
+
+    def start(self, key: Dict[str, Any], force: bool = False, **info) -> bool:
+        """
+        Aynı key ile yarım kalmış çalıştırma varsa onu yükler ve True döndürür;
+        yoksa yeni journal başlatır (info header'a yazılır, örn. tablo sınırları).
+        force=True ise mevcut journal yok sayılır ve her zaman yeni journal yazılır.
+        """
+        if not force and self.load(key):
+            return True
+
+        key = self._normalize(key)
+        if os.path.exists(self.path):
+            logger.warning(f"Journal: {self.path} geçersiz sayıldı, yeniden başlatılıyor")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.header = {
+            "event": "run",
+            "run_id": uuid.uuid4().hex,
+            "key": key,
+            "started": datetime.now().isoformat(),
+            **self._normalize(info),
+        }
+        self.entries = []
+        self._append(self.header, mode="w")
+        return False
+
+    def record(self, event: str, **fields) -> Dict[str, Any]:
+        """Kaydı diske yazar (fsync) ve döndürür"""
+        entry = {"event": event, "time": datetime.now().isoformat(), **self._normalize(fields)}
+        # Paralel çalışan aralıklar aynı journal'a yazar
+        with self._lock:
+            self._append(entry)
+            self.entries.append(entry)
+        return entry
+
+    def find(self, event: str, field: str) -> Dict[Any, Dict[str, Any]]:
+        """event kayıtlarını field değerine göre döndürür (aynı değer için son kayıt)"""
+        return {entry[field]: entry for entry in self.entries if entry.get("event") == event and field in entry}
+
+    def finish(self) -> None:
+        """Çalıştırma tamamlandı; journal silinir"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.header, self.entries = {}, []
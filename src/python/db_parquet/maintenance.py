@@ -0,0 +1,414 @@
+"""
+Parquet çıktıları için bakım (compaction) işlemleri
+
+Sık senkronizasyondan sonra dosyalar çok sayıda küçük row group'a bölünür ve PK
+sırası bozulur; DatabaseToParquet'in bıraktığı `.backup` dosyaları da birikir.
+ParquetMaintenance bu çıktıları yoğun olmayan saatlerde toparlamak içindir:
+
+    - Row group'ları hedef boyuta birleştirir ve dosyayı PK'ya göre yeniden sıralar
+    - Saklama süresini aşmış yedekleri siler
+    - Kazanılan byte miktarını raporlar
+
+Desteklenen çıktılar (local veya S3):
+    - Tek parquet dosyası (DatabaseToParquet)
+    - Bucket klasörü (_manifest.json ile, DatabaseToParquet bucket_size)
+    - part_N.parquet dosyalarından oluşan klasör (ParquetSynchronizer)
+
+Bakım sırasında aynı çıktıya senkronizasyon çalışmamalıdır.
+"""
+
+import json
+import math
+import os
+import posixpath
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .buckets import MANIFEST_FILE, BucketInfo, BucketManifest, abort_upload, column_ranges, unreferenced_files
+from .config import TableConfig
+from .profile import WriterProfile, open_parquet_writer
+
+
+@dataclass
+class MaintenanceReport:
+    """Bakım işleminin sonucu"""
+    path: str
+    files_compacted: int = 0
+    files_skipped: int = 0
+    row_groups_before: int = 0
+    row_groups_after: int = 0
+    bytes_before: int = 0  # Yeniden yazılan dosyaların eski boyutu
+    bytes_after: int = 0  # Yeniden yazılan dosyaların yeni boyutu
+    backups_removed: List[str] = field(default_factory=list)
+    backup_bytes_removed: int = 0
+    elapsed: float = 0.0  # saniye
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        """Compaction ve yedek temizliği ile kazanılan toplam byte"""
+        return self.bytes_before - self.bytes_after + self.backup_bytes_removed
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["bytes_reclaimed"] = self.bytes_reclaimed
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def summary(self) -> str:
+        """Okunabilir özet döndürür"""
+        return (
+            f"{self.path}: {self.files_compacted} dosya birleştirildi, {self.files_skipped} atlandı, "
+            f"row group {self.row_groups_before} -> {self.row_groups_after}, "
+            f"{len(self.backups_removed)} yedek silindi, "
+            f"kazanılan: {self.bytes_reclaimed / 1024 / 1024:.1f} MB ({self.elapsed:.1f} sn)"
+        )
+
+
+class ParquetMaintenance:
+    """Parquet çıktılarını birleştirir, PK'ya göre sıralar ve eski yedekleri temizler"""
+
+    def __init__(
+        self,
+        primary_key: str = "ID",
+        row_group_size: int = 1_000_000,
+        retention_days: float = 7,
+        writer_profile: Optional[WriterProfile] = None,
+        storage_options: Optional[Dict[str, Any]] = None,
+        force: bool = False,
+        memory_limit: str = "2GB",
+        spill_directory: Optional[str] = None,
+    ):
+        """
+        Args:
+            primary_key: Sıralama sütunu (bucket klasörlerinde manifest'teki değer kullanılır)
+            row_group_size: Hedef row group boyutu (satır)
+            retention_days: Bu süreden eski yedekler silinir
+            writer_profile: Yazma ayarları; verilmezse dosyanın mevcut sıkıştırması korunur
+            storage_options: S3 için fsspec/s3fs ayarları
+            force: Düzgün görünen dosyaları da yeniden yaz
+            memory_limit: Sıralama için DuckDB bellek bütçesi
+            spill_directory: Bellek aşıldığında kullanılacak klasör (varsayılan: temp)
+        """
+        self.primary_key = primary_key
+        self.row_group_size = row_group_size
+        self.retention_days = retention_days
+        self.writer_profile = writer_profile
+        self.storage_options = storage_options
+        self.force = force
+        self.memory_limit = memory_limit
+        self.spill_directory = spill_directory
+
+    @classmethod
+    def from_table_config(cls, config: TableConfig, **kwargs) -> "ParquetMaintenance":
+        """TableConfig'teki PK, writer profili ve S3 ayarlarıyla oluşturur"""
+        options = {
+            "primary_key": config.primary_key,
+            "writer_profile": config.writer_profile,
+            "storage_options": config.storage_options,
+            "memory_limit": config.memory_limit,
+            "spill_directory": config.spill_directory,
+        }
+        if config.writer_profile is not None and config.writer_profile.row_group_size:
+            options["row_group_size"] = config.writer_profile.row_group_size
+        options.update(kwargs)
+        return cls(**options)
+
+    def _filesystem(self, path: str):
+        """Yol için fsspec filesystem ve protokolsüz yolu döndürür"""
+        from fsspec.core import url_to_fs
+
+        if path.startswith("s3://"):
+            try:
+                import s3fs  # noqa: F401
+            except ImportError:
+                raise ImportError("S3 desteği için s3fs kurulu olmalı: pip install s3fs")
+        return url_to_fs(path, **(self.storage_options or {}))
+
+    @staticmethod
+    def _modified(info: dict) -> float:
+        """fsspec info sözlüğünden değiştirilme zamanını (epoch) döndürür"""
+        modified = info.get("mtime", info.get("LastModified"))
+        if isinstance(modified, datetime):
+            return modified.timestamp()
+        return float(modified or 0)
+
+    def _needs_compaction(self, metadata: pq.FileMetaData, pk_index: int) -> bool:
+        """Dosya parçalı veya PK sırası garanti değilse True döner"""
+        if self.force:
+            return True
+        if metadata.num_row_groups > max(1, math.ceil(metadata.num_rows / self.row_group_size)):
+            return True
+
+        previous_max = None
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            # Sadece bakımın yazdığı sıralı row group'lara güvenilir
+            sorting = row_group.sorting_columns
+            if not sorting or sorting[0].column_index != pk_index:
+                return True
+            stats = row_group.column(pk_index).statistics
+            if stats is None or not stats.has_min_max:
+                return True
+            if previous_max is not None and stats.min < previous_max:
+                return True
+            previous_max = stats.max
+        return False
+
+    def _writer_profile(self, metadata: pq.FileMetaData) -> WriterProfile:
+        """Yeniden yazma profilini döndürür (profil yoksa dosyanın sıkıştırması korunur)"""
+        if self.writer_profile is not None:
+            return replace(self.writer_profile, row_group_size=self.row_group_size)
+        codec = metadata.row_group(0).column(0).compression.lower()
+        return WriterProfile(
+            compression="none" if codec == "uncompressed" else codec,
+            row_group_size=self.row_group_size,
+        )
+
+    @staticmethod
+    def _is_local(fs) -> bool:
+        protocol = fs.protocol if isinstance(fs.protocol, tuple) else (fs.protocol,)
+        return "file" in protocol
+
+    def _read_manifest(self, fs, path: str) -> Optional[BucketManifest]:
+        if not fs.exists(path):
+            return None
+        return BucketManifest.from_json(fs.cat_file(path).decode("utf-8"))
+
+    def _write_text(self, fs, path: str, text: str) -> None:
+        """Metin dosyasını atomik olarak yazar (local: temp + rename, S3: tek PUT)"""
+        if self._is_local(fs):
+            fs.pipe_file(f"{path}.tmp", text.encode("utf-8"))
+            os.replace(f"{path}.tmp", path)
+        else:
+            fs.pipe_file(path, text.encode("utf-8"))
+
+    def _remove(self, fs, path: str, report: MaintenanceReport) -> None:
+        """Yedeği siler ve rapora ekler"""
+        size = fs.info(path)["size"]
+        fs.rm(path)
+        report.backups_removed.append(path)
+        report.backup_bytes_removed += size
+
+    def _sorted_batches(self, con, fs, source: str, primary_key: str, schema: pa.Schema) -> pa.RecordBatchReader:
+        """source'u DuckDB ile PK'ya göre sıralı batch akışı olarak okur
+
+        Sıralama DuckDB'de memory_limit ile çalışır; limit aşılınca spill_directory'ye
+        taşınır. Batch'ler dosyanın kendi arrow şemasına çevrilir.
+        """
+        path = source
+        if not self._is_local(fs):
+            # S3 gibi uzak dosyalar fsspec üzerinden okunur
+            con.register_filesystem(fs)
+            path = fs.unstrip_protocol(source)
+        reader = con.execute(
+            f"SELECT * FROM read_parquet(?) ORDER BY {primary_key}", [path]
+        ).fetch_record_batch(self.row_group_size)
+        return pa.RecordBatchReader.from_batches(schema, (batch.cast(schema) for batch in reader))
+
+    def _connect_duckdb(self):
+        """Bellek limitli DuckDB bağlantısı (sıralama için)"""
+        import duckdb
+
+        con = duckdb.connect()
+        con.execute(f"SET memory_limit = '{self.memory_limit}'")
+        con.execute(f"SET temp_directory = '{self.spill_directory or tempfile.gettempdir()}'")
+        return con
+
+    def _write_sorted(
+        self, fs, path: str, batches: pa.RecordBatchReader, profile: WriterProfile, pk_index: int,
+        metadata: Dict[bytes, bytes], primary_key: str,
+    ) -> Tuple[int, Any, Any]:
+        """Sıralı batch'leri path'e atomik olarak yazar; (satır, min PK, max PK) döndürür
+
+        Local'de temp dosyaya yazılıp rename edilir. S3'te nesne multipart upload
+        tamamlandığında değişir; hata olursa upload iptal edilir ve mevcut nesne korunur.
+        """
+        local = self._is_local(fs)
+        write_path = f"{path}.tmp" if local else path
+        rows, min_key, max_key = 0, None, None
+        out = fs.open(write_path, "wb")
+        try:
+            writer = open_parquet_writer(out, batches.schema, profile, sorting_columns=[pq.SortingColumn(pk_index)])
+            for batch in batches:
+                if batch.num_rows == 0:
+                    continue
+                keys = batch.column(primary_key)
+                if rows == 0:
+                    min_key = keys[0].as_py()
+                max_key = keys[-1].as_py()
+                rows += batch.num_rows
+                writer.write_table(pa.Table.from_batches([batch]))
+            if metadata:
+                writer.add_key_value_metadata(metadata)
+            writer.close()
+        except BaseException:
+            if local:
+                out.close()
+                fs.rm(write_path)
+            else:
+                abort_upload(out)
+            raise
+        out.close()
+        if local:
+            os.replace(write_path, path)
+        return rows, min_key, max_key
+
+    def _compact_file(
+        self, fs, source: str, target: str, primary_key: str, report: MaintenanceReport
+    ) -> Optional[BucketInfo]:
+        """source dosyasını PK sıralı ve hedef row group boyutunda target'a yazar
+
+        Dosya belleğe alınmaz; DuckDB ile sıralanıp row group boyutunda batch'ler
+        halinde yazılır. Dosya zaten düzgünse None, yazıldıysa yeni dosyanın
+        bilgilerini döndürür. Footer key-value metadata'sı (örn. Hist_ID watermark'ı) korunur.
+        """
+        with fs.open(source, "rb") as f:
+            metadata = pq.read_metadata(f)
+        schema = metadata.schema.to_arrow_schema()
+        pk_index = schema.get_field_index(primary_key)
+        if pk_index < 0:
+            raise ValueError(f"{source}: primary key sütunu bulunamadı: {primary_key}")
+
+        if metadata.num_row_groups == 0 or not self._needs_compaction(metadata, pk_index):
+            report.files_skipped += 1
+            return None
+
+        size_before = fs.info(source)["size"]
+        # Sonradan eklenen footer metadata'sı (watermark) arrow şemasında yoktur, ayrıca taşınır
+        footer = {
+            key: value for key, value in (metadata.metadata or {}).items() if key != b"ARROW:schema"
+        }
+        con = self._connect_duckdb()
+        try:
+            batches = self._sorted_batches(con, fs, source, primary_key, schema)
+            rows, min_key, max_key = self._write_sorted(
+                fs, target, batches, self._writer_profile(metadata), pk_index, footer, primary_key
+            )
+        finally:
+            con.close()
+
+        report.files_compacted += 1
+        report.row_groups_before += metadata.num_row_groups
+        report.row_groups_after += max(1, math.ceil(rows / self.row_group_size))
+        report.bytes_before += size_before
+        report.bytes_after += fs.info(target)["size"]
+
+        with fs.open(target, "rb") as f:
+            columns = column_ranges(pq.read_metadata(f))
+        return BucketInfo(
+            file=posixpath.basename(target),
+            rows=rows,
+            min_key=min_key,
+            max_key=max_key,
+            size=fs.info(target)["size"],
+            columns={column: bounds for column, bounds in columns.items() if bounds is not None},
+        )
+
+    def _compact_buckets(self, fs, root: str, report: MaintenanceReport) -> None:
+        """Bucket klasörünü yeni manifest versiyonu olarak birleştirir
+
+        Dosyalar yerinde değiştirilmez; birleştirilen bucket'lar yeni versiyon adıyla
+        yazılır ve manifest en son yayınlanır. Eski dosyalar yedek manifest'te kalır ve
+        saklama süresi dolunca clean_backups ile silinir.
+        """
+        manifest_path = posixpath.join(root, MANIFEST_FILE)
+        current = self._read_manifest(fs, manifest_path)
+        manifest = current.next_version()
+
+        for bucket, info in sorted(current.buckets.items()):
+            if info.deltas:
+                # Merge-on-read deltaları (ParquetSynchronizer) önce fold_deltas ile katlanmalı
+                report.files_skipped += 1
+                continue
+            compacted = self._compact_file(
+                fs,
+                posixpath.join(root, info.file),
+                posixpath.join(root, manifest.file_name(bucket)),
+                current.primary_key,
+                report,
+            )
+            if compacted is not None:
+                manifest.buckets[bucket] = compacted
+
+        if manifest.files() == current.files():
+            return
+
+        old_backup = self._read_manifest(fs, f"{manifest_path}.backup")
+        self._write_text(fs, f"{manifest_path}.backup", current.to_json())
+        self._write_text(fs, manifest_path, manifest.to_json())
+        for name in unreferenced_files(old_backup, manifest, current):
+            fs.rm(posixpath.join(root, name))
+
+    def _clean_backups(self, fs, root: str, report: MaintenanceReport) -> None:
+        """Saklama süresini aşmış yedekleri siler"""
+        cutoff = time.time() - self.retention_days * 24 * 60 * 60
+
+        if not fs.isdir(root):
+            # Tek dosya: kopya yedek veya S3 versiyon referansı
+            for backup_path in (f"{root}.backup", f"{root}.backup.json"):
+                if fs.exists(backup_path) and self._modified(fs.info(backup_path)) < cutoff:
+                    self._remove(fs, backup_path, report)
+            return
+
+        manifest_path = posixpath.join(root, MANIFEST_FILE)
+        current = self._read_manifest(fs, manifest_path)
+        if current is None:
+            # Manifest'siz klasörlerde (eski ParquetSynchronizer) yedek yok
+            return
+
+        backup_path = f"{manifest_path}.backup"
+        backup = self._read_manifest(fs, backup_path)
+        if backup is not None and self._modified(fs.info(backup_path)) < cutoff:
+            for name in unreferenced_files(backup, current):
+                file_path = posixpath.join(root, name)
+                if fs.exists(file_path):
+                    self._remove(fs, file_path, report)
+            self._remove(fs, backup_path, report)
+            backup = None
+
+        # Yarım kalmış işlemlerden kalan, hiçbir manifest'te olmayan dosyalar
+        referenced = set(current.files()) | set(backup.files() if backup else [])
+        for file_path in fs.glob(posixpath.join(root, "*.parquet")):
+            if posixpath.basename(file_path) not in referenced and self._modified(fs.info(file_path)) < cutoff:
+                self._remove(fs, file_path, report)
+
+    def compact(self, path: str) -> MaintenanceReport:
+        """Dosyayı veya klasördeki dosyaları birleştirir ve PK'ya göre sıralar
+
+        Args:
+            path: Parquet dosyası, bucket klasörü veya part_N.parquet klasörü (local veya s3://)
+        """
+        return self.run(path, compact=True, clean_backups=False)
+
+    def clean_backups(self, path: str) -> MaintenanceReport:
+        """Saklama süresini aşmış yedekleri siler"""
+        return self.run(path, compact=False, clean_backups=True)
+
+    def run(self, path: str, compact: bool = True, clean_backups: bool = True) -> MaintenanceReport:
+        """Compaction ve yedek temizliğini çalıştırır, raporu döndürür"""
+        start_time = time.time()
+        report = MaintenanceReport(path=path)
+        fs, root = self._filesystem(path)
+
+        if compact:
+            if not fs.isdir(root):
+                self._compact_file(fs, root, root, self.primary_key, report)
+            elif fs.exists(posixpath.join(root, MANIFEST_FILE)):
+                self._compact_buckets(fs, root, report)
+            else:
+                for file_path in sorted(fs.glob(posixpath.join(root, "*.parquet"))):
+                    self._compact_file(fs, file_path, file_path, self.primary_key, report)
+
+        if clean_backups:
+            self._clean_backups(fs, root, report)
+
+        report.elapsed = time.time() - start_time
+        return report
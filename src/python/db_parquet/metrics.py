@@ -0,0 +1,284 @@
+"""
+Faz bazlı metrikler
+
+DatabaseToParquet, ParquetSynchronizer ve delta_parquet_manager aynı RunMetrics'i
+kullanır. Her çalıştırma (init/sync) fazlara ayrılır; her faz için toplam süre, en
+uzun tek çağrı, satır ve byte sayısı tutulur:
+
+    fetch       Veritabanından okuma (bir sonraki batch'i bekleme süresi)
+    convert     Bellekte dönüştürme (Polars/Arrow, sıralama, tekilleştirme, bucket'lama)
+    encode      Parquet kodlama ve diske yazma
+    upload      S3'e yükleme
+    finalize    Yedek, rename, manifest / state yayınlama
+    queue_wait  Bağlantı havuzu veya kuyruk bekleme süresi
+
+Fazlar iç içe açılmaz; toplamları çalıştırma süresine yaklaşık eşittir (paralel okuma
+veya prefetch kullanıldığında fazlar örtüşür ve toplam, süreyi aşabilir). Kuyruk
+derinliği gibi anlık değerler observe ile örneklenir. Rapor JSON (to_json) veya
+Prometheus text formatı (to_prometheus) olarak alınabilir.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+PHASES = ("fetch", "convert", "encode", "upload", "finalize", "queue_wait")
+
+
+@dataclass
+class PhaseStats:
+    """Tek bir fazın toplamları"""
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class Observation:
+    """Örneklenen bir değerin (örn. kuyruk derinliği) özeti"""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Span:
+    """Açık bir fazın satır/byte sayaçları"""
+
+    def __init__(self, rows: int = 0, bytes: int = 0):
+        self.rows = rows
+        self.bytes = bytes
+
+    def add(self, rows: int = 0, bytes: int = 0) -> None:
+        self.rows += rows
+        self.bytes += bytes
+
+
+class RunMetrics:
+    """Bir çalıştırmanın faz süreleri ve sayaçları (thread-safe)"""
+
+    def __init__(self, name: str, **labels: str):
+        """
+        Args:
+            name: Çalıştırma adı (örn. tablo adı)
+            labels: Ek etiketler (örn. action="sync")
+        """
+        self.name = name
+        self.labels = labels
+        self.phases: Dict[str, PhaseStats] = {}
+        self.observations: Dict[str, Observation] = {}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.success: Optional[bool] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float, rows: int = 0, bytes: int = 0) -> None:
+        """Dışarıda ölçülmüş bir faz süresini ekler"""
+        with self._lock:
+            stats = self.phases.setdefault(phase, PhaseStats())
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+            stats.bytes += bytes
+
+    def observe(self, name: str, value: float) -> None:
+        """Anlık bir değeri örnekler (örn. prefetch kuyruğu derinliği)"""
+        with self._lock:
+            observation = self.observations.setdefault(name, Observation())
+            observation.count += 1
+            observation.total += value
+            observation.max = max(observation.max, value)
+            observation.last = value
+
+    @contextmanager
+    def span(self, phase: str, rows: int = 0, bytes: int = 0) -> Iterator[Span]:
+        """Blok süresini faza ekler; sayaçlar blok içinde span.add ile artırılabilir"""
+        span = Span(rows, bytes)
+        start_time = time.perf_counter()
+        try:
+            yield span
+        finally:
+            self.record(phase, time.perf_counter() - start_time, span.rows, span.bytes)
+
+    def timed(
+        self,
+        items: Iterable[Any],
+        phase: str = "fetch",
+        rows: Optional[Callable[[Any], int]] = None,
+        bytes: Optional[Callable[[Any], int]] = None,
+    ) -> Iterator[Any]:
+        """Iterable'dan bir sonraki elemanı bekleme süresini faza ekler
+
+        Tüketicinin eleman başına harcadığı süre sayılmaz; generator tabanlı
+        okuyucularda bu, kaynağı bekleme süresidir.
+        """
+        iterator = iter(items)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(phase, time.perf_counter() - start_time)
+                return
+            self.record(
+                phase,
+                time.perf_counter() - start_time,
+                rows(item) if rows else 0,
+                bytes(item) if bytes else 0,
+            )
+            yield item
+
+    def finish(self, success: bool = True, error: Optional[str] = None) -> "RunMetrics":
+        """Çalıştırmayı sonlandırır"""
+        self.finished_at = time.time()
+        self.success = success
+        self.error = error
+        return self
+
+    @property
+    def elapsed(self) -> float:
+        """Çalıştırma süresi (saniye); bitmediyse şu ana kadar"""
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            phases = {phase: asdict(stats) for phase, stats in self.phases.items()}
+            observations = {
+                name: {**asdict(observation), "mean": observation.mean}
+                for name, observation in self.observations.items()
+            }
+        return {
+            "name": self.name,
+            "labels": self.labels,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "elapsed": self.elapsed,
+            "success": self.success,
+            "error": self.error,
+            "phases": phases,
+            "observations": observations,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "db_parquet") -> str:
+        return prometheus_text([self], prefix)
+
+    def summary(self) -> str:
+        """Fazların süre dağılımını tek satır olarak döndürür"""
+        with self._lock:
+            parts = [
+                f"{phase}={stats.seconds:.2f}s"
+                for phase, stats in sorted(self.phases.items(), key=lambda item: -item[1].seconds)
+            ]
+        return f"Süre: {self.elapsed:.2f}s ({', '.join(parts) or '-'})"
+
+
+def rss_bytes() -> Optional[int]:
+    """Sürecin anlık RSS'ini döndürür (psutil yoksa /proc üzerinden)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_text(labels: Dict[str, Any]) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text(runs: Iterable[RunMetrics], prefix: str = "db_parquet") -> str:
+    """Çalıştırmaları Prometheus text formatına çevirir (örn. node_exporter textfile collector)"""
+    runs = list(runs)
+    families = [
+        ("phase_seconds_total", "counter", "Faz bazında toplam süre (saniye)", "seconds"),
+        ("phase_max_seconds", "gauge", "Faz içindeki en uzun tek çağrı (saniye)", "max_seconds"),
+        ("phase_calls_total", "counter", "Faz çağrı sayısı", "calls"),
+        ("phase_rows_total", "counter", "Fazda işlenen satır sayısı", "rows"),
+        ("phase_bytes_total", "counter", "Fazda işlenen byte sayısı", "bytes"),
+    ]
+
+    lines: List[str] = []
+    for suffix, kind, help_text, attribute in families:
+        lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+        lines.append(f"# TYPE {prefix}_{suffix} {kind}")
+        for run in runs:
+            base = {"run": run.name, **run.labels}
+            with run._lock:
+                for phase, stats in sorted(run.phases.items()):
+                    lines.append(f"{prefix}_{suffix}{_label_text({**base, 'phase': phase})} {getattr(stats, attribute)}")
+
+    observation_families = [
+        ("observed_mean", "Örneklenen değerin ortalaması", lambda observation: observation.mean),
+        ("observed_max", "Örneklenen değerin en büyüğü", lambda observation: observation.max),
+        ("observed_samples_total", "Örnek sayısı", lambda observation: observation.count),
+    ]
+    for suffix, help_text, value in observation_families:
+        lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+        lines.append(f"# TYPE {prefix}_{suffix} {'counter' if suffix.endswith('_total') else 'gauge'}")
+        for run in runs:
+            base = {"run": run.name, **run.labels}
+            with run._lock:
+                for name, observation in sorted(run.observations.items()):
+                    lines.append(f"{prefix}_{suffix}{_label_text({**base, 'name': name})} {value(observation)}")
+
+    run_families = [
+        ("run_duration_seconds", "Çalıştırma süresi (saniye)", lambda run: run.elapsed),
+        ("run_success", "Çalıştırma başarılı ise 1", lambda run: 1 if run.success else 0),
+        ("run_start_timestamp_seconds", "Çalıştırma başlangıç zamanı (unix)", lambda run: run.started_at),
+    ]
+    for suffix, help_text, value in run_families:
+        lines.append(f"# HELP {prefix}_{suffix} {help_text}")
+        lines.append(f"# TYPE {prefix}_{suffix} gauge")
+        for run in runs:
+            lines.append(f"{prefix}_{suffix}{_label_text({'run': run.name, **run.labels})} {value(run)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MeteredWriter:
+    """ParquetWriter çağrılarını encode fazı olarak ölçen sarmalayıcı"""
+
+    def __init__(self, writer, metrics: RunMetrics, phase: str = "encode"):
+        self._writer = writer
+        self.metrics = metrics
+        self.phase = phase
+
+    def write_table(self, table) -> None:
+        with self.metrics.span(self.phase, rows=table.num_rows, bytes=table.nbytes):
+            self._writer.write_table(table)
+
+    def write(self, table) -> None:
+        self.write_table(table)
+
+    def add_key_value_metadata(self, metadata: Dict[str, str]) -> None:
+        self._writer.add_key_value_metadata(metadata)
+
+    def close(self) -> None:
+        with self.metrics.span(self.phase):
+            self._writer.close()
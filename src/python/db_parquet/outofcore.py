@@ -0,0 +1,110 @@
+"""
+DuckDB tabanlı bellek limitli (out-of-core) değişiklik motoru
+
+sync_engine="duckdb" seçildiğinde sync_changes değişiklikleri Polars ile bellekte
+sıralayıp tekilleştirmek yerine bu motoru kullanır. DuckDB memory_limit'i aşan
+sıralama, window ve hash join işlemlerini temp_directory'ye taşırır (spill);
+sonuç COPY ... TO ile doğrudan parquet dosyasına akıtılır.
+"""
+
+import tempfile
+from typing import Dict, List, Optional
+
+from .config import TableConfig
+
+
+def _literal(value: str) -> str:
+    """Metni SQL string literal'ine çevirir"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _parquet_source(paths: List[str]) -> str:
+    """read_parquet(...) ifadesini oluşturur"""
+    return f"read_parquet([{', '.join(_literal(p) for p in paths)}], union_by_name = true)"
+
+
+class OutOfCoreMerger:
+    """Değişiklik dosyasını sabit bellekle tekilleştirir ve mevcut çıktıyla birleştirir"""
+
+    def __init__(self, config: TableConfig, filesystem=None):
+        """
+        Args:
+            config: Tablo konfigürasyonu (memory_limit, spill_directory buradan okunur)
+            filesystem: S3 çıktıları için fsspec filesystem (örn: s3fs.S3FileSystem)
+        """
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("sync_engine='duckdb' için duckdb kurulu olmalı: pip install duckdb")
+
+        self.config = config
+        self.con = duckdb.connect()
+        self.con.execute(f"SET memory_limit = {_literal(config.memory_limit)}")
+        self.con.execute(f"SET temp_directory = {_literal(config.spill_directory or tempfile.gettempdir())}")
+        # Sıra sadece ORDER BY ile garanti edilir; streaming COPY daha az bellek kullanır
+        self.con.execute("SET preserve_insertion_order = false")
+        if filesystem is not None:
+            self.con.register_filesystem(filesystem)
+
+    def _copy_options(self, metadata: Optional[Dict[str, str]] = None) -> str:
+        """COPY ... TO için parquet seçeneklerini oluşturur"""
+        options = ["FORMAT parquet"]
+        if self.config.writer_profile is not None:
+            options.extend(self.config.writer_profile.duckdb_options())
+        else:
+            options.append(f"ROW_GROUP_SIZE {self.config.batch_size}")
+        if metadata:
+            pairs = ", ".join(f"{_literal(k)}: {_literal(v)}" for k, v in metadata.items())
+            options.append(f"KV_METADATA {{{pairs}}}")
+        return ", ".join(options)
+
+    def dedup_changes(self, change_path: str, output_path: str) -> int:
+        """Her PK için en son (en yüksek Hist_ID) değişikliği PK sıralı olarak yazar"""
+        pk = self.config.primary_key
+        query = f"""
+            COPY (
+                SELECT *
+                FROM {_parquet_source([change_path])}
+                QUALIFY row_number() OVER (
+                    PARTITION BY {pk} ORDER BY {self.config.hist_id_column} DESC
+                ) = 1
+                ORDER BY {pk}
+            ) TO {_literal(output_path)} ({self._copy_options()})
+        """
+        return self.con.execute(query).fetchone()[0]
+
+    def merge(
+        self,
+        changes_path: str,
+        existing_paths: List[str],
+        output_path: str,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> int:
+        """Aktif değişiklikleri ve mevcut dosyadan değişmeyen kayıtları output_path'e yazar
+
+        changes_path, dedup_changes ile tekilleştirilmiş olmalıdır.
+        """
+        pk = self.config.primary_key
+        changes = _parquet_source([changes_path])
+        query = f"""
+            COPY (
+                SELECT * FROM {changes}
+                WHERE {self.config.hist_operation_column} > 0
+                UNION ALL BY NAME
+                SELECT * FROM {_parquet_source(existing_paths)} existing
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {changes} c WHERE c.{pk} = existing.{pk}
+                )
+            ) TO {_literal(output_path)} ({self._copy_options(metadata)})
+        """
+        return self.con.execute(query).fetchone()[0]
+
+    def close(self) -> None:
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
@@ -0,0 +1,149 @@
+"""
+Parquet writer profili
+
+Sıkıştırma, row group boyutu, dictionary, istatistik, page index ve bloom filter
+ayarlarını tek bir yerde toplar. DatabaseToParquet (TableConfig.writer_profile),
+sync.Sync ve exporter'lar aynı profili kabul eder.
+
+Hazır profiller:
+    fast-write   : snappy, büyük row group'lar; yazma hızı öncelikli
+    small-size   : yüksek seviye zstd, büyük row group'lar; disk/S3 maliyeti öncelikli
+    fast-lookup  : küçük row group'lar, page index ve key sütunlarında bloom filter;
+                   PK ile nokta okuma / filtreleme öncelikli
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+@dataclass
+class WriterProfile:
+    """Parquet yazma ayarları"""
+    compression: str = "zstd"
+    compression_level: Optional[int] = None
+    row_group_size: Optional[int] = 100_000
+    dictionary_columns: Optional[List[str]] = None  # None: tüm sütunlar
+    write_statistics: bool = True
+    write_page_index: bool = False
+    bloom_filter_columns: List[str] = field(default_factory=list)
+    bloom_filter_fpp: float = 0.05
+
+    @classmethod
+    def preset(cls, name: str, key_columns: Optional[List[str]] = None, **overrides) -> "WriterProfile":
+        """Hazır profili döndürür
+
+        Args:
+            name: "fast-write", "small-size" veya "fast-lookup"
+            key_columns: fast-lookup için bloom filter yazılacak key sütunları
+            overrides: Profil alanlarını ezmek için
+        """
+        if name == "fast-write":
+            profile = cls(compression="snappy", row_group_size=1_000_000)
+        elif name == "small-size":
+            profile = cls(compression="zstd", compression_level=9, row_group_size=1_000_000)
+        elif name == "fast-lookup":
+            profile = cls(
+                compression="zstd",
+                row_group_size=50_000,
+                write_page_index=True,
+                bloom_filter_columns=list(key_columns or []),
+            )
+        else:
+            raise ValueError(f"Bilinmeyen writer profili: {name} (fast-write, small-size, fast-lookup)")
+        return replace(profile, **overrides)
+
+    def pyarrow_options(self) -> Dict[str, Any]:
+        """pq.ParquetWriter / pq.write_table için keyword argümanları"""
+        options: Dict[str, Any] = {
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "use_dictionary": self.dictionary_columns if self.dictionary_columns is not None else True,
+            "write_statistics": self.write_statistics,
+            "write_page_index": self.write_page_index,
+        }
+        if self.bloom_filter_columns:
+            options["bloom_filter_options"] = {
+                column: {"fpp": self.bloom_filter_fpp} for column in self.bloom_filter_columns
+            }
+        return options
+
+    def polars_options(self) -> Dict[str, Any]:
+        """DataFrame.write_parquet için keyword argümanları (pyarrow ile yazar)"""
+        options = self.pyarrow_options()
+        return {
+            "compression": options.pop("compression"),
+            "compression_level": options.pop("compression_level"),
+            "statistics": options.pop("write_statistics"),
+            "row_group_size": self.row_group_size,
+            "use_pyarrow": True,
+            "pyarrow_options": options,
+        }
+
+    def duckdb_options(self) -> List[str]:
+        """DuckDB COPY ... TO (FORMAT parquet, ...) seçenekleri"""
+        options = [f"COMPRESSION {self.compression}"]
+        if self.compression_level is not None:
+            options.append(f"COMPRESSION_LEVEL {self.compression_level}")
+        if self.row_group_size:
+            options.append(f"ROW_GROUP_SIZE {self.row_group_size}")
+        return options
+
+
+class ProfiledParquetWriter:
+    """Profile göre açılan ParquetWriter
+
+    pq.ParquetWriter her write_table çağrısını ayrı row group olarak yazar; küçük
+    batch'ler küçük row group'lar üretir. Bu sınıf batch'leri profildeki
+    row_group_size'a ulaşana kadar biriktirip öyle yazar.
+    """
+
+    def __init__(self, where, schema: pa.Schema, profile: WriterProfile, **options):
+        self.profile = profile
+        self._writer = pq.ParquetWriter(where, schema, **profile.pyarrow_options(), **options)
+        self._pending: List[pa.Table] = []
+        self._pending_rows = 0
+
+    def _flush(self, final: bool = False) -> None:
+        """Biriken satırları tam row group'lar halinde yazar, artanı bekletir"""
+        if not self._pending:
+            return
+        size = self.profile.row_group_size
+        table = pa.concat_tables(self._pending)
+        cut = table.num_rows if final else (table.num_rows // size) * size
+        if cut:
+            self._writer.write_table(table.slice(0, cut), row_group_size=size)
+        rest = table.slice(cut)
+        self._pending = [rest] if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+
+    def write_table(self, table: pa.Table) -> None:
+        if not self.profile.row_group_size:
+            self._writer.write_table(table)
+            return
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= self.profile.row_group_size:
+            self._flush()
+
+    def write(self, table: pa.Table) -> None:
+        self.write_table(table)
+
+    def add_key_value_metadata(self, metadata: Dict[str, str]) -> None:
+        self._writer.add_key_value_metadata(metadata)
+
+    def close(self) -> None:
+        self._flush(final=True)
+        self._writer.close()
+
+
+def open_parquet_writer(where, schema: pa.Schema, profile: Optional[WriterProfile] = None, **options):
+    """Profil verilmişse ProfiledParquetWriter, yoksa kütüphane varsayılanlarıyla ParquetWriter açar
+
+    options profilde olmayan ParquetWriter argümanlarıdır (örn. sorting_columns).
+    """
+    if profile is None:
+        return pq.ParquetWriter(where, schema, **options)
+    return ProfiledParquetWriter(where, schema, profile, **options)
@@ -0,0 +1,191 @@
+"""
+Birden fazla tabloyu paralel çalıştıran runner
+
+Tablolar global bir worker limitiyle aynı anda çalışır. Aynı connection string'i
+kullanan tablolar tek bir engine'i (connection pool) paylaşır; pool boyutu kaynak
+başına bağlantı limitidir, limit dolduğunda yeni bağlantı isteyen tablo bekler.
+"""
+
+import json
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import create_engine, Engine
+
+from .config import TableConfig
+from .converter import DatabaseToParquet
+from .metrics import RunMetrics, prometheus_text
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TableRunResult:
+    """Tek bir tablonun çalıştırma sonucu"""
+    table_name: str
+    output_file: str
+    action: str  # "init" veya "sync"
+    success: bool
+    changed: bool = False
+    elapsed: float = 0.0  # saniye
+    error: Optional[str] = None
+    metrics: Optional[RunMetrics] = field(default=None, repr=False)  # Faz bazlı süreler
+
+    def to_dict(self) -> dict:
+        result = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "metrics"}
+        result["metrics"] = self.metrics.to_dict() if self.metrics else None
+        return result
+
+
+@dataclass
+class RunReport:
+    """Tüm tabloların çalıştırma raporu"""
+    results: List[TableRunResult] = field(default_factory=list)
+    elapsed: float = 0.0  # saniye
+
+    @property
+    def success(self) -> bool:
+        return all(result.success for result in self.results)
+
+    @property
+    def failed(self) -> List[TableRunResult]:
+        return [result for result in self.results if not result.success]
+
+    def to_dict(self) -> dict:
+        return {
+            "success": self.success,
+            "elapsed": self.elapsed,
+            "results": [result.to_dict() for result in self.results],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "db_parquet") -> str:
+        """Tabloların faz metriklerini Prometheus text formatında döndürür"""
+        return prometheus_text((result.metrics for result in self.results if result.metrics), prefix)
+
+    def summary(self) -> str:
+        """Tablo bazlı okunabilir özet döndürür"""
+        lines = [f"Toplam süre: {self.elapsed:.1f} sn"]
+        for result in sorted(self.results, key=lambda r: r.elapsed, reverse=True):
+            status = "OK" if result.success else f"HATA: {result.error.splitlines()[0]}"
+            lines.append(f"  {result.table_name:<30} {result.action:<5} {result.elapsed:>8.1f} sn  {status}")
+        return "\n".join(lines)
+
+
+class MultiTableRunner:
+    """Birden fazla TableConfig'i paylaşılan connection pool'lar üzerinde paralel çalıştırır"""
+
+    def __init__(
+        self,
+        connection: Optional[Union[str, Engine]] = None,
+        max_workers: int = 4,
+        max_connections_per_source: int = 4,
+    ):
+        """
+        Args:
+            connection: Tablolar için varsayılan connection string veya Engine
+            max_workers: Aynı anda çalışacak en fazla tablo sayısı
+            max_connections_per_source: Connection string başına en fazla bağlantı
+                (init_parallelism kullanan tablolar birden fazla bağlantı açar)
+        """
+        self.connection = connection
+        self.max_workers = max_workers
+        self.max_connections_per_source = max_connections_per_source
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    def _get_engine(self, connection: Union[str, Engine]) -> Engine:
+        """Connection string için paylaşılan engine'i döndürür (yoksa oluşturur)"""
+        if isinstance(connection, Engine):
+            return connection
+
+        with self._lock:
+            if connection not in self._engines:
+                self._engines[connection] = create_engine(
+                    connection,
+                    pool_size=self.max_connections_per_source,
+                    max_overflow=0,
+                    pool_timeout=24 * 60 * 60,  # Limit doluysa hata vermek yerine bekle
+                    pool_pre_ping=True,
+                )
+            return self._engines[connection]
+
+    def _run_table(self, connection: Union[str, Engine], config: TableConfig, force_init: bool) -> TableRunResult:
+        """Tek bir tabloyu çalıştırır; hata diğer tabloları durdurmaz"""
+        start_time = time.time()
+        converter = None
+        try:
+            with DatabaseToParquet(self._get_engine(connection), config) as converter:
+                action, changed = converter.run(force_init=force_init)
+
+            return TableRunResult(
+                table_name=config.table_name,
+                output_file=config.output_file,
+                action=action,
+                success=True,
+                changed=changed,
+                elapsed=time.time() - start_time,
+                metrics=converter.metrics,
+            )
+        except Exception as e:
+            logger.error(f"[{config.table_name}] HATA: {e}\n{traceback.format_exc()}")
+            return TableRunResult(
+                table_name=config.table_name,
+                output_file=config.output_file,
+                action=converter.metrics.labels.get("action", "init") if converter else "init",
+                success=False,
+                elapsed=time.time() - start_time,
+                error=str(e),
+                metrics=converter.metrics if converter else None,
+            )
+
+    def run(
+        self,
+        tables: Iterable[Union[TableConfig, Tuple[Union[str, Engine], TableConfig]]],
+        force_init: bool = False,
+    ) -> RunReport:
+        """Tabloları paralel çalıştırır ve rapor döndürür
+
+        Args:
+            tables: TableConfig listesi (varsayılan connection kullanılır) veya
+                (connection, TableConfig) çiftleri. Tablolar verilen sırayla başlatılır;
+                en uzun süren tabloları başa koymak toplam süreyi kısaltır.
+            force_init: Tüm tabloları sıfırdan oluştur
+        """
+        jobs = []
+        for table in tables:
+            if isinstance(table, TableConfig):
+                if self.connection is None:
+                    raise ValueError(f"{table.table_name} için connection verilmedi")
+                jobs.append((self.connection, table))
+            else:
+                jobs.append(table)
+
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._run_table, connection, config, force_init) for connection, config in jobs]
+            results = [future.result() for future in futures]
+
+        return RunReport(results=results, elapsed=time.time() - start_time)
+
+    def dispose(self) -> None:
+        """Runner'ın oluşturduğu engine'leri kapatır"""
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.dispose()
+        return False
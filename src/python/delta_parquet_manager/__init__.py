@@ -1,13 +1,22 @@
+import json
 import logging
 import os
-from typing import Any, Iterable
-from urllib.parse import urlparse
-import uuid
+import queue
+import shutil
+import threading
+import time
+from typing import Any, Iterable, Iterator
 import polars as pl
 from pypika import Field, MSSQLQuery, Table
-import connectorx as cx
 import pyarrow as pa
-import pyarrow.parquet as pq
+import pyarrow.compute as pc
+from deltalake import CommitProperties, DeltaTable, Transaction
+
+from db_parquet.journal import RunJournal
+from db_parquet.metrics import RunMetrics
+from delta_parquet_manager.adaptive import AdaptiveBatchController
+from delta_parquet_manager.dialects import RangeDialect, get_dialect, register_dialect
+from delta_parquet_manager.planner import RangePlanner
 
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -17,8 +26,12 @@ if not logger.handlers:
     logger.addHandler(console_handler)
 
 
-def read_database_partition(db_uri:str, table_name:str, partition_on:str, columns:str|list[str]='*', last_value:Any=None, limit:int = 100_000, partition_num:int = 8) -> Iterable[tuple[Any, pl.DataFrame]]:
+def read_database_partition(db_uri:str, table_name:str, partition_on:str, columns:str|list[str]='*', last_value:Any=None, limit:int = 100_000, partition_num:int = 8, controller:AdaptiveBatchController|None=None) -> Iterable[tuple[Any, pl.DataFrame]]:
     while True:
+        if controller is not None:
+            limit, partition_num = controller.limit, controller.partition
+        start_time = time.perf_counter()
+
         table = Table(table_name)
         table_query = MSSQLQuery.from_(table).select(Field(partition_on))
         if last_value is not None:
@@ -45,91 +58,442 @@ def read_database_partition(db_uri:str, table_name:str, partition_on:str, column
             break
 
         part_df = pl.read_database_uri(part_query_list, db_uri)
+        if controller is not None:
+            controller.observe(part_df.height, part_df.estimated_size(), time.perf_counter() - start_time)
         yield (last_value, part_df)  
         
-def _read_database_mssql(db_uri:str, query:str, order_by_column:str, last_id:Any, limit:int, partition:int) -> pl.DataFrame:   
-
-    resume = ""
-    if last_id is not None:
-        resume = f"WHERE {order_by_column} > '{last_id}'"
-
-    range_query = f"""           
-        WITH Part AS (SELECT TOP {limit} {order_by_column} FROM ({query}) source {resume} ORDER BY 1),
-        Range AS (SELECT NTILE({partition}) OVER (ORDER BY {order_by_column}) as Part, {order_by_column} FROM Part)
-        SELECT Part, MIN({order_by_column}) as BeginPart, MAX({order_by_column}) as EndPart FROM Range GROUP BY Part
-    """
-
-    range = pl.read_database_uri(range_query, db_uri).to_dicts()
-    if range is None or len(range) == 0:
-        return None
+def _read_database_ranges(db_uri:str, query:str, order_by_column:str, planner:RangePlanner, limit:int, partition:int) -> pl.DataFrame:   
+    while True:
+        ranges = planner.next_ranges(limit, partition)
+        if not ranges:
+            return None
 
-    part_list: list[str] = [f"""
-        SELECT * FROM ({query}) part WHERE {order_by_column} BETWEEN '{range["BeginPart"]}' AND '{range["EndPart"]}'
-        """ for range in range]
+        part_list: list[str] = [f"""
+            SELECT * FROM ({query}) part WHERE {range.where(order_by_column, planner.dialect)}
+            """ for range in ranges]
 
-    df = pl.read_database_uri(part_list, db_uri)
-    if df.is_empty():
-        return None
+        df = planner.dialect.read(db_uri, part_list)
+        # Plan sonrası silinen aralıklar boş gelebilir; sonraki aralıklarla devam et
+        if not df.is_empty():
+            return df
 
-    return df                
+def _prefetch(items:Iterable, depth:int, metrics:RunMetrics|None=None) -> Iterator:
+    """items'ı arka plan thread'inde okur, en fazla depth hazır elemanı kuyrukta tutar.
 
-def read_database_part(db_uri:str, query:str, order_by_column:str, last_id:Any=None, limit:int=1_000_000, partition:int=8):     
+    Üreticideki hata tüketiciye aynen iletilir. Tüketici erken bırakırsa (break, hata,
+    close) üretici durdurulur; o an süren okuma bittikten sonra thread kapanır.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, name="read_database_part-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            if metrics is not None:
+                metrics.observe("prefetch_queue_depth", buffer.qsize())
+                with metrics.span("queue_wait"):
+                    item, error = buffer.get()
+            else:
+                item, error = buffer.get()
+
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+def read_database_part(db_uri:str, query:str, order_by_column:str, last_id:Any=None, limit:int=1_000_000, partition:int=8, prefetch:int=0, metrics:RunMetrics|None=None, controller:AdaptiveBatchController|None=None):     
+    """order_by_column'a göre sıralı parçaları DataFrame olarak döndürür.
+
+    prefetch > 0 ise sonraki parçalar arka planda okunur ve en fazla prefetch parça
+    bellekte bekletilir; tüketici parça yazarken veritabanı boşta kalmaz.
+    metrics verilirse okuma süresi fetch, kuyruk bekleme süresi queue_wait fazına,
+    kuyruk derinliği prefetch_queue_depth olarak yazılır.
+    controller verilirse limit ve partition her parçadan sonra controller'dan alınır;
+    verilen limit/partition yok sayılır.
+    """
+    if controller is not None and controller.metrics is None:
+        controller.metrics = metrics
+    reader = _read_database_part(db_uri, query, order_by_column, last_id, limit, partition, controller)
+    if metrics is not None:
+        reader = metrics.timed(reader, "fetch", rows=len, bytes=lambda df: df.estimated_size())
+    if prefetch > 0:
+        reader = _prefetch(reader, prefetch, metrics)
+    return reader
+
+def _read_database_part(db_uri:str, query:str, order_by_column:str, last_id:Any, limit:int, partition:int, controller:AdaptiveBatchController|None=None) -> Iterator[pl.DataFrame]:
     if partition <= 0 or partition is None:
         partition = 1
 
-    parsed_db_uri = urlparse(db_uri)
-    if parsed_db_uri.scheme.lower() == "mssql":
-        read_database_func = _read_database_mssql
-    else:
-        raise ValueError(f"Database type {parsed_db_uri.scheme} is not supported")
+    # Dialect şemadan seçilir (mssql, postgresql, sqlite, duckdb; register_dialect ile genişletilir)
+    dialect = get_dialect(db_uri)
 
+    # Aralık sınırları çalıştırma başında bir kez planlanır
+    planner = RangePlanner(db_uri, query, order_by_column, dialect, last_id)
     while True:
-        df = read_database_func(db_uri, query, order_by_column, last_id, limit, partition)
+        if controller is not None:
+            limit, partition = controller.limit, controller.partition
+        start_time = time.perf_counter()
+
+        df = _read_database_ranges(db_uri, query, order_by_column, planner, limit, partition)
 
         if df is None:
             break
 
-        last_id = df[order_by_column].max()
+        if controller is not None:
+            controller.observe(df.height, df.estimated_size(), time.perf_counter() - start_time)
         yield df
 
-def write_delta(delta_table:str, db_uri:str, query:str, order_by_column:str, limit:int=1_000_000, partition:int=8) -> pl.DataFrame:
-  
-    last_id = None
-    if os.path.exists(delta_table):
-       last_id = pl.read_delta(delta_table)[order_by_column].max()
-    
-    reader = read_database_part(db_uri, query, order_by_column, last_id, limit, partition)
-    for df in reader:
-        logger.info(f"Writing delta table: {delta_table} with height: {df.height}")
-        df.write_delta(
-            target=delta_table, 
-            mode="append")
+# Her append/merge commit'ine yazılan watermark alanı (Delta commitInfo)
+WATERMARK_METADATA_KEY = "delta_parquet_manager.watermark"
 
-    logger.info(f"Delta table write completed")
+# Veriyi değiştirmeyen commit'ler; watermark aranırken atlanır
+_MAINTENANCE_OPERATIONS = {"OPTIMIZE", "VACUUM START", "VACUUM END", "SET TBLPROPERTIES", "ADD CONSTRAINT", "DROP CONSTRAINT", "ADD FEATURE"}
 
-def write_delta_merge(delta_table:str, db_uri:str, query:str,  order_by_column:str, key_column:str = None, limit:int=1_000_000, partition:int=8) -> pl.DataFrame:
-    last_id = None
-    if os.path.exists(delta_table):
-       last_id = pl.read_delta(delta_table)[order_by_column].max()
+# Merge predicate'indeki literal'ler Delta (DataFusion) SQL'ine göre yazılır
+_DELTA_SQL = RangeDialect()
 
-    key_column = key_column or order_by_column
+# Bu sayıdan fazla farklı partition değeri IN yerine aralık (min/max) olarak yazılır
+MAX_PARTITION_IN_VALUES = 256
+
+PartitionBy = str | list[str] | dict[str, pl.Expr] | None
 
-    reader = read_database_part(db_uri, query, order_by_column, last_id, limit, partition)
-    for df in reader:
-        df = df.filter(
-            pl.col(order_by_column) == pl.col(order_by_column).max().over(key_column))
- 
-        logger.info(f"Writing delta table merge: {delta_table} with height: {df.height}")
+def _partition_expressions(partition_by:PartitionBy) -> dict[str, pl.Expr]:
+    """partition_by'ı {kolon: ifade} sözlüğüne çevirir; kolon adları kaynakta var olan kolonlardır"""
+    if not partition_by:
+        return {}
+    if isinstance(partition_by, str):
+        partition_by = [partition_by]
+    if isinstance(partition_by, dict):
+        return dict(partition_by)
+    return {name: pl.col(name) for name in partition_by}
+
+def _with_partitions(df:pl.DataFrame, partitions:dict[str, pl.Expr]) -> pl.DataFrame:
+    """Türetilmiş partition kolonlarını (örn. bucket_id = ID // 1_000_000) ekler"""
+    derived = [expr.alias(name) for name, expr in partitions.items() if name not in df.columns]
+    return df.with_columns(derived) if derived else df
+
+def _column_condition(column:str, values:pl.Series) -> str | None:
+    """Hedef kolonu kaynak batch'in değerleriyle sınırlayan koşul; Delta dosyaları bu literal'lerle budanır"""
+    has_null = values.null_count() > 0
+    values = values.drop_nulls().unique().sort()
+    if values.is_empty():
+        return f"t.{column} IS NULL"
+
+    if len(values) <= MAX_PARTITION_IN_VALUES:
+        condition = f"t.{column} IN ({', '.join(_DELTA_SQL.literal(v) for v in values.to_list())})"
+    else:
+        condition = f"t.{column} BETWEEN {_DELTA_SQL.literal(values[0])} AND {_DELTA_SQL.literal(values[-1])}"
+    return f"({condition} OR t.{column} IS NULL)" if has_null else condition
+
+def _merge_predicate(df:pl.DataFrame, key_column:str, partition_columns:list[str]) -> str:
+    """
+    s.key = t.key eşleşmesine kaynak batch'in partition değerlerini ve key min/max'ını ekler.
+
+    Koşullar sadece hedef kolonlar ve sabitler içerdiği için Delta, partition değeri veya
+    key istatistikleri (min/max) batch ile kesişmeyen dosyaları merge'e hiç almaz; merge
+    süresi hedef tablonun boyutuyla değil dokunulan veriyle orantılı olur.
+    """
+    conditions = [f"s.{key_column} = t.{key_column}"]
+    for column in partition_columns:
+        conditions.append(_column_condition(column, df[column]))
+
+    key_min, key_max = df[key_column].min(), df[key_column].max()
+    if key_min is not None:
+        conditions.append(f"t.{key_column} BETWEEN {_DELTA_SQL.literal(key_min)} AND {_DELTA_SQL.literal(key_max)}")
+    return " AND ".join(conditions)
+
+def _watermark_commit_properties(order_by_column:str, df:pl.DataFrame, transaction:Transaction|None=None) -> CommitProperties:
+    value = df[order_by_column].max()
+    return CommitProperties(
+        custom_metadata={
+            WATERMARK_METADATA_KEY: json.dumps({"column": order_by_column, "value": str(value)})
+        },
+        app_transactions=[transaction] if transaction is not None else None)
+
+def _watermark_from_stats(dt:DeltaTable, column:str, column_type:pa.DataType) -> tuple[bool, Any]:
+    # Sadece tam sayı ve decimal istatistikleri kesin; string/binary kesilebilir (truncate),
+    # timestamp max'ı log'da milisaniyeye yuvarlanır ve gerçek max'ın altında kalabilir
+    if not (pa.types.is_integer(column_type) or pa.types.is_decimal(column_type)):
+        return False, None
+
+    actions = pa.table(dt.get_add_actions(flatten=True))
+    if actions.num_rows == 0:
+        return True, None
+    if f"max.{column}" not in actions.column_names:
+        return False, None
+
+    # İstatistiği olmayan dosya varsa (null max ama tamamı null değil) sonuç güvenilmez
+    max_values = actions[f"max.{column}"]
+    all_null = pc.equal(actions[f"null_count.{column}"], actions["num_records"]) \
+        if f"null_count.{column}" in actions.column_names else pa.repeat(False, actions.num_rows)
+    if pc.any(pc.and_(pc.is_null(max_values), pc.invert(pc.fill_null(all_null, False)))).as_py():
+        return False, None
+    return True, pc.max(max_values).as_py()
+
+def _watermark_from_commit_info(dt:DeltaTable, column:str, column_type:pa.DataType, max_history:int=100) -> tuple[bool, Any]:
+    for commit in dt.history(limit=max_history):
+        raw = commit.get(WATERMARK_METADATA_KEY)
+        if raw is None:
+            if commit.get("operation") in _MAINTENANCE_OPERATIONS:
+                continue
+            # Watermark'sız bir veri commit'i (başka bir yazıcı); commit bilgisi güvenilmez
+            return False, None
+        watermark = json.loads(raw)
+        if watermark.get("column") != column:
+            return False, None
+        try:
+            return True, pa.array([watermark["value"]]).cast(column_type)[0].as_py()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return False, None
+    return False, None
+
+def read_delta_watermark(delta_table:str, order_by_column:str) -> Any:
+    """Delta tablosundaki en büyük order_by_column değerini tabloyu okumadan bulur.
+
+    Sırasıyla transaction log'daki dosya istatistikleri (max), son commit'in
+    watermark alanı ve sadece ilgili kolonu okuyan lazy scan denenir.
+    Tablo yoksa veya boşsa None döner.
+    """
+    if not DeltaTable.is_deltatable(delta_table):
+        return None
+
+    dt = DeltaTable(delta_table)
+    column_type = pa.schema(dt.schema().to_arrow()).field(order_by_column).type
+
+    for source, read_watermark in (("stats", _watermark_from_stats), ("commit info", _watermark_from_commit_info)):
+        found, value = read_watermark(dt, order_by_column, column_type)
+        if found:
+            logger.info(f"Delta watermark ({source}): {delta_table} {order_by_column}={value}")
+            return value
+
+    value = pl.scan_delta(delta_table).select(pl.col(order_by_column).max()).collect().item()
+    logger.info(f"Delta watermark (scan): {delta_table} {order_by_column}={value}")
+    return value
+
+def _append_delta(delta_table:str, df:pl.DataFrame, order_by_column:str, partition_columns:list[str], metrics:RunMetrics, transaction:Transaction|None=None) -> None:
+    logger.info(f"Writing delta table: {delta_table} with height: {df.height}")
+    with metrics.span("encode", rows=df.height):
         df.write_delta(
+            target=delta_table, 
+            mode="append",
+            delta_write_options={
+                "commit_properties": _watermark_commit_properties(order_by_column, df, transaction),
+                "partition_by": partition_columns or None,
+            })
+
+def _replay_journal(delta_table:str, journal:RunJournal, order_by_column:str, partition_columns:list[str], metrics:RunMetrics) -> int:
+    """Önceki çalıştırmada okunup diske alınmış ama commit'i kaydedilmemiş parçaları Delta'ya yazar; son parça numarasını döndürür"""
+    read = journal.find("read", "chunk")
+    committed = journal.find("commit", "chunk")
+    # Commit olmuş ama journal'a yazılamadan çıkılmışsa Delta'daki app transaction sürümü gösterir
+    applied = DeltaTable(delta_table).transaction_version(journal.run_id) if DeltaTable.is_deltatable(delta_table) else None
+
+    for chunk, entry in sorted(read.items()):
+        if chunk in committed:
+            continue
+        if applied is None or chunk > applied:
+            with metrics.span("fetch"):
+                df = pl.read_parquet(entry["file"])
+            logger.info(f"Journal: parça {chunk} veritabanından tekrar okunmadan yazılıyor ({df.height} satır)")
+            _append_delta(delta_table, df, order_by_column, partition_columns, metrics, Transaction(journal.run_id, chunk))
+        journal.record("commit", chunk=chunk)
+        os.remove(entry["file"])
+    return max(read, default=0)
+
+def write_delta(delta_table:str, db_uri:str, query:str, order_by_column:str, limit:int=1_000_000, partition:int=8, metrics:RunMetrics|None=None, prefetch:int=0, controller:AdaptiveBatchController|None=None, partition_by:PartitionBy=None, journal:str|None=None) -> pl.DataFrame:
+    """Kaynak sorgunun watermark'tan sonraki satırlarını Delta tablosuna ekler.
+
+    journal verilirse (local dosya yolu) okunan her parça önce journal'ın yanındaki
+    staging klasörüne parquet olarak yazılır, sonra Delta'ya commit edilir. Çalıştırma
+    yarıda kalırsa aynı journal ile tekrar çağrıldığında okunmuş ama commit edilmemiş
+    parçalar veritabanına gitmeden yazılır; commit edilmiş parçalar Delta app
+    transaction sürümünden tanınır ve tekrar yazılmaz. Kalan aralıklar watermark'tan
+    devam eder. Hatasız biten çalıştırmada journal ve staging silinir.
+    """
+    metrics = metrics or RunMetrics(delta_table, action="append")
+    partitions = _partition_expressions(partition_by)
+    partition_columns = list(partitions)
+
+    run_journal = staging = None
+    chunk = 0
+    if journal:
+        run_journal = RunJournal(journal)
+        run_journal.start({"delta_table": delta_table, "query": query, "order_by_column": order_by_column})
+        staging = f"{journal}.staging"
+        os.makedirs(staging, exist_ok=True)
+        chunk = _replay_journal(delta_table, run_journal, order_by_column, partition_columns, metrics)
+  
+    with metrics.span("fetch"):
+        last_id = read_delta_watermark(delta_table, order_by_column)
+    
+    reader = read_database_part(db_uri, query, order_by_column, last_id, limit, partition, prefetch=prefetch, metrics=metrics, controller=controller)
+    try:
+        for df in reader:
+            df = _with_partitions(df, partitions)
+            if run_journal is None:
+                _append_delta(delta_table, df, order_by_column, partition_columns, metrics)
+                continue
+
+            chunk += 1
+            file_path = os.path.join(staging, f"{chunk}.parquet")
+            with metrics.span("finalize"):
+                df.write_parquet(file_path + ".tmp")
+                os.replace(file_path + ".tmp", file_path)
+                run_journal.record("read", chunk=chunk, file=file_path, rows=df.height, high=df[order_by_column].max())
+            _append_delta(delta_table, df, order_by_column, partition_columns, metrics, Transaction(run_journal.run_id, chunk))
+            run_journal.record("commit", chunk=chunk)
+            os.remove(file_path)
+    except Exception as e:
+        metrics.finish(success=False, error=str(e))
+        raise
+
+    if run_journal is not None:
+        run_journal.finish()
+        shutil.rmtree(staging, ignore_errors=True)
+    metrics.finish()
+    logger.info(f"Delta table write completed. {metrics.summary()}")
+
+def _merge_delta(delta_table:str, df:pl.DataFrame, order_by_column:str, key_column:str, metrics:RunMetrics, partition_columns:list[str]|None=None) -> None:
+    logger.info(f"Writing delta table merge: {delta_table} with height: {df.height}")
+    commit_properties = _watermark_commit_properties(order_by_column, df)
+    partition_columns = partition_columns or []
+    with metrics.span("encode", rows=df.height):
+        if not DeltaTable.is_deltatable(delta_table):
+            # İlk batch tabloyu oluşturur; merge için hedef tablo gerekir
+            df.write_delta(
+                target=delta_table,
+                mode="append",
+                delta_write_options={
+                    "commit_properties": commit_properties,
+                    "partition_by": partition_columns or None,
+                })
+            return
+
+        predicate = _merge_predicate(df, key_column, partition_columns)
+        logger.debug(f"Merge predicate: {predicate}")
+        result = df.write_delta(
             target=delta_table, 
             mode="merge",
             delta_merge_options={
-                "predicate": f"s.{key_column} = t.{key_column}",  
+                "predicate": predicate,  
                 "source_alias": "s",         
                 "target_alias": "t",   
+                "commit_properties": commit_properties,
             }).when_matched_update_all().when_not_matched_insert_all().execute()
 
-    logger.info(f"Delta table merge completed")
+    scanned, skipped = result.get("num_target_files_scanned"), result.get("num_target_files_skipped_during_scan")
+    if scanned is not None:
+        metrics.observe("merge_files_scanned", scanned)
+        logger.info(f"Delta merge: {scanned} dosya tarandı, {skipped} dosya atlandı")
+
+def _maintain_delta(delta_table:str, merge_count:int, optimize_every:int, checkpoint_every:int, metrics:RunMetrics) -> None:
+    """Belirlenen merge sayısında bir küçük dosyaları birleştirir ve log checkpoint'i yazar"""
+    if optimize_every and merge_count % optimize_every == 0:
+        with metrics.span("finalize"):
+            result = DeltaTable(delta_table).optimize.compact()
+        logger.info(f"Delta optimize: {delta_table} {result.get('numFilesRemoved', 0)} -> {result.get('numFilesAdded', 0)} dosya")
+
+    if checkpoint_every and merge_count % checkpoint_every == 0:
+        with metrics.span("finalize"):
+            dt = DeltaTable(delta_table)
+            dt.create_checkpoint()
+            # Checkpoint'ten önceki, saklama süresi dolmuş log dosyaları
+            dt.cleanup_metadata()
+        logger.info(f"Delta checkpoint: {delta_table} v{dt.version()}")
+
+def write_delta_merge(delta_table:str, db_uri:str, query:str,  order_by_column:str, key_column:str = None, limit:int=1_000_000, partition:int=8, metrics:RunMetrics|None=None, prefetch:int=0, controller:AdaptiveBatchController|None=None, coalesce_rows:int=0, coalesce_bytes:int=0, optimize_every:int=0, checkpoint_every:int=0, partition_by:PartitionBy=None) -> pl.DataFrame:
+    """Değişiklikleri key_column üzerinden Delta tablosuna merge eder.
+
+    coalesce_rows / coalesce_bytes verilirse okunan parçalar bu eşiğe kadar biriktirilir,
+    key_column'a göre tekilleştirilir ve tampon başına tek MERGE çalışır; verilmezse her
+    parça ayrı merge edilir. optimize_every / checkpoint_every, kaç merge'de bir
+    optimize.compact ve log checkpoint'i yazılacağını belirler (0: kapalı).
+
+    partition_by hedef tablonun partition kolonlarıdır: kaynakta olan kolon adları
+    ("Tarih") veya türetilmiş kolonlar ({"bucket_id": pl.col("ID") // 1_000_000}).
+    Tablo ilk merge'de bu kolonlarla partition'lanarak oluşturulur; her merge'ün
+    predicate'ine batch'in partition değerleri ve key min/max'ı eklenir, böylece Delta
+    batch'in dokunmadığı dosyaları okumaz. Bir anahtarın partition değeri değişmemelidir
+    (key bucket veya kayıt tarihi gibi); aksi halde eski satır eşleşmez ve tekrar eklenir.
+    """
+    metrics = metrics or RunMetrics(delta_table, action="merge")
+
+    with metrics.span("fetch"):
+        last_id = read_delta_watermark(delta_table, order_by_column)
+
+    key_column = key_column or order_by_column
+    partitions = _partition_expressions(partition_by)
+    if partitions and DeltaTable.is_deltatable(delta_table):
+        existing = DeltaTable(delta_table).metadata().partition_columns
+        if sorted(existing) != sorted(partitions):
+            logger.warning(f"{delta_table} partition kolonları {existing}, partition_by {list(partitions)} ile uyuşmuyor")
+
+    buffer: list[pl.DataFrame] = []
+    buffered_rows = buffered_bytes = merge_count = 0
+
+    def flush() -> None:
+        nonlocal buffered_rows, buffered_bytes, merge_count
+        with metrics.span("convert", rows=buffered_rows):
+            df = pl.concat(buffer, how="vertical_relaxed") if len(buffer) > 1 else buffer[0]
+            df = df.filter(
+                pl.col(order_by_column) == pl.col(order_by_column).max().over(key_column))
+            df = _with_partitions(df, partitions)
+        buffer.clear()
+        buffered_rows = buffered_bytes = 0
+
+        _merge_delta(delta_table, df, order_by_column, key_column, metrics, list(partitions))
+        merge_count += 1
+        _maintain_delta(delta_table, merge_count, optimize_every, checkpoint_every, metrics)
+
+    reader = read_database_part(db_uri, query, order_by_column, last_id, limit, partition, prefetch=prefetch, metrics=metrics, controller=controller)
+    try:
+        for df in reader:
+            buffer.append(df)
+            buffered_rows += df.height
+            if coalesce_bytes:
+                buffered_bytes += df.estimated_size()
+
+            if (not coalesce_rows and not coalesce_bytes) \
+                    or (coalesce_rows and buffered_rows >= coalesce_rows) \
+                    or (coalesce_bytes and buffered_bytes >= coalesce_bytes):
+                flush()
+        if buffer:
+            flush()
+    except Exception as e:
+        metrics.finish(success=False, error=str(e))
+        raise
+
+    metrics.finish()
+    logger.info(f"Delta table merge completed ({merge_count} merge). {metrics.summary()}")
 
 if __name__ == "__main__":
     logger.setLevel(logging.INFO) 
@@ -180,119 +544,18 @@ if __name__ == "__main__":
     # for file in files:
     #     print(file)
 
-    import tempfile
-    import duckdb
-
-    chunk_size = 10_000_000    
-    range = 0
-    last_value = None
-    table_name = "tb_Urun"
-    partition_num = 8
-    partition_on = "ID"
-    colums = ['ID','UrunID','UrunKod','Renk','Beden','Boy','Tarih','Line','NumuneVaryantSira','SergiEkipmanRef','SizeRef','UrunOptionRef','UrunOptionSizeRef','UrunOptionAsortiRef','BedenBoyRef','Konsinye','AxaAktarilsinmi','UrunSKULevelRef','LcwArticleCode','Agirlik','UrunKoliIcerikTipref','Hist_ID','Hist_Islem']
+    from delta_parquet_manager.ducklake import DuckLakeHistoryApplier, DuckLakeTableConfig
 
-    with duckdb.connect("datadb.db") as con:
-        con.sql("ATTACH 'ducklake:metadata.ducklake' AS data (DATA_PATH 'data_files')")
-        con.sql("USE data")
-        #duck_con.execute(f"drop table if exists {table_name}")
-
-        while True:
-            if (os.path.exists(f"data_files/main/{table_name}")):    
-                result = con.sql(f"SELECT max(Hist_ID) FROM {table_name}").fetchone()
-                hist_id = result[0]
-
-            table = Table(table_name + "_Hist")
-            table_query = MSSQLQuery.from_(table).select(Field("Hist_ID"))
-            if hist_id is not None:
-                table_query = table_query.where(Field("Hist_ID").gt(hist_id))
-            table_query = table_query.orderby(1).limit(chunk_size).get_sql()            
-
-            range_query = f"""           
-                WITH Part AS ({table_query}),
-                Range AS (SELECT NTILE({partition_num}) OVER (ORDER BY Hist_ID) as Part, Hist_ID FROM Part)
-                SELECT Part, MIN(Hist_ID) as BeginPart, MAX(Hist_ID) as EndPart FROM Range GROUP BY Part
-            """
-
-            range_list =  pl.read_database_uri(range_query, db_uri).to_dicts()  
-            query_list = []
-            for range_dict in range_list:  
-                query_list.append(
-                    MSSQLQuery.from_(table)
-                        .select(*colums)
-                        .where(Field('Hist_ID').between(range_dict["BeginPart"], range_dict["EndPart"]))
-                        .get_sql())
-
-            if len(query_list) == 0:
-                break
-            
-            # reader: pa.ipc.RecordBatchStreamReader = cx.read_sql(
-            #     db_uri, 
-            #     query_list,  
-            #     return_type="arrow_stream")
-
-            df = cx.read_sql(
-                db_uri, 
-                query_list,  
-                return_type="polars").sort("Hist_ID").unique(subset=["ID"], keep="last")
-            
-            merge_sql = f"""
-                MERGE INTO {table_name}
-                USING (
-                    SELECT * FROM df
-                ) AS upserts
-                ON (upserts.{partition_on} = {table_name}.{partition_on})
-                WHEN MATCHED THEN UPDATE
-                WHEN NOT MATCHED THEN INSERT;
-            """
-
-            con.sql(merge_sql)
-            con.sql(f"DELETE FROM {table_name} WHERE Hist_Islem=0")
-            break
-
-        while True:    
-            if (os.path.exists(f"data_files/main/{table_name}")):    
-                result = con.sql(f"SELECT max(ID) FROM {table_name}").fetchone()
-                last_value = result[0]
-                
-            table = Table(table_name)
-            table_query = MSSQLQuery.from_(table).select(Field("ID"))
-            if last_value is not None:
-                table_query = table_query.where(Field("ID").gt(last_value))
-            table_query = table_query.orderby(1).limit(chunk_size).get_sql()
-        
-            range_query = f"""           
-                WITH Part AS ({table_query}),
-                Range AS (SELECT NTILE({partition_num}) OVER (ORDER BY {partition_on}) as Part, {partition_on} FROM Part)
-                SELECT Part, MIN({partition_on}) as BeginPart, MAX({partition_on}) as EndPart FROM Range GROUP BY Part
-            """
-
-            range_list =  pl.read_database_uri(range_query, db_uri).to_dicts()  
-            query_list = []
-            for range_dict in range_list:  
-                query_list.append(
-                    MSSQLQuery.from_(table)
-                        .select(*colums)
-                        .select(Field('Hist_ID').eq(603763973))
-                        .select(Field('Hist_Islem').eq(1))
-                        .where(Field(partition_on).between(range_dict["BeginPart"], range_dict["EndPart"]))
-                        .get_sql())
-
-            if len(query_list) == 0:
-                break
-
-            reader: pa.ipc.RecordBatchStreamReader = cx.read_sql(
-                db_uri, 
-                query_list,  
-                return_type="arrow_stream")
-            
-            if last_value is None:
-                con.sql(f"CREATE TABLE {table_name} AS SELECT * FROM reader")
-                #con.sql(f"ALTER TABLE {table_name} ADD COLUMN Hist_ID INTEGER DEFAULT 0")
-                #con.sql(f"ALTER TABLE {table_name} ADD COLUMN Hist_Islem INTEGER DEFAULT 1")
-            else:
-                con.sql(f"INSERT INTO {table_name} SELECT * FROM reader")           
+    config = DuckLakeTableConfig(
+        table_name="tb_Urun",
+        columns=['ID','UrunID','UrunKod','Renk','Beden','Boy','Tarih','Line','NumuneVaryantSira','SergiEkipmanRef','SizeRef','UrunOptionRef','UrunOptionSizeRef','UrunOptionAsortiRef','BedenBoyRef','Konsinye','AxaAktarilsinmi','UrunSKULevelRef','LcwArticleCode','Agirlik','UrunKoliIcerikTipref'],
+        limit=10_000_000,
+        partition=8,
+    )
+    with DuckLakeHistoryApplier(db_uri, "ducklake:metadata.ducklake", data_path="data_files", database="datadb.db") as applier:
+        applier.run(config)
 
-exit()
+    exit()
         
     #     reader: pa.ipc.RecordBatchStreamReader = cx.read_sql(
     #         db_uri, 
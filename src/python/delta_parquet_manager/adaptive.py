@@ -0,0 +1,117 @@
+import logging
+import math
+from typing import Any, Optional
+
+from db_parquet.metrics import rss_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBatchController:
+    """
+    read_database_part / read_database_partition için limit ve partition değerlerini
+    iterasyonlar arasında ayarlar.
+
+    Her parça okunduktan sonra satır başına byte, okuma süresi ve süreç RSS'i gözlenir:
+    - limit, bir parçanın bellekte target_bytes'ı ve okumanın target_seconds'ı
+      geçmeyeceği en büyük satır sayısına çekilir (büyüme iterasyon başına en fazla 2 kat,
+      küçülme anında),
+    - RSS max_rss_bytes'ı geçerse limit yarıya iner,
+    - partition, her partition sorgusu yaklaşık partition_bytes okuyacak şekilde seçilir.
+
+    Geniş satırlı tablolarda (tb_Urun) limit küçülür, dar lookup tablolarında büyür;
+    aynı ayar ikisinde de kullanılabilir.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100_000,
+        partition: int = 4,
+        target_bytes: int = 512 * 1024 * 1024,
+        target_seconds: float = 60.0,
+        partition_bytes: int = 64 * 1024 * 1024,
+        min_limit: int = 10_000,
+        max_limit: int = 10_000_000,
+        min_partition: int = 1,
+        max_partition: int = 16,
+        max_rss_bytes: Optional[int] = None,
+        smoothing: float = 0.5,
+        metrics: Any = None,
+    ):
+        """
+        Args:
+            limit: İlk iterasyonun satır limiti
+            partition: İlk iterasyonun partition sayısı
+            target_bytes: Bir parçanın bellekteki hedef boyutu
+            target_seconds: Bir parçanın hedef okuma süresi
+            partition_bytes: Partition sorgusu başına hedef boyut
+            min_limit / max_limit: limit sınırları
+            min_partition / max_partition: partition sınırları (eş zamanlı bağlantı sayısı)
+            max_rss_bytes: Süreç RSS tavanı; aşılırsa limit yarıya iner
+            smoothing: Satır başına byte ve satır/sn için üstel ortalama ağırlığı (0-1)
+            metrics: db_parquet.metrics.RunMetrics; seçilen değerler adaptive_limit /
+                adaptive_partition olarak gözlenir
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.min_partition = min_partition
+        self.max_partition = max_partition
+        self.target_bytes = target_bytes
+        self.target_seconds = target_seconds
+        self.partition_bytes = partition_bytes
+        self.max_rss_bytes = max_rss_bytes
+        self.smoothing = smoothing
+        self.metrics = metrics
+
+        self.limit = self._clamp(limit, min_limit, max_limit)
+        self.partition = self._clamp(partition, min_partition, max_partition)
+        self.bytes_per_row: Optional[float] = None
+        self.rows_per_second: Optional[float] = None
+
+    @staticmethod
+    def _clamp(value: float, lower: int, upper: int) -> int:
+        return int(max(lower, min(upper, value)))
+
+    def _average(self, current: Optional[float], observed: float) -> float:
+        if current is None:
+            return observed
+        return self.smoothing * observed + (1 - self.smoothing) * current
+
+    def observe(self, rows: int, nbytes: int, seconds: float) -> None:
+        """Okunan parçanın satır, byte ve süresine göre sonraki limit/partition'ı hesaplar"""
+        if rows <= 0:
+            return
+
+        self.bytes_per_row = self._average(self.bytes_per_row, nbytes / rows)
+        if seconds > 0:
+            self.rows_per_second = self._average(self.rows_per_second, rows / seconds)
+
+        candidates = [self.limit * 2, self.target_bytes / max(self.bytes_per_row, 1.0)]
+        if self.rows_per_second:
+            candidates.append(self.rows_per_second * self.target_seconds)
+        limit = min(candidates)
+
+        rss = rss_bytes() if self.max_rss_bytes else None
+        if rss is not None and rss > self.max_rss_bytes:
+            limit = min(limit, self.limit / 2)
+            logger.warning(f"RSS {rss / 1024 ** 2:.0f} MB > {self.max_rss_bytes / 1024 ** 2:.0f} MB, limit düşürülüyor")
+
+        limit = self._clamp(limit, self.min_limit, self.max_limit)
+        partition = self._clamp(
+            math.ceil(limit * self.bytes_per_row / self.partition_bytes), self.min_partition, self.max_partition
+        )
+
+        # Küçük dalgalanmalarda sorgu boyutunu değiştirme
+        if partition == self.partition and abs(limit - self.limit) < self.limit * 0.1:
+            limit = self.limit
+
+        if (limit, partition) != (self.limit, self.partition):
+            logger.info(
+                f"Adaptive batch: limit {self.limit} -> {limit}, partition {self.partition} -> {partition} "
+                f"({self.bytes_per_row:.0f} byte/satır, {rows / seconds if seconds > 0 else 0:.0f} satır/sn)"
+            )
+        self.limit, self.partition = limit, partition
+
+        if self.metrics is not None:
+            self.metrics.observe("adaptive_limit", limit)
+            self.metrics.observe("adaptive_partition", partition)
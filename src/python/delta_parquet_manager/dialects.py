@@ -0,0 +1,180 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+import connectorx as cx
+import polars as pl
+import pyarrow as pa
+
+
+class RangeDialect:
+    """
+    read_database_part için veritabanına özgü SQL parçaları ve okuma.
+
+    Varsayılan uygulama ANSI SQL üretir ve connectorx ile okur; dialect'ler sadece
+    farklı olan kısımları ezer. Yeni bir dialect register_dialect ile eklenir.
+    """
+    name = "ansi"
+
+    def count_expression(self) -> str:
+        return "COUNT(*)"
+
+    def bounds_query(self, query: str, column: str, resume: str) -> str:
+        """Kalan aralığın MaxKey ve Rows değerini döndüren sorgu; satır yoksa boş sonuç"""
+        count = self.count_expression()
+        return f"""
+            SELECT MAX({column}) AS MaxKey, {count} AS Rows
+            FROM ({query}) source {resume} HAVING {count} > 0
+        """
+
+    def literal(self, value: Any) -> str:
+        """Değeri SQL literal'ine çevirir (connectorx bind parametresi desteklemez)"""
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, (int, float, Decimal)):
+            return str(value)
+        if isinstance(value, datetime):
+            return f"TIMESTAMP '{value.isoformat(sep=' ', timespec='microseconds')}'"
+        if isinstance(value, date):
+            return f"DATE '{value.isoformat()}'"
+        if isinstance(value, time):
+            return f"TIME '{value.isoformat()}'"
+        if isinstance(value, (bytes, bytearray)):
+            return f"X'{bytes(value).hex()}'"
+        return "'" + str(value).replace("'", "''") + "'"
+
+    def sample_query(self, query: str, column: str, resume: str, modulus: int) -> str:
+        """Her modulus satırdan birini SampleKey olarak döndüren sorgu (pencere fonksiyonu ile)"""
+        return f"""
+            SELECT SampleKey FROM (
+                SELECT {column} AS SampleKey, ROW_NUMBER() OVER (ORDER BY {column}) AS SampleRow
+                FROM ({query}) source {resume}
+            ) sample WHERE SampleRow % {modulus} = 0
+        """
+
+    def read(self, db_uri: str, queries: List[str]) -> pl.DataFrame:
+        """Sorguları okur; birden fazla sorgu connectorx ile paralel çalışır"""
+        return pl.read_database_uri(queries if len(queries) > 1 else queries[0], db_uri)
+
+    def read_arrow_stream(self, db_uri: str, queries: List[str]) -> pa.RecordBatchReader:
+        """Sorguları bellekte birleştirmeden Arrow batch akışı olarak okur (connectorx arrow_stream)"""
+        return cx.read_sql(db_uri, queries if len(queries) > 1 else queries[0], return_type="arrow_stream")
+
+
+class MSSQLDialect(RangeDialect):
+    name = "mssql"
+
+    def count_expression(self) -> str:
+        return "COUNT_BIG(*)"
+
+    def literal(self, value: Any) -> str:
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, datetime):
+            return f"CAST('{value.isoformat(timespec='microseconds')}' AS datetime2(7))"
+        if isinstance(value, date):
+            return f"CAST('{value.isoformat()}' AS date)"
+        if isinstance(value, time):
+            return f"CAST('{value.isoformat()}' AS time(7))"
+        if isinstance(value, (bytes, bytearray)):
+            return "0x" + bytes(value).hex()
+        if isinstance(value, str):
+            return "N'" + value.replace("'", "''") + "'"
+        return super().literal(value)
+
+    def sample_query(self, query: str, column: str, resume: str, modulus: int) -> str:
+        # Deterministik hash örneği; tüm anahtarlar sıralanmaz, sadece örnek.
+        # CHECKSUM(int) değerin kendisidir (adımlı IDENTITY'de örnek boş kalır); MD5'in ilk 4 byte'ı kullanılır
+        key_hash = f"CAST(CAST(HASHBYTES('MD5', CAST({column} AS nvarchar(4000))) AS binary(4)) AS bigint)"
+        sample_filter = f"{'AND' if resume else 'WHERE'} {key_hash} % {modulus} = 0"
+        return f"SELECT DISTINCT {column} AS SampleKey FROM ({query}) source {resume} {sample_filter}"
+
+
+class PostgresDialect(RangeDialect):
+    name = "postgresql"
+
+    def literal(self, value: Any) -> str:
+        if isinstance(value, (bytes, bytearray)):
+            return f"'\\x{bytes(value).hex()}'::bytea"
+        return super().literal(value)
+
+
+class SQLiteDialect(RangeDialect):
+    name = "sqlite"
+
+    def bounds_query(self, query: str, column: str, resume: str) -> str:
+        # Aggregate sonuçları tip bilgisi taşımaz (DATETIME metin döner); MaxKey kolonun kendisinden okunur
+        return f"""
+            SELECT {column} AS MaxKey, (SELECT COUNT(*) FROM ({query}) source {resume}) AS Rows
+            FROM ({query}) source {resume} ORDER BY {column} DESC LIMIT 1
+        """
+
+    def literal(self, value: Any) -> str:
+        # SQLite tarihleri metin olarak saklar; karşılaştırma metin üzerinden yapılır
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, datetime):
+            return "'" + value.isoformat(sep=" ", timespec="seconds" if not value.microsecond else "microseconds") + "'"
+        if isinstance(value, (date, time)):
+            return f"'{value.isoformat()}'"
+        return super().literal(value)
+
+
+class DuckDBDialect(RangeDialect):
+    """
+    DuckDB veritabanı veya local dosyalar (parquet, csv) için.
+
+    db_uri "duckdb:///path/to/file.duckdb" veya sadece dosya okuyan sorgular için
+    "duckdb://" (in-memory) olabilir; örn. query="SELECT * FROM 'data/*.parquet'".
+    """
+    name = "duckdb"
+
+    def sample_query(self, query: str, column: str, resume: str, modulus: int) -> str:
+        sample_filter = f"{'AND' if resume else 'WHERE'} hash({column}) % {modulus} = 0"
+        return f"SELECT DISTINCT {column} AS SampleKey FROM ({query}) source {resume} {sample_filter}"
+
+    @staticmethod
+    def _database(db_uri: str) -> str:
+        # SQLAlchemy gibi: duckdb:///relative.db, duckdb:////absolute.db
+        path = db_uri.split("://", 1)[1]
+        if path.startswith("/"):
+            path = path[1:]
+        return path or ":memory:"
+
+    def read(self, db_uri: str, queries: List[str]) -> pl.DataFrame:
+        import duckdb
+
+        database = self._database(db_uri)
+        with duckdb.connect(database, read_only=database != ":memory:") as con:
+            # DuckDB sorgu içinde paralel çalışır; aralıklar sırayla okunur
+            return pl.concat([con.execute(query).pl() for query in queries], how="vertical_relaxed")
+
+    def read_arrow_stream(self, db_uri: str, queries: List[str]) -> pa.RecordBatchReader:
+        table = self.read(db_uri, queries).to_arrow()
+        return pa.RecordBatchReader.from_batches(table.schema, table.to_batches())
+
+
+_DIALECTS: Dict[str, RangeDialect] = {}
+
+
+def register_dialect(scheme: str, dialect: RangeDialect) -> None:
+    """db_uri şeması için dialect kaydeder (mevcut kaydı ezer)"""
+    _DIALECTS[scheme.lower()] = dialect
+
+
+def get_dialect(db_uri: str) -> RangeDialect:
+    scheme = urlparse(db_uri).scheme.lower()
+    dialect = _DIALECTS.get(scheme) or _DIALECTS.get(scheme.split("+", 1)[0])
+    if dialect is None:
+        raise ValueError(f"Database type {scheme} is not supported")
+    return dialect
+
+
+register_dialect("mssql", MSSQLDialect())
+register_dialect("postgresql", PostgresDialect())
+register_dialect("postgres", PostgresDialect())
+register_dialect("sqlite", SQLiteDialect())
+register_dialect("duckdb", DuckDBDialect())
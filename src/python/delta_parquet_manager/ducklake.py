@@ -0,0 +1,265 @@
+"""
+DuckLake (veya herhangi bir DuckDB catalog'u) üzerine history tablosu uygulama
+
+Ana tablo ilk yüklemede PK aralıklarıyla, sonrasında {table}_Hist tablosundaki
+değişiklikler Hist_ID aralıklarıyla okunur. Aralıklar connectorx arrow_stream ile
+doğrudan DuckDB'ye akıtılır (DataFrame'e çevrilmez) ve tek bir MERGE ile uygulanır:
+aynı PK için son Hist_ID'li satır seçilir, Hist_Islem = 0 olanlar silinir, diğerleri
+update / insert edilir. Watermark (son uygulanan Hist_ID) aynı catalog'daki state
+tablosunda MERGE ile aynı transaction'da güncellenir; yarıda kalan bir çalıştırma
+tekrarlandığında veri ve watermark tutarlıdır.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+import duckdb
+
+from db_parquet.metrics import RunMetrics
+from delta_parquet_manager.dialects import RangeDialect, get_dialect
+from delta_parquet_manager.planner import RangePlanner
+
+logger = logging.getLogger(__name__)
+
+STATE_TABLE = "_ingest_state"
+
+
+@dataclass
+class DuckLakeTableConfig:
+    """DuckLake'e uygulanacak tek bir tablonun ayarları"""
+    table_name: str
+    columns: List[str] = field(default_factory=list)  # Boşsa tüm kolonlar
+    primary_key: str = "ID"
+    history_table: Optional[str] = None  # Varsayılan: {table_name}_Hist
+    hist_id_column: str = "Hist_ID"
+    hist_operation_column: str = "Hist_Islem"
+    target_table: Optional[str] = None  # Catalog'daki tablo adı; varsayılan: table_name
+    limit: int = 1_000_000  # MERGE başına satır
+    partition: int = 8  # Aralık başına paralel sorgu
+
+    def __post_init__(self):
+        if not self.history_table:
+            self.history_table = f"{self.table_name}_Hist"
+        if not self.target_table:
+            self.target_table = self.table_name
+
+    @property
+    def select_columns(self) -> str:
+        return ", ".join(self.columns) if self.columns else "*"
+
+
+class DuckLakeHistoryApplier:
+    """History tablosundaki değişiklikleri DuckLake catalog'undaki tablolara uygular"""
+
+    def __init__(
+        self,
+        db_uri: str,
+        catalog: str,
+        data_path: Optional[str] = None,
+        alias: str = "lake",
+        database: str = ":memory:",
+        connection: Optional[duckdb.DuckDBPyConnection] = None,
+    ):
+        """
+        Args:
+            db_uri: Kaynak veritabanı (connectorx formatı, örn. mssql://host/db?...)
+            catalog: ATTACH hedefi; örn. 'ducklake:metadata.ducklake' veya bir .duckdb dosyası
+            data_path: DuckLake DATA_PATH (parquet dosyalarının yazılacağı yer)
+            alias: Catalog'un ATTACH adı
+            database: DuckDB çalışma veritabanı (varsayılan in-memory)
+            connection: Hazır DuckDB bağlantısı (verilirse database yok sayılır)
+        """
+        self.db_uri = db_uri
+        self.dialect: RangeDialect = get_dialect(db_uri)
+        self.alias = alias
+        self.metrics: Optional[RunMetrics] = None
+
+        self._owns_connection = connection is None
+        self.con = connection or duckdb.connect(database)
+        options = f" (DATA_PATH '{data_path}')" if data_path else ""
+        self.con.execute(f"ATTACH IF NOT EXISTS '{catalog}' AS {alias}{options}")
+        self.con.execute(f"""
+            CREATE TABLE IF NOT EXISTS {alias}.{STATE_TABLE} (
+                table_name VARCHAR, phase VARCHAR, hist_id BIGINT, updated_at TIMESTAMP
+            )
+        """)
+
+    def _target(self, config: DuckLakeTableConfig) -> str:
+        return f"{self.alias}.{config.target_table}"
+
+    def _table_exists(self, config: DuckLakeTableConfig) -> bool:
+        return self.con.execute(
+            "SELECT count(*) FROM duckdb_tables() WHERE database_name = ? AND table_name = ?",
+            [self.alias, config.target_table],
+        ).fetchone()[0] > 0
+
+    def _target_columns(self, config: DuckLakeTableConfig) -> List[str]:
+        """Catalog'daki tablonun kolonları (tablodaki sırayla)"""
+        rows = self.con.execute(
+            "SELECT column_name FROM duckdb_columns() WHERE database_name = ? AND table_name = ? ORDER BY column_index",
+            [self.alias, config.target_table],
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def read_state(self, config: DuckLakeTableConfig) -> tuple:
+        """(phase, hist_id) döndürür; tablo hiç yüklenmediyse (None, None)"""
+        row = self.con.execute(
+            f"SELECT phase, hist_id FROM {self.alias}.{STATE_TABLE} WHERE table_name = ?",
+            [config.target_table],
+        ).fetchone()
+        return row if row else (None, None)
+
+    def _save_state(self, config: DuckLakeTableConfig, phase: str, hist_id: Any) -> None:
+        self.con.execute(f"DELETE FROM {self.alias}.{STATE_TABLE} WHERE table_name = ?", [config.target_table])
+        self.con.execute(
+            f"INSERT INTO {self.alias}.{STATE_TABLE} VALUES (?, ?, ?, now())",
+            [config.target_table, phase, hist_id],
+        )
+
+    def _current_hist_id(self, config: DuckLakeTableConfig) -> Any:
+        """History tablosundaki son Hist_ID; tablo boşsa None"""
+        bounds = self.dialect.read(
+            self.db_uri,
+            [self.dialect.bounds_query(f"SELECT {config.hist_id_column} FROM {config.history_table}", config.hist_id_column, "")],
+        )
+        return None if bounds.is_empty() else bounds["MaxKey"][0]
+
+    def _stream(self, source_query: str, column: str, planner: RangePlanner, config: DuckLakeTableConfig):
+        """Sonraki aralıkları (ranges, RecordBatchReader) olarak döndürür; bittiyse None"""
+        ranges = planner.next_ranges(config.limit, config.partition)
+        if not ranges:
+            return None
+        queries = [f"SELECT * FROM ({source_query}) part WHERE {r.where(column, self.dialect)}" for r in ranges]
+        with self.metrics.span("fetch"):
+            reader = self.dialect.read_arrow_stream(self.db_uri, queries)
+        return ranges, reader
+
+    def init_table(self, config: DuckLakeTableConfig) -> int:
+        """Ana tabloyu PK aralıklarıyla catalog'a kopyalar; yarıda kaldıysa max(PK)'dan devam eder"""
+        target = self._target(config)
+        phase, hist_id = self.read_state(config)
+
+        last_key = None
+        if phase == "init" and self._table_exists(config):
+            last_key = self.con.execute(f"SELECT max({config.primary_key}) FROM {target}").fetchone()[0]
+            logger.info(f"[{config.table_name}] İlk yükleme {last_key} sonrasından devam ediyor")
+        else:
+            # Yükleme sırasında gelen değişiklikler sonra tekrar uygulanır (MERGE idempotent)
+            hist_id = self._current_hist_id(config) or 0
+            self.con.execute(f"DROP TABLE IF EXISTS {target}")
+
+        source_query = (
+            f"SELECT {config.select_columns}, CAST({self.dialect.literal(hist_id)} AS BIGINT) AS {config.hist_id_column}, "
+            f"1 AS {config.hist_operation_column} FROM {config.table_name}"
+        )
+        planner = RangePlanner(self.db_uri, source_query, config.primary_key, self.dialect, last_key)
+
+        row_count = 0
+        while (chunk := self._stream(source_query, config.primary_key, planner, config)) is not None:
+            _, reader = chunk
+            with self.metrics.span("encode") as span:
+                self.con.register("source_chunk", reader)
+                try:
+                    self.con.execute("BEGIN TRANSACTION")
+                    if self._table_exists(config):
+                        rows = self.con.execute(f"INSERT INTO {target} SELECT * FROM source_chunk").fetchone()[0]
+                    else:
+                        self.con.execute(f"CREATE TABLE {target} AS SELECT * FROM source_chunk")
+                        rows = self.con.execute(f"SELECT count(*) FROM {target}").fetchone()[0]
+                    self._save_state(config, "init", hist_id)
+                    self.con.execute("COMMIT")
+                except Exception:
+                    self.con.execute("ROLLBACK")
+                    raise
+                finally:
+                    self.con.unregister("source_chunk")
+                span.add(rows=rows)
+            row_count += rows
+            logger.info(f"[{config.table_name}] İlk yükleme: {row_count:,} satır")
+
+        self._save_state(config, "sync", hist_id)
+        return row_count
+
+    def apply_history(self, config: DuckLakeTableConfig) -> int:
+        """Watermark'tan sonraki history kayıtlarını MERGE ile uygular; uygulanan satır sayısını döndürür"""
+        target = self._target(config)
+        pk = config.primary_key
+        hist_id_column = config.hist_id_column
+        _, hist_id = self.read_state(config)
+
+        # History tablosu ana tablonun kolonlarına ek olarak Hist kolonlarını taşır
+        columns = f"{config.select_columns}, {hist_id_column}, {config.hist_operation_column}" if config.columns else "*"
+        source_query = f"SELECT {columns} FROM {config.history_table}"
+        planner = RangePlanner(self.db_uri, source_query, hist_id_column, self.dialect, hist_id)
+
+        # Kolon listesiz UPDATE/INSERT kolonları sırayla eşler; history tablosunun kolon sırası
+        # ve ek (audit) kolonları farklı olabileceği için hedef kolonlar adıyla yazılır
+        target_columns = self._target_columns(config)
+        update_set = ", ".join(f"{column} = source.{column}" for column in target_columns if column != pk)
+        insert_columns = ", ".join(target_columns)
+        insert_values = ", ".join(f"source.{column}" for column in target_columns)
+
+        # Aynı PK'nın son hali; silme MERGE içinde yapılır (ayrı DELETE taraması yok)
+        merge_sql = f"""
+            MERGE INTO {target} AS target
+            USING (
+                SELECT * FROM changes
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY {pk} ORDER BY {hist_id_column} DESC) = 1
+            ) AS source
+            ON source.{pk} = target.{pk}
+            WHEN MATCHED AND source.{config.hist_operation_column} = 0 THEN DELETE
+            WHEN MATCHED THEN UPDATE SET {update_set}
+            WHEN NOT MATCHED AND source.{config.hist_operation_column} > 0 THEN INSERT ({insert_columns}) VALUES ({insert_values})
+        """
+
+        applied = 0
+        while (chunk := self._stream(source_query, hist_id_column, planner, config)) is not None:
+            ranges, reader = chunk
+            with self.metrics.span("encode") as span:
+                self.con.register("changes", reader)
+                try:
+                    self.con.execute("BEGIN TRANSACTION")
+                    rows = self.con.execute(merge_sql).fetchone()[0]
+                    self._save_state(config, "sync", ranges[-1].high)
+                    self.con.execute("COMMIT")
+                except Exception:
+                    self.con.execute("ROLLBACK")
+                    raise
+                finally:
+                    self.con.unregister("changes")
+                span.add(rows=rows)
+            applied += rows
+            logger.info(f"[{config.table_name}] {hist_id_column} {ranges[-1].high}'e kadar uygulandı ({rows:,} satır)")
+
+        return applied
+
+    def run(self, config: DuckLakeTableConfig, force_init: bool = False) -> RunMetrics:
+        """Tablo hiç yüklenmediyse (veya ilk yükleme yarıda kaldıysa) init, sonra history uygular"""
+        phase, _ = self.read_state(config)
+        self.metrics = RunMetrics(config.table_name, action="init" if force_init or phase != "sync" else "sync")
+        try:
+            if force_init or phase != "sync" or not self._table_exists(config):
+                if force_init:
+                    self.con.execute(f"DELETE FROM {self.alias}.{STATE_TABLE} WHERE table_name = ?", [config.target_table])
+                self.init_table(config)
+            self.apply_history(config)
+        except Exception as e:
+            self.metrics.finish(success=False, error=str(e))
+            logger.error(f"[{config.table_name}] HATA: {e}")
+            raise
+
+        self.metrics.finish()
+        logger.info(f"[{config.table_name}] DuckLake senkronizasyonu tamamlandı. {self.metrics.summary()}")
+        return self.metrics
+
+    def close(self) -> None:
+        if self._owns_connection:
+            self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
@@ -0,0 +1,116 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, List
+
+import polars as pl
+
+from delta_parquet_manager.dialects import RangeDialect
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class KeyRange:
+    """order_by_column için (low, high] aralığı; low None ise alt sınır yok"""
+    low: Any
+    high: Any
+
+    def where(self, column: str, dialect: RangeDialect) -> str:
+        condition = f"{column} <= {dialect.literal(self.high)}"
+        if self.low is not None:
+            condition = f"{column} > {dialect.literal(self.low)} AND {condition}"
+        return condition
+
+
+class RangePlanner:
+    """
+    Keyset aralıklarını çalıştırma başında bir kez planlar.
+
+    Kalan aralığın MAX/COUNT değeri ve order_by_column üzerinde örneklenmiş
+    anahtarlar (dialect'e göre hash veya ROW_NUMBER ile; hash örneği beklenenden çok azsa
+    ROW_NUMBER ile) okunur; örnek anahtarlar yaklaşık eşit satır sayılı sınır
+    noktalarıdır. Her iterasyonda bu noktalardan limit satırlık bir dilim
+    alınır ve partition aralığa bölünür; iterasyon başına sıralama / NTILE sorgusu
+    çalışmaz. Plan bitince MAX'tan sonrası için yeniden planlanır (çalışma sırasında
+    gelen satırlar).
+    """
+
+    def __init__(self, db_uri: str, query: str, order_by_column: str, dialect: RangeDialect, last_id: Any = None, points_per_partition: int = 8, max_points: int = 100_000):
+        """
+        Args:
+            db_uri: Bağlantı adresi
+            dialect: SQL parçalarını üreten ve okuyan dialect
+            query: Kaynak sorgu
+            order_by_column: Keyset kolonu
+            last_id: Bu değerden sonraki anahtarlar okunur (None ise baştan)
+            points_per_partition: Partition başına hedef sınır noktası (planın çözünürlüğü)
+            max_points: Örneklenecek en fazla anahtar sayısı
+        """
+        self.db_uri = db_uri
+        self.query = query
+        self.order_by_column = order_by_column
+        self.dialect = dialect
+        self.points_per_partition = points_per_partition
+        self.max_points = max_points
+
+        self.position: Any = last_id
+        self.points: List[Any] = []
+        self.rows_per_point = 0.0
+        self._index = 0
+
+    def _read(self, query: str) -> pl.DataFrame:
+        return self.dialect.read(self.db_uri, [query])
+
+    def _sample(self, query: str) -> List[Any]:
+        return self._read(query)["SampleKey"].unique().sort().to_list()
+
+    def plan(self, last_id: Any, limit: int, partition: int) -> bool:
+        """last_id'den sonraki anahtarlar için sınır noktalarını hesaplar; satır yoksa False"""
+        column = self.order_by_column
+        resume = f"WHERE {column} > {self.dialect.literal(last_id)}" if last_id is not None else ""
+        bounds = self._read(self.dialect.bounds_query(self.query, column, resume))
+
+        self.position = last_id
+        self.points = []
+        self._index = 0
+        if bounds.is_empty():
+            return False
+
+        bounds = bounds.row(0, named=True)
+        rows = bounds["Rows"]
+        target_points = min(self.max_points, math.ceil(rows / max(limit, 1)) * partition * self.points_per_partition)
+        modulus = max(1, rows // max(target_points, 1))
+        sample = self._sample(self.dialect.sample_query(self.query, column, resume, modulus))
+        if modulus > 1 and len(sample) < rows // modulus // 4:
+            # Hash örneği anahtar dağılımına takıldı; satır sırasıyla (ROW_NUMBER) yeniden örneklenir
+            logger.info(f"Hash örneği yetersiz ({len(sample)} anahtar), ROW_NUMBER ile örnekleniyor")
+            sample = self._sample(RangeDialect.sample_query(self.dialect, self.query, column, resume, modulus))
+
+        max_key = bounds["MaxKey"]
+        self.points = [key for key in sample if key is not None and key < max_key] + [max_key]
+        self.rows_per_point = rows / len(self.points)
+        logger.info(
+            f"Range plan: {rows} satır, {last_id} - {max_key}, "
+            f"{len(self.points)} sınır noktası (~{self.rows_per_point:.0f} satır/nokta)"
+        )
+        return True
+
+    def next_ranges(self, limit: int, partition: int) -> List[KeyRange]:
+        """Sonraki ~limit satırı partition aralığa bölerek döndürür; bittiyse boş liste"""
+        if self._index >= len(self.points):
+            if not self.plan(self.position, limit, partition):
+                return []
+
+        steps = max(1, round(limit / max(self.rows_per_point, 1.0)))
+        chunk = self.points[self._index:self._index + steps]
+        self._index += len(chunk)
+
+        partition = max(1, min(partition, len(chunk)))
+        highs = [chunk[math.ceil((i + 1) * len(chunk) / partition) - 1] for i in range(partition)]
+
+        ranges = []
+        for high in highs:
+            ranges.append(KeyRange(self.position, high))
+            self.position = high
+        return ranges
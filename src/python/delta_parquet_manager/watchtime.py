@@ -1,17 +1,47 @@
 import time
+import inspect
 import logging
 from functools import wraps
-from typing import Callable, Any, Iterator
+from typing import Callable, Any, Optional
 
 logger = logging.getLogger(__name__)
 
-def watch_time_decorator(func: Callable) -> Callable:
+def watch_time_decorator(
+    func: Optional[Callable] = None,
+    *,
+    metrics: Any = None,
+    phase: str = "fetch",
+    rows: Optional[Callable[[Any], int]] = None,
+) -> Callable:
     """
     Fonksiyonun veya generator'ın çalışma süresini ölçen decorator.
     Generator'lar için her iterasyon arasında da bilgi verir.
+    
+    Parametresiz (@watch_time_decorator) veya metriklerle
+    (@watch_time_decorator(metrics=lambda: manager.metrics, phase="fetch", rows=len))
+    kullanılabilir. Metrikler (db_parquet.metrics.RunMetrics) her çağrıda çözülür; her
+    iterasyonun bekleme süresi ve satır sayısı ilgili faza eklenir:
+
+    - Çağrıda metrics= verilirse o kullanılır (fonksiyon metrics parametresi almıyorsa
+      ona iletilmez),
+    - yoksa decorator'daki metrics; RunMetrics döndüren bir fonksiyon (getter) da olabilir.
     """
+    if func is None:
+        return lambda f: watch_time_decorator(f, metrics=metrics, phase=phase, rows=rows)
+
+    accepts_metrics = "metrics" in inspect.signature(func).parameters
+
+    def resolve_metrics(kwargs: dict) -> Any:
+        # Decorator anında bağlanmaz; her çalıştırma kendi RunMetrics'ine yazar
+        if "metrics" in kwargs:
+            return kwargs["metrics"] if accepts_metrics else kwargs.pop("metrics")
+        if callable(metrics) and not hasattr(metrics, "record"):
+            return metrics()
+        return metrics
+
     @wraps(func)
     def wrapper(*args, **kwargs):
+        run_metrics = resolve_metrics(kwargs)
         start_time = time.time()
         result = func(*args, **kwargs)
         
@@ -29,12 +59,14 @@ def watch_time_decorator(func: Callable) -> Callable:
                         iter_elapsed = current_time - last_iter_time
                         total_elapsed = current_time - start_time
                         
+                        if run_metrics is not None:
+                            run_metrics.record(phase, iter_elapsed, rows(item) if rows else 0)
                         logger.info(
                             f"{func.__name__} - Iterasyon {iteration_count}: "
                             f"Bu iterasyon: {iter_elapsed:.2f}s, Toplam: {total_elapsed:.2f}s"
                         )
-                        last_iter_time = current_time
                         yield item
+                        last_iter_time = time.time()
                     
                     final_elapsed = time.time() - start_time
                     logger.info(
@@ -53,7 +85,9 @@ def watch_time_decorator(func: Callable) -> Callable:
         else:
             # Normal fonksiyon
             elapsed = time.time() - start_time
+            if run_metrics is not None:
+                run_metrics.record(phase, elapsed)
             logger.info(f"{func.__name__} tamamlandı - Süre: {elapsed:.2f} saniye")
             return result
     
-    return wrapper
\ No newline at end of file
+    return wrapper
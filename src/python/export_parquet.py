@@ -9,11 +9,12 @@ import sqlalchemy
 import pyarrow as pa
 import pyarrow.parquet as pq
 import connectorx as cx
+from db_parquet.profile import WriterProfile
 
 # def pars_quote_plus(password: str) -> str:
 #     return parse.quote_plus(password)
 
-def to_parquet(query: str, dataset: List[Tuple[str, str, str]]) -> Buffer:
+def to_parquet(query: str, dataset: List[Tuple[str, str, str]], writer_profile: Optional[WriterProfile] = None) -> Buffer:
     
     for item in dataset:
         name, db_uri, source = item
@@ -25,14 +26,12 @@ def to_parquet(query: str, dataset: List[Tuple[str, str, str]]) -> Buffer:
     with BytesIO() as out_stream:
         duckdb.sql(query).pl().write_parquet(
             out_stream,
-            compression="zstd",
-            use_pyarrow=True,
-            pyarrow_options={"row_group_size": 100_000}
+            **(writer_profile or WriterProfile()).polars_options()
         )
 
         return out_stream.getvalue()
     
-def to_parquet(db_uri: str, query: str) -> Buffer:
+def to_parquet(db_uri: str, query: str, writer_profile: Optional[WriterProfile] = None) -> Buffer:
     
     # sql_text = sqlalchemy.text(
     # """ 
@@ -47,8 +46,9 @@ def to_parquet(db_uri: str, query: str) -> Buffer:
    
     df: pl.DataFrame = cx.read_sql(db_uri, query, return_type="polars")
 
+    profile = writer_profile or WriterProfile()
     with BytesIO() as out_stream:
-        df.write_parquet(out_stream, compression="zstd", use_pyarrow=True, pyarrow_options={"row_group_size": 100_000})
+        df.write_parquet(out_stream, **profile.polars_options())
         return out_stream.getvalue()
        # read data from MsSQL
 
@@ -58,9 +58,7 @@ def to_parquet(db_uri: str, query: str) -> Buffer:
             uri=db_uri,
             engine="connectorx").write_parquet(
                 out_stream,
-                compression="zstd",
-                use_pyarrow=True,
-                pyarrow_options={"row_group_size": 100_000}
+                **profile.polars_options()
             )
 
         return out_stream.getvalue()
@@ -2,10 +2,116 @@ import polars as pl
 import os
 import math
 import json
+import re
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from db_parquet.buckets import MANIFEST_FILE, BucketManifest, describe_bucket, unreferenced_files
+from db_parquet.journal import RunJournal
+from db_parquet.maintenance import ParquetMaintenance
+from db_parquet.metrics import RunMetrics
+from delta_parquet_manager import read_database_part
+
+# Merge-on-read delta dosyaları: part_N.delta_<rv>.parquet (rv sabit genişlikte, sıralanabilir)
+DELTA_INFIX = ".delta_"
+_PART_FILE = re.compile(r"^part_(-?\d+)(?:\.delta_([0-9A-Za-z]+))?\.parquet$")
+
+
+def read_manifest(folder_path, backup=False):
+    """Klasörün yayınlanmış (veya yedek) manifest'ini okur; manifest'siz (eski) klasörlerde None."""
+    manifest_path = os.path.join(folder_path, MANIFEST_FILE + (".backup" if backup else ""))
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return BucketManifest.from_json(f.read())
+
+
+def _listed_files(folder_path):
+    """Manifest'siz klasörlerde part_N.parquet ve deltalarını listeleyerek bulur."""
+    buckets = {}
+    for name in os.listdir(folder_path) if os.path.isdir(folder_path) else []:
+        match = _PART_FILE.match(name)
+        if not match:
+            continue
+        base, deltas = buckets.setdefault(int(match.group(1)), (None, []))
+        path = os.path.join(folder_path, name)
+        if match.group(2):
+            deltas.append(path)
+        else:
+            buckets[int(match.group(1))] = (path, deltas)
+    for _, deltas in buckets.values():
+        deltas.sort()
+    return buckets
+
+
+def bucket_files(folder_path, ranges=None):
+    """
+    Klasördeki bucket dosyalarını {bucket_id: (base dosya veya None, [delta dosyaları])}
+    olarak döndürür. Deltalar eskiden yeniye sıralıdır.
+
+    Manifest varsa sadece manifest okunur (klasör listelenmez, footer açılmaz) ve
+    ranges ({kolon: (min, max)}, uçlar dahil) verilirse istatistikleri bu aralıklarla
+    kesişmeyen bucket'lar elenir. Manifest'siz klasörlerde ranges yok sayılır.
+    """
+    manifest = read_manifest(folder_path)
+    if manifest is None:
+        return _listed_files(folder_path)
+    return {
+        bucket_id: (
+            os.path.join(folder_path, info.file),
+            [os.path.join(folder_path, delta) for delta in info.deltas],
+        )
+        for bucket_id, info in manifest.prune(ranges).items()
+    }
+
+
+def scan_bucket(base, deltas, pk):
+    """Base dosya ve deltalarını birleştirir; her anahtarın en son sürümü kalır."""
+    files = ([base] if base else []) + deltas
+    if len(files) == 1:
+        return pl.scan_parquet(files[0])
+    # Sonraki dosya öncekini ezer (base < delta_1 < delta_2 ...)
+    return (
+        pl.concat([pl.scan_parquet(path).with_columns(pl.lit(seq).alias("__seq")) for seq, path in enumerate(files)],
+                  how="diagonal_relaxed")
+        .sort("__seq")
+        .unique(subset=[pk], keep="last", maintain_order=True)
+        .drop("__seq")
+    )
+
+
+def merge_on_read_sql(folder_path, pk, ranges=None):
+    """
+    Klasörü merge-on-read çözümleyerek okuyan DuckDB sorgusu. Deltası olmayan bucket'lar
+    doğrudan okunur; sadece deltası olanlar anahtar bazında çözülür. ranges verilirse
+    dosyalar manifest istatistikleriyle budanır (bkz. bucket_files); satır filtresi
+    ayrıca sorguda uygulanmalıdır.
+    """
+    plain, resolved = [], []
+    for base, deltas in bucket_files(folder_path, ranges).values():
+        if deltas:
+            resolved.extend(([base] if base else []) + deltas)
+        elif base:
+            plain.append(base)
+
+    def file_list(paths):
+        return "[" + ", ".join("'" + path.replace("'", "''") + "'" for path in sorted(paths)) + "]"
+
+    parts = []
+    if plain:
+        parts.append(f"SELECT * FROM read_parquet({file_list(plain)}, union_by_name=true)")
+    if resolved:
+        # Delta dosyası base'den, yeni delta eskisinden önce gelir (rv sabit genişlikte)
+        parts.append(f"""
+            SELECT * EXCLUDE (filename) FROM read_parquet({file_list(resolved)}, filename=true, union_by_name=true)
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY {pk} ORDER BY contains(filename, '{DELTA_INFIX}') DESC, filename DESC
+            ) = 1""")
+    return " UNION ALL BY NAME ".join(parts) if parts else None
+
+
 class ParquetSynchronizer:
     def __init__(self, db_uri, out_dir, chunk=1_000_000):
         """
@@ -19,6 +125,7 @@ class ParquetSynchronizer:
         self.db_uri = db_uri
         self.out_dir = out_dir
         self.chunk = chunk
+        self.metrics = None  # Son init/sync çalıştırmasının faz metrikleri (RunMetrics)
         
         # Ana klasör yoksa oluştur
         os.makedirs(self.out_dir, exist_ok=True)
@@ -76,81 +183,253 @@ class ParquetSynchronizer:
         return default_val
 
     def _save_state(self, state_path, last_rv_hex):
-        """İşlem hatasız biterse son RowVersion'ı kaydeder."""
+        """İşlem hatasız biterse son RowVersion'ı kaydeder (asıl checkpoint manifest'tedir)."""
         with open(state_path, "w") as f:
             json.dump({
                 "last_rowversion": last_rv_hex,
                 "last_update": datetime.now().isoformat()
             }, f)
 
-    def init(self, table, pk, cols=None):
+    def _write_text(self, path, text):
+        """Metin dosyasını temp dosya + rename ile atomik olarak yazar."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _load_manifest(self, folder_path, pk, state_path):
+        """
+        Yayınlanmış manifest'i döndürür. Manifest'siz (eski) klasörlerde part dosyalarının
+        footer'larından ve state dosyasındaki checkpoint'ten versiyon 0 oluşturulur; ilk
+        yayında yedek olarak saklanır ve eski dosyalar yedek dönünce silinir.
+        """
+        manifest = read_manifest(folder_path)
+        if manifest is not None:
+            return manifest
+        manifest = BucketManifest(
+            primary_key=pk,
+            bucket_size=self.chunk,
+            checkpoint=self._read_state(state_path, default_val=None),
+        )
+        for bucket_id, (base, deltas) in _listed_files(folder_path).items():
+            if base:
+                manifest.buckets[bucket_id] = describe_bucket(
+                    folder_path, os.path.basename(base), pk, [os.path.basename(delta) for delta in deltas]
+                )
+        return manifest
+
+    def _publish_manifest(self, folder_path, manifest, previous):
+        """
+        Yeni manifest'i (checkpoint dahil) atomik olarak yayınlar; okuyucular bu ana kadar
+        previous'u görür. previous .backup olarak saklanır, ne yeni manifest'te ne de
+        yedekte kalan eski dosyalar silinir.
+        """
+        manifest_path = os.path.join(folder_path, MANIFEST_FILE)
+        old_backup = read_manifest(folder_path, backup=True)
+        if previous is not None and previous.buckets:
+            self._write_text(f"{manifest_path}.backup", previous.to_json())
+        self._write_text(manifest_path, manifest.to_json())
+        for name in unreferenced_files(old_backup, manifest, previous):
+            file_path = os.path.join(folder_path, name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        self.logger.info(
+            f"📜 Manifest yayınlandı: v{manifest.version} ({len(manifest.buckets)} bucket, {manifest.row_count} satır)"
+        )
+
+    def _plan_buckets(self, table, pk):
+        """
+        Dolu bucket'ları ve satır sayılarını tek sorguda okur (GROUP BY pk / chunk).
+        Seyrek ID uzaylarında boş aralıklar hiç sorgulanmaz.
+        """
+        # SQL tam sayı bölmesi sıfıra yuvarlar; negatif ID'ler Python'daki gibi aşağı yuvarlanır
+        bucket_expr = f"CASE WHEN {pk} < 0 THEN ({pk} + 1) / {self.chunk} - 1 ELSE {pk} / {self.chunk} END"
+        query = f"SELECT {bucket_expr} AS bucket_id, COUNT(*) AS row_count FROM {table} GROUP BY {bucket_expr}"
+        with self.metrics.span("fetch"):
+            df = pl.read_database_uri(query, self.db_uri)
+        return sorted([int(bucket_id), int(row_count)] for bucket_id, row_count in df.iter_rows())
+
+    def _plan_stride(self, table, pk):
+        """MIN/MAX arasındaki tüm bucket'lar (satır sayısı bilinmez)."""
+        q_bounds = f"SELECT MIN({pk}) as min_id, MAX({pk}) as max_id FROM {table}"
+        with self.metrics.span("fetch"):
+            bounds_df = pl.read_database_uri(q_bounds, self.db_uri)
+        min_id = bounds_df["min_id"][0]
+        max_id = bounds_df["max_id"][0]
+        if min_id is None:
+            return []
+        return [[bucket_id, None] for bucket_id in range(self._bucket(min_id), self._bucket(max_id) + 1)]
+
+    def _init_bucket(self, table, select_clause, pk, bucket_id, folder_path, manifest, journal):
+        """
+        Tek bir bucket'ın ID aralığını okur, manifest versiyonunun dosya adıyla yazar ve
+        journal'a kaydeder. Dosya manifest yayınlanana kadar okuyuculara görünmez.
+        """
+        current_start = bucket_id * self.chunk
+        current_end = current_start + self.chunk
+        query = f"""
+        SELECT {select_clause} FROM {table} 
+        WHERE {pk} >= {current_start} AND {pk} < {current_end}
+        """
+        
+        with self.metrics.span("fetch") as span:
+            df_chunk = pl.read_database_uri(query, self.db_uri)
+            span.add(rows=len(df_chunk), bytes=df_chunk.estimated_size())
+        
+        file_name = None
+        if not df_chunk.is_empty():
+            file_name = manifest.file_name(bucket_id)
+            with self.metrics.span("encode", rows=len(df_chunk)):
+                df_chunk.write_parquet(os.path.join(folder_path, file_name))
+            self.logger.info(f"  ✅ Yazıldı: {file_name} ({len(df_chunk)} satır)")
+
+        journal.record("done", range=current_start, end=current_end, file=file_name, rows=len(df_chunk))
+
+    def init(self, table, pk, cols=None, resume=True, plan_buckets=True, parallelism=1):
         """
         [INITIALIZE] Tabloyu baştan sona okur ve ID aralıklarına göre dosyalar oluşturur.
+
+        plan_buckets=True ise önce kaynaktan dolu bucket'lar ve satır sayıları okunur
+        (GROUP BY pk / chunk); boş aralıklar için sorgu gönderilmez. False ise MIN/MAX
+        arasındaki her aralık sorgulanır. parallelism > 1 ise bucket'lar bu kadar eş
+        zamanlı bağlantıyla okunup yazılır.
+
+        Her tamamlanan aralık {table}_init.journal dosyasına yazılır. Çalıştırma yarıda
+        kalırsa (resume=True) aynı parametrelerle tekrar çağrıldığında ilk çalıştırmanın
+        planı kullanılır, yazılmış aralıklar atlanır ve sadece kalanlar okunur.
+
+        Dosyalar yeni manifest versiyonunun adlarıyla (part_N_vK.parquet) yazılır ve tüm
+        aralıklar bitince manifest yayınlanır; o ana kadar okuyucular önceki versiyonu görür.
+        Mevcut checkpoint yeni manifest'e taşınır.
         """
         folder_path, state_path = self._paths(table)
         select_clause = self._cols_str(cols)
+        self.metrics = RunMetrics(table, action="init")
+        journal = RunJournal(os.path.join(self.out_dir, f"{table}_init.journal"))
+        journal_key = {"table": table, "pk": pk, "cols": cols, "chunk": self.chunk, "plan_buckets": plan_buckets}
         
         self.logger.info(f"\n🚀 [INIT] '{table}' başlatılıyor...")
         self.logger.info(f"📂 Hedef: {folder_path}")
 
-        # 1. Min/Max ID Bul
         try:
-            q_bounds = f"SELECT MIN({pk}) as min_id, MAX({pk}) as max_id FROM {table}"
-            bounds_df = pl.read_database_uri(q_bounds, self.db_uri)
-            min_id = bounds_df["min_id"][0]
-            max_id = bounds_df["max_id"][0]
+            current = self._load_manifest(folder_path, pk, state_path)
         except Exception as e:
-            self.logger.error(f"❌ Hata: Tablo sınırları okunamadı. {e}")
+            self.logger.error(f"❌ Hata: Manifest okunamadı. {e}")
+            self.metrics.finish(success=False, error=str(e))
             return
 
-        if min_id is None:
-            self.logger.warning("⚠️ Tablo boş.")
-            return
+        # Sadece aynı parametreli yarım kalmış journal yüklenir; yoksa yeni plan yazılır
+        resumed = resume and journal.load(journal_key) and "buckets" in journal.header
+        if resumed:
+            # Aralıklar ve dosya adları ilk çalıştırmanın planıyla hizalı kalmalı
+            buckets = journal.header["buckets"]
+            version = journal.header.get("version", current.version + 1)
+        else:
+            # 1. Bucket Planı
+            try:
+                buckets = self._plan_buckets(table, pk) if plan_buckets else self._plan_stride(table, pk)
+            except Exception as e:
+                self.logger.error(f"❌ Hata: Tablo sınırları okunamadı. {e}")
+                self.metrics.finish(success=False, error=str(e))
+                return
 
-        self.logger.info(f"ℹ️ ID Aralığı: {min_id} - {max_id}")
+            if not buckets:
+                self.logger.warning("⚠️ Tablo boş.")
+                self.metrics.finish()
+                return
 
-        # 2. Chunk Döngüsü
-        current_start = min_id
-        while current_start <= max_id:
-            current_end = current_start + self.chunk
-            
-            query = f"""
-            SELECT {select_clause} FROM {table} 
-            WHERE {pk} >= {current_start} AND {pk} < {current_end}
-            """
-            
+            version = current.version + 1
+            journal.start(journal_key, force=True, buckets=buckets, version=version)
+
+        manifest = BucketManifest(primary_key=pk, bucket_size=self.chunk, version=version, checkpoint=current.checkpoint)
+
+        self.logger.info(
+            f"ℹ️ ID Aralığı: {buckets[0][0] * self.chunk} - {(buckets[-1][0] + 1) * self.chunk - 1}, "
+            f"{len(buckets)} bucket"
+        )
+        if plan_buckets:
+            counts = [row_count for _, row_count in buckets]
+            self.metrics.observe("bucket_rows", max(counts))
+            self.logger.info(f"ℹ️ Bucket başına satır: en az {min(counts)}, en çok {max(counts)}, toplam {sum(counts)}")
+
+        completed = journal.find("done", "range")
+        pending = []
+        for bucket_id, _ in buckets:
+            done = completed.get(bucket_id * self.chunk)
+            if done and (done["file"] is None or os.path.exists(os.path.join(folder_path, done["file"]))):
+                continue
+            pending.append(bucket_id)
+        if len(pending) < len(buckets):
+            self.logger.info(f"⏩ Journal: {len(buckets) - len(pending)} aralık daha önce tamamlanmış, atlanacak")
+
+        # 2. Bucket Döngüsü
+        errors = []
+        with ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="init") as pool:
+            futures = {
+                pool.submit(self._init_bucket, table, select_clause, pk, bucket_id, folder_path, manifest, journal): bucket_id
+                for bucket_id in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    current_start = futures[future] * self.chunk
+                    errors.append(f"{current_start}-{current_start + self.chunk}: {e}")
+                    self.logger.error(f"  ❌ Hata ({current_start}-{current_start + self.chunk}): {e}")
+        
+        if not errors:
+            # 3. Manifest Yayını (tüm aralıklar yazıldıktan sonra)
             try:
-                df_chunk = pl.read_database_uri(query, self.db_uri)
-                
-                if not df_chunk.is_empty():
-                    bucket_id = self._bucket(current_start)
-                    file_name = f"part_{bucket_id}.parquet"
-                    file_path = os.path.join(folder_path, file_name)
-                    
-                    df_chunk.write_parquet(file_path)
-                    self.logger.info(f"  ✅ Yazıldı: {file_name} ({len(df_chunk)} satır)")
+                with self.metrics.span("finalize"):
+                    for done in journal.find("done", "range").values():
+                        if done["file"]:
+                            manifest.buckets[done["range"] // self.chunk] = describe_bucket(folder_path, done["file"], pk)
+                    self._publish_manifest(folder_path, manifest, current)
             except Exception as e:
-                self.logger.error(f"  ❌ Hata ({current_start}-{current_end}): {e}")
+                errors.append(f"manifest: {e}")
+                self.logger.error(f"  ❌ Manifest yayınlanamadı: {e}")
 
-            current_start = current_end
-            
+        if errors:
+            self.logger.warning(f"⚠️ {len(errors)} aralık yazılamadı; init tekrar çalıştırıldığında sadece bunlar okunacak.")
+        else:
+            journal.finish()
+        self.metrics.finish(success=not errors, error="; ".join(errors) or None)
+        self.logger.info(f"📊 [INIT] {self.metrics.summary()}")
         self.logger.info(f"🏁 [INIT] '{table}' tamamlandı. Şimdi Upsert çalıştırarak State oluşturabilirsiniz.\n")
 
-    def sync(self, table, pk, ver, cols=None, use_ts=False):
+    def _delta_token(self, max_rv_item, max_rv_to_save, use_ts):
+        """Delta dosya adı için checkpoint'ten sabit genişlikte, sıralanabilir bir etiket üretir."""
+        if not use_ts:
+            return max_rv_to_save[2:]
+        if isinstance(max_rv_item, datetime):
+            return max_rv_item.strftime("%Y%m%d%H%M%S%f")
+        return re.sub(r"\D", "", str(max_rv_item)).ljust(20, "0")
+
+    def _checkpoint_value(self, raw, use_ts):
+        """State'teki checkpoint string'ini sorgu planlaması için tipli değere çevirir."""
+        if use_ts:
+            return datetime.fromisoformat(raw)
+        return bytes.fromhex(raw[2:])
+
+    def _read_changes(self, table, select_clause, ver, last_rv_raw, use_ts, batch_size):
         """
-        [INCREMENTAL UPSERT]
-        Değişen verileri çeker, ilgili dosyalara dağıtır ve güvenli şekilde günceller.
-        Checkpoint dosyası sayesinde işlem yarım kalsa bile veri kaybı olmaz.
+        Checkpoint'ten sonraki değişiklikleri ver sırasıyla pencereler halinde döndürür.
+        batch_size yoksa tüm değişiklikler tek pencere olarak okunur.
         """
-        folder_path, state_path = self._paths(table)
-        select_clause = self._cols_str(cols)
-        
-        self.logger.info(f"\n🔄 [UPSERT] '{table}' senkronizasyonu başlıyor...")
-
-        # 1. Checkpoint Oku
-        default_rv = "1900-01-01 00:00:00" if use_ts else "0x0000000000000000"
-        last_rv_raw = self._read_state(state_path, default_val=default_rv)
-        self.logger.info(f"📍 Son Checkpoint: {last_rv_raw}")
+        if batch_size:
+            # Keyset pencereleri: her pencere en fazla ~batch_size satır, sadece biri bellekte
+            yield from read_database_part(
+                self.db_uri,
+                f"SELECT {select_clause} FROM {table}",
+                ver,
+                self._checkpoint_value(last_rv_raw, use_ts),
+                limit=batch_size,
+                partition=1,
+                metrics=self.metrics,
+            )
+            return
 
         # SQL Sorgusu için değer hazırlama
         if use_ts:
@@ -160,79 +439,295 @@ class ParquetSynchronizer:
             # Binary hex string (0x...) tırnaksız kullanılır
             sql_cmp_value = last_rv_raw
 
-        # 2. Delta Veriyi Çek
         # RowVersion binary sıralamasına güveniyoruz.
         sql_query = f"""
         SELECT {select_clause} FROM {table} 
         WHERE {ver} > {sql_cmp_value}
         ORDER BY {ver} ASC
         """
-        
-        start_time = time.time()
-        try:
+        with self.metrics.span("fetch") as span:
             df_new = pl.read_database_uri(sql_query, self.db_uri)
-        except Exception as e:
-            self.logger.error(f"❌ SQL Bağlantı Hatası: {e}")
-            return
+            span.add(rows=len(df_new), bytes=df_new.estimated_size())
+        if not df_new.is_empty():
+            yield df_new
 
-        if df_new.is_empty():
-            self.logger.info("✅ Güncel veri yok. Sistem senkronize.")
-            return
-
-        # Bu batch içindeki en büyük RowVersion'ı al (İşlem biterse bunu kaydedeceğiz)
-        max_rv_item = df_new.select(pl.col(ver).max()).item()
+    def _rewrite_bucket(self, folder_path, manifest, bucket_val, df_updates, pk, delta_token=None):
+        """
+        Tek bir bucket'ı günceller ve manifest versiyonunun dosya adıyla yazar; yeni
+        BucketInfo'yu döndürür. Dosya, _apply_window'daki manifest yayınlanana kadar
+        okuyuculara görünmez. delta_token verilirse mevcut bucket yeniden yazılmaz;
+        değişiklikler part_N.delta_<token>.parquet olarak yanına eklenir (merge-on-read).
+        """
+        start_time = time.perf_counter()
+        current = manifest.buckets.get(bucket_val)
+        file_name = manifest.file_name(bucket_val)
         
-        if use_ts:
-            # Datetime objesini stringe çevir
-            max_rv_to_save = str(max_rv_item)
+        # Dosyaya yazarken bucket_id gerekmez
+        df_updates_clean = df_updates.drop("bucket_id")
+
+        if delta_token and current is not None:
+            # --- DELTA DOSYASI (Merge-on-read) ---
+            file_name = f"part_{bucket_val}{DELTA_INFIX}{delta_token}.parquet"
+            with self.metrics.span("convert", rows=len(df_updates_clean)):
+                df_delta = df_updates_clean.unique(subset=[pk], keep="last").sort(pk)
+            with self.metrics.span("encode", rows=len(df_delta)):
+                df_delta.write_parquet(os.path.join(folder_path, file_name))
+            deltas = [delta for delta in current.deltas if delta != file_name] + [file_name]
+            info = describe_bucket(folder_path, current.file, pk, deltas)
+            message = f"  ➕ Delta: {file_name} ({len(df_delta)} satır)"
+        elif current is not None:
+            # --- DOSYA GÜNCELLEME (Merge) ---
+            with self.metrics.span("convert", rows=len(df_updates_clean)):
+                # Varsa deltalar da çözülür; yeni dosya deltasız yayınlanır
+                df_current = scan_bucket(
+                    os.path.join(folder_path, current.file),
+                    [os.path.join(folder_path, delta) for delta in current.deltas],
+                    pk,
+                ).collect()
+                
+                # Önce mevcut, sonra yeni veriyi ekle
+                df_combined = pl.concat([df_current, df_updates_clean])
+                
+                # ID'ye göre tekilleştir -> Son geleni (güncel olanı) tut
+                df_final = df_combined.unique(subset=[pk], keep="last", maintain_order=False)
+            
+            with self.metrics.span("encode", rows=len(df_final)):
+                df_final.write_parquet(os.path.join(folder_path, file_name))
+            info = describe_bucket(folder_path, file_name, pk)
+            message = f"  ✏️  Güncellendi: {file_name} (Toplam: {len(df_final)})"
         else:
-            # Binary objesini hex stringe çevir
-            max_rv_to_save = self._to_hex(max_rv_item)
-        
-        self.logger.info(f"📥 {len(df_new)} kayıt çekildi. ({time.time() - start_time:.2f} sn)")
+            # --- YENİ DOSYA ---
+            with self.metrics.span("encode", rows=len(df_updates_clean)):
+                df_updates_clean.write_parquet(os.path.join(folder_path, file_name))
+            info = describe_bucket(folder_path, file_name, pk)
+            message = f"  ✨ Yeni Dosya: {file_name}"
 
-        # 3. Bucket Dağıtımı ve Upsert
+        seconds = time.perf_counter() - start_time
+        self.metrics.observe("bucket_seconds", seconds)
+        self.logger.info(f"{message} ({seconds:.2f} sn)")
+        return info
+
+    def _apply_window(self, df_new, folder_path, pk, manifest, max_workers=1, delta_token=None):
+        """
+        Bir değişiklik penceresini bucket dosyalarına dağıtır, her bucket'ı günceller ve
+        yeni BucketInfo'ları manifest'e (bir sonraki versiyon) yazar.
+
+        max_workers > 1 ise bucket'lar thread havuzunda eş zamanlı yeniden yazılır (Polars
+        okuma/yazma sırasında GIL'i bırakır). Bucket'lar yayınlanmamış dosya adlarına
+        yazılır; biri bile hata verirse yazılanlar silinir, manifest değişmez ve hata
+        yukarı iletilir.
+        """
         # Veriyi bucket_id'ye göre sanal olarak böl
-        df_new = df_new.with_columns(
-            (pl.col(pk) // self.chunk).alias("bucket_id")
-        )
-        partitions = df_new.partition_by("bucket_id", as_dict=True)
+        with self.metrics.span("convert", rows=len(df_new)):
+            df_new = df_new.with_columns(
+                (pl.col(pk) // self.chunk).alias("bucket_id")
+            )
+            partitions = df_new.partition_by("bucket_id", as_dict=True)
 
+        written = {}
         try:
-            for bucket_val, df_updates in partitions.items():
-                file_name = f"part_{bucket_val}.parquet"
-                file_path = os.path.join(folder_path, file_name)
-                
-                # Dosyaya yazarken bucket_id gerekmez
-                df_updates_clean = df_updates.drop("bucket_id")
-
-                if os.path.exists(file_path):
-                    # --- DOSYA GÜNCELLEME (Merge) ---
-                    df_current = pl.read_parquet(file_path)
-                    
-                    # Önce mevcut, sonra yeni veriyi ekle
-                    df_combined = pl.concat([df_current, df_updates_clean])
-                    
-                    # ID'ye göre tekilleştir -> Son geleni (güncel olanı) tut
-                    df_final = df_combined.unique(subset=[pk], keep="last", maintain_order=False)
-                    
-                    df_final.write_parquet(file_path)
-                    self.logger.info(f"  ✏️  Güncellendi: {file_name} (Toplam: {len(df_final)})")
-                else:
-                    # --- YENİ DOSYA ---
-                    df_updates_clean.write_parquet(file_path)
-                    self.logger.info(f"  ✨ Yeni Dosya: {file_name}")
-
-            # 4. CHECKPOINT KAYDI (Transaction Commit gibi düşünün)
-            # Döngü hatasız biterse burası çalışır.
-            self._save_state(state_path, max_rv_to_save)
-            self.logger.info(f"💾 Checkpoint güncellendi: {max_rv_to_save}")
-            
+            if max_workers > 1 and len(partitions) > 1:
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bucket") as pool:
+                    futures = {
+                        pool.submit(self._rewrite_bucket, folder_path, manifest, bucket_val, df_updates, pk, delta_token): bucket_val
+                        for (bucket_val,), df_updates in partitions.items()
+                    }
+                    try:
+                        for future in as_completed(futures):
+                            written[futures[future]] = future.result()
+                    except Exception:
+                        for future in futures:
+                            future.cancel()
+                        raise
+            else:
+                for (bucket_val,), df_updates in partitions.items():
+                    written[bucket_val] = self._rewrite_bucket(folder_path, manifest, bucket_val, df_updates, pk, delta_token)
+        except Exception:
+            # Yarım kalan pencereden geriye yayınlanmamış dosya kalmasın
+            referenced = set(manifest.files())
+            for (bucket_val,), _ in partitions.items():
+                names = [manifest.file_name(bucket_val), f"part_{bucket_val}{DELTA_INFIX}{delta_token}.parquet"]
+                for name in names:
+                    file_path = os.path.join(folder_path, name)
+                    if name not in referenced and os.path.exists(file_path):
+                        os.remove(file_path)
+            raise
+
+        # Tüm bucket'lar hazır; manifest'e işlenir (yayın sync'te checkpoint ile birlikte)
+        manifest.buckets.update(written)
+        return list(written)
+
+    def fold_deltas(self, table, pk, min_deltas=1, buckets=None):
+        """
+        [MAINTENANCE] Merge-on-read delta dosyalarını base bucket dosyasına katlar.
+
+        En az min_deltas deltası olan her bucket için base + deltalar anahtar bazında
+        çözülür ve yeni versiyon adıyla yazılır; manifest yayınlanınca deltalar
+        referanssız kalır ve yedek dönünce silinir. buckets verilirse sadece bu
+        bucket'lara bakılır. Katlanan bucket sayısını döndürür.
+        """
+        folder_path, state_path = self._paths(table)
+        metrics = self.metrics or RunMetrics(table, action="fold")
+        current = self._load_manifest(folder_path, pk, state_path)
+        manifest = current.next_version()
+        folded = 0
+        for bucket_id, info in sorted(current.buckets.items()):
+            if len(info.deltas) < max(min_deltas, 1) or (buckets is not None and bucket_id not in buckets):
+                continue
+            file_name = manifest.file_name(bucket_id)
+            with metrics.span("convert"):
+                df_final = scan_bucket(
+                    os.path.join(folder_path, info.file),
+                    [os.path.join(folder_path, delta) for delta in info.deltas],
+                    pk,
+                ).sort(pk).collect()
+            with metrics.span("encode", rows=len(df_final)):
+                df_final.write_parquet(os.path.join(folder_path, file_name))
+            manifest.buckets[bucket_id] = describe_bucket(folder_path, file_name, pk)
+            folded += 1
+            self.logger.info(f"  🗜️  Katlandı: {file_name} ({len(info.deltas)} delta, Toplam: {len(df_final)})")
+        if folded:
+            with metrics.span("finalize"):
+                self._publish_manifest(folder_path, manifest, current)
+        return folded
+
+    def sync(self, table, pk, ver, cols=None, use_ts=False, batch_size=None, max_workers=1, merge_on_read=False, max_deltas=8):
+        """
+        [INCREMENTAL UPSERT]
+        Değişen verileri çeker, ilgili dosyalara dağıtır ve güvenli şekilde günceller.
+        Checkpoint dosyası sayesinde işlem yarım kalsa bile veri kaybı olmaz.
+
+        batch_size verilirse değişiklikler ver sırasıyla en fazla ~batch_size satırlık
+        keyset pencereleri halinde okunur ve her pencere bucket'lara uygulandıktan sonra
+        checkpoint o pencerenin son değerine ilerletilir. Büyük toplu güncellemelerde
+        bellekte sadece bir pencere tutulur.
+
+        max_workers > 1 ise bir pencerenin dokunduğu bucket'lar eş zamanlı yeniden yazılır;
+        checkpoint yine sadece pencerenin tüm bucket'ları yerine konduktan sonra ilerler.
+        Bucket başına süre loglanır ve bucket_seconds gözlemi olarak metriklere yazılır.
+
+        merge_on_read=True ise mevcut bucket'lar yeniden yazılmaz; değişiklikler
+        part_N.delta_<rv>.parquet olarak eklenir ve okurken anahtar bazında çözülür
+        (scan / merge_on_read_sql). Deltası max_deltas'a ulaşan bucket'lar pencere
+        sonunda base dosyaya katlanır; fold_deltas ayrıca zamanlanabilir.
+
+        Checkpoint, klasördeki _manifest.json'da bucket listesiyle birlikte tutulur ve
+        her pencere sonunda tek bir atomik manifest yayınıyla ilerler; okuyucular ya
+        önceki ya da yeni versiyonun tamamını görür.
+        """
+        folder_path, state_path = self._paths(table)
+        select_clause = self._cols_str(cols)
+        self.metrics = RunMetrics(table, action="sync")
+        
+        self.logger.info(f"\n🔄 [UPSERT] '{table}' senkronizasyonu başlıyor...")
+
+        # 1. Checkpoint Oku (manifest'ten; manifest'siz klasörlerde state dosyasından)
+        default_rv = "1900-01-01 00:00:00" if use_ts else "0x0000000000000000"
+        try:
+            current = self._load_manifest(folder_path, pk, state_path)
         except Exception as e:
-            self.logger.critical(f"❌ KRİTİK HATA: Dosya yazma sırasında sorun oluştu: {e}")
-            self.logger.warning("⚠️ Checkpoint GÜNCELLENMEDİ. Bir sonraki çalışmada veriler tekrar çekilip düzeltilecek.")
+            self.logger.error(f"❌ Manifest okunamadı: {e}")
+            self.metrics.finish(success=False, error=str(e))
+            return
+        if current.bucket_size != self.chunk:
+            error = f"Klasör chunk={current.bucket_size} ile yazılmış, bu çalıştırma chunk={self.chunk}"
+            self.logger.error(f"❌ {error}")
+            self.metrics.finish(success=False, error=error)
+            return
+        last_rv_raw = current.checkpoint or default_rv
+        self.logger.info(f"📍 Son Checkpoint: {last_rv_raw}")
+
+        # 2. Delta Veriyi Çek (pencere pencere)
+        windows = self._read_changes(table, select_clause, ver, last_rv_raw, use_ts, batch_size)
+        total_rows = 0
+        while True:
+            start_time = time.time()
+            try:
+                df_new = next(windows, None)
+            except Exception as e:
+                self.logger.error(f"❌ SQL Bağlantı Hatası: {e}")
+                self.metrics.finish(success=False, error=str(e))
+                return
+
+            if df_new is None:
+                break
+
+            # Bu pencere içindeki en büyük RowVersion'ı al (Pencere biterse bunu kaydedeceğiz)
+            max_rv_item = df_new.select(pl.col(ver).max()).item()
+            
+            if use_ts:
+                # Datetime objesini stringe çevir
+                max_rv_to_save = str(max_rv_item)
+            else:
+                # Binary objesini hex stringe çevir
+                max_rv_to_save = self._to_hex(max_rv_item)
+            
+            self.logger.info(f"📥 {len(df_new)} kayıt çekildi. ({time.time() - start_time:.2f} sn)")
+            total_rows += len(df_new)
+
+            # 3. Bucket Dağıtımı ve Upsert
+            try:
+                delta_token = self._delta_token(max_rv_item, max_rv_to_save, use_ts) if merge_on_read else None
+                manifest = current.next_version()
+                touched = self._apply_window(df_new, folder_path, pk, manifest, max_workers, delta_token)
+
+                # 4. CHECKPOINT KAYDI (Transaction Commit gibi düşünün)
+                # Pencere hatasız biterse burası çalışır; dosyalar ve checkpoint tek yayında görünür.
+                manifest.checkpoint = max_rv_to_save
+                with self.metrics.span("finalize"):
+                    self._publish_manifest(folder_path, manifest, current)
+                    self._save_state(state_path, max_rv_to_save)
+                current = manifest
+                self.logger.info(f"💾 Checkpoint güncellendi: {max_rv_to_save}")
+
+                if merge_on_read and max_deltas:
+                    try:
+                        if self.fold_deltas(table, pk, min_deltas=max_deltas, buckets=set(touched)):
+                            current = read_manifest(folder_path)
+                    except Exception as e:
+                        # Deltalar yerinde kalır; okuma doğru çalışır, bir sonraki katlamada tekrar denenir
+                        self.logger.warning(f"⚠️ Delta katlama başarısız: {e}")
+                
+            except Exception as e:
+                windows.close()
+                self.metrics.finish(success=False, error=str(e))
+                self.logger.critical(f"❌ KRİTİK HATA: Dosya yazma sırasında sorun oluştu: {e}")
+                self.logger.warning("⚠️ Checkpoint GÜNCELLENMEDİ. Bir sonraki çalışmada veriler tekrar çekilip düzeltilecek.")
+                self.logger.info(f"🏁 [UPSERT] Bitti. {self.metrics.summary()}\n")
+                return
+
+        if total_rows == 0:
+            self.logger.info("✅ Güncel veri yok. Sistem senkronize.")
+        self.metrics.finish()
+        self.logger.info(f"🏁 [UPSERT] Bitti. {self.metrics.summary()}\n")
+
+    def scan(self, table, pk, ranges=None):
+        """
+        Tabloyu merge-on-read deltalarını çözerek LazyFrame olarak döndürür. ranges
+        ({kolon: (min, max)}) verilirse dosyalar manifest istatistikleriyle budanır.
+        """
+        folder_path, _ = self._paths(table)
+        frames = [scan_bucket(base, deltas, pk) for _, (base, deltas) in sorted(bucket_files(folder_path, ranges).items())]
+        if not frames:
+            raise FileNotFoundError(f"Parquet dosyası bulunamadı: {folder_path}")
+        return pl.concat(frames, how="diagonal_relaxed")
+
+    def compact(self, table, pk, row_group_size=1_000_000, force=False):
+        """
+        [MAINTENANCE] Bucket dosyalarını PK'ya göre sıralar ve row group'ları birleştirir.
+        Çok sayıda sync sonrası okuma hızını korumak için yoğun olmayan saatlerde çalıştırın.
+        """
+        folder_path, _ = self._paths(table)
+        self.logger.info(f"\n🧹 [COMPACT] '{table}' bakımı başlıyor...")
+
+        # Merge-on-read deltaları önce base dosyalara katlanır
+        self.fold_deltas(table, pk)
+
+        maintenance = ParquetMaintenance(primary_key=pk, row_group_size=row_group_size, force=force)
+        report = maintenance.compact(folder_path)
 
-        self.logger.info(f"🏁 [UPSERT] Bitti. Süre: {time.time() - start_time:.2f} sn\n")
+        self.logger.info(f"🏁 [COMPACT] {report.summary()}\n")
+        return report
 
 
 # ==========================================
@@ -254,7 +749,8 @@ if __name__ == "__main__":
     # --- A. İLK YÜKLEME (Sadece 1 kere çalıştırın) ---
     manager.init(
        table="tb_UrunRecete",
-        pk="ID"
+        pk="ID",
+        parallelism=4                 # Dolu bucket'ları 4 bağlantıyla oku
     )
 
     # --- B. ARTIMLI GÜNCELLEME (Cron/Schedule ile çalıştırın) ---
@@ -262,7 +758,9 @@ if __name__ == "__main__":
     #    table="tb_UrunRecete",
     #    pk="SatisId",
     #    ver="RowVersion",
-    #    cols=["SatisId", "UrunAdi", "Tutar", "RowVersion"]
+    #    cols=["SatisId", "UrunAdi", "Tutar", "RowVersion"],
+    #    batch_size=500_000,         # Toplu güncellemelerde bellekte en fazla ~500K satır
+    #    max_workers=8               # Bucket'ları 8 thread ile eş zamanlı yeniden yaz
     #)
 
     # --- C. DATETIME ILE ARTIMLI GÜNCELLEME ÖRNEĞİ ---
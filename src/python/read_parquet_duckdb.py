@@ -1,15 +1,19 @@
 import duckdb
 import polars as pl
 import os
-from pathlib import Path
 
-def read_urunrecete_from_parquet(veri_ambari_dir: str = "veri_ambari", table_name: str = "tb_UrunRecete") -> pl.DataFrame:
+from parquet_sync_manager import bucket_files, merge_on_read_sql, scan_bucket
+
+def read_urunrecete_from_parquet(veri_ambari_dir: str = "veri_ambari", table_name: str = "tb_UrunRecete", pk: str = "ID") -> pl.DataFrame:
     """
     DuckDB kullanarak veri_ambari klasöründeki tb_UrunRecete parquet dosyalarını okur.
+    Dosya listesi _manifest.json'dan alınır (klasör listelenmez); merge-on-read delta
+    dosyaları (part_N.delta_*.parquet) pk bazında çözülür.
     
     Args:
         veri_ambari_dir: Parquet dosyalarının bulunduğu klasör yolu
         table_name: Tablo adı (klasör adı)
+        pk: Delta çözümlemesinde kullanılan anahtar kolon
     
     Returns:
         Polars DataFrame
@@ -20,16 +24,14 @@ def read_urunrecete_from_parquet(veri_ambari_dir: str = "veri_ambari", table_nam
     if not os.path.exists(table_dir):
         raise FileNotFoundError(f"Klasör bulunamadı: {table_dir}")
     
+    # Deltası olmayan bucket'lar doğrudan, deltası olanlar pk bazında çözülerek okunur
+    query = merge_on_read_sql(table_dir, pk)
+    if query is None:
+        raise FileNotFoundError(f"Parquet dosyası bulunamadı: {table_dir}")
+    
     # DuckDB bağlantısı oluştur
     con = duckdb.connect()
     
-    # Parquet dosyalarını okumak için wildcard kullan
-    # DuckDB, klasördeki tüm parquet dosyalarını otomatik olarak birleştirir
-    parquet_pattern = os.path.join(table_dir, "*.parquet")
-    
-    # SQL sorgusu ile parquet dosyalarını oku
-    query = f"SELECT * FROM read_parquet('{parquet_pattern}')"
-    
     # DuckDB sorgusunu çalıştır ve Polars DataFrame'e dönüştür
     df = con.execute(query).pl()
     
@@ -40,7 +42,9 @@ def read_urunrecete_from_parquet(veri_ambari_dir: str = "veri_ambari", table_nam
 
 def read_urunrecete_with_filter(veri_ambari_dir: str = "veri_ambari", 
                                  table_name: str = "tb_UrunRecete",
-                                 where_clause: str = None) -> pl.DataFrame:
+                                 where_clause: str = None,
+                                 pk: str = "ID",
+                                 ranges: dict = None) -> pl.DataFrame:
     """
     DuckDB kullanarak parquet dosyalarını filtreleyerek okur.
     
@@ -48,20 +52,27 @@ def read_urunrecete_with_filter(veri_ambari_dir: str = "veri_ambari",
         veri_ambari_dir: Parquet dosyalarının bulunduğu klasör yolu
         table_name: Tablo adı
         where_clause: SQL WHERE koşulu (örn: "ID > 1000 AND ID < 2000")
+        pk: Delta çözümlemesinde kullanılan anahtar kolon
+        ranges: Manifest istatistikleriyle dosya budama, örn. {"ID": (1000, 2000)}
+                (uçlar dahil, None sınırsız). Sadece dosya seçer; satır filtresi
+                where_clause ile verilmelidir.
     
     Returns:
         Polars DataFrame
     """
     table_dir = os.path.join(veri_ambari_dir, table_name)
-    parquet_pattern = os.path.join(table_dir, "*.parquet")
+    # Kesişmeyen bucket'lar manifest'ten elenir; DuckDB sadece kalan dosyaları açar
+    source = merge_on_read_sql(table_dir, pk, ranges)
+    if source is None:
+        raise FileNotFoundError(f"Parquet dosyası bulunamadı: {table_dir}")
     
     con = duckdb.connect()
     
-    # WHERE koşulu varsa ekle
+    # WHERE koşulu varsa ekle (filtre, deltalar çözüldükten sonra uygulanır)
     if where_clause:
-        query = f"SELECT * FROM read_parquet('{parquet_pattern}') WHERE {where_clause}"
+        query = f"SELECT * FROM ({source}) WHERE {where_clause}"
     else:
-        query = f"SELECT * FROM read_parquet('{parquet_pattern}')"
+        query = f"SELECT * FROM ({source})"
     
     df = con.execute(query).pl()
     con.close()
@@ -70,21 +81,24 @@ def read_urunrecete_with_filter(veri_ambari_dir: str = "veri_ambari",
 
 
 def read_urunrecete_register_method(veri_ambari_dir: str = "veri_ambari",
-                                     table_name: str = "tb_UrunRecete") -> pl.DataFrame:
+                                     table_name: str = "tb_UrunRecete",
+                                     pk: str = "ID",
+                                     ranges: dict = None) -> pl.DataFrame:
     """
     Alternatif yöntem: Polars ile okuyup DuckDB'ye register ederek sorgulama.
-    Bu yöntem daha fazla kontrol sağlar.
+    Bu yöntem daha fazla kontrol sağlar. ranges read_urunrecete_with_filter'daki gibi
+    dosya budaması yapar.
     """
     table_dir = os.path.join(veri_ambari_dir, table_name)
     
-    # Polars ile tüm parquet dosyalarını oku
-    parquet_files = list(Path(table_dir).glob("*.parquet"))
+    # Polars ile bucket dosyalarını (ve varsa deltalarını) oku
+    buckets = bucket_files(table_dir, ranges)
     
-    if not parquet_files:
+    if not buckets:
         raise FileNotFoundError(f"Parquet dosyası bulunamadı: {table_dir}")
     
-    # Tüm parquet dosyalarını birleştir
-    dfs = [pl.read_parquet(str(f)) for f in parquet_files]
+    # Tüm bucket'ları birleştir
+    dfs = [scan_bucket(base, deltas, pk).collect() for base, deltas in buckets.values()]
     df_combined = pl.concat(dfs)
     
     # DuckDB'ye register et
@@ -115,6 +129,15 @@ if __name__ == "__main__":
     print(f"✅ {len(df_filtered)} satır okundu")
     print(df_filtered)
     
+    # Örnek 2b: Manifest ile dosya budama (sadece ID 1M - 2M bucket'ı açılır)
+    print("\n" + "="*50)
+    print("📖 Budanmış okuma (ID 1.000.000 - 1.999.999)...")
+    df_pruned = read_urunrecete_with_filter(
+        where_clause="ID BETWEEN 1000000 AND 1999999",
+        ranges={"ID": (1_000_000, 1_999_999)},
+    )
+    print(f"✅ {len(df_pruned)} satır okundu")
+    
     # Örnek 3: Register yöntemi ile
     print("\n" + "="*50)
     print("📖 Register yöntemi ile okunuyor...")
@@ -126,7 +149,6 @@ if __name__ == "__main__":
     print("📖 DuckDB ile gelişmiş sorgu örneği...")
     con = duckdb.connect()
     table_dir = os.path.join("veri_ambari", "tb_UrunRecete")
-    parquet_pattern = os.path.join(table_dir, "*.parquet")
     
     # Örnek: Toplam kayıt sayısı, min/max ID
     query = f"""
@@ -134,7 +156,7 @@ if __name__ == "__main__":
         COUNT(*) as toplam_kayit,
         MIN(ID) as min_id,
         MAX(ID) as max_id
-    FROM read_parquet('{parquet_pattern}')
+    FROM ({merge_on_read_sql(table_dir, 'ID')})
     """
     
     stats = con.execute(query).pl()
@@ -6,7 +6,7 @@
 from db_parquet import (
     S3Config,
     TableConfig,
-    DatabaseToParquet,
+    MultiTableRunner,
     get_mssql_connection
 )
 
@@ -66,9 +66,13 @@ MSSQL_CONNECTION = get_mssql_connection('TEMAOLTP', 'Store7')
 
 if __name__ == "__main__":
 
-    for config in [urun_config, urungrup_config, sezon_config]:
-        with DatabaseToParquet(
-            connection=MSSQL_CONNECTION,
-            table_config=config
-        ) as converter:
-            converter.run()
\ No newline at end of file
+    # Tablolar paralel çalışır, aynı sunucuya en fazla 6 bağlantı açılır.
+    # En uzun süren tablo (tb_Urun) başta olmalı.
+    with MultiTableRunner(
+        connection=MSSQL_CONNECTION,
+        max_workers=3,
+        max_connections_per_source=6
+    ) as runner:
+        report = runner.run([urun_config, urungrup_config, sezon_config])
+
+    print(report.summary())
\ No newline at end of file
@@ -26,6 +26,8 @@ import connectorx as cx
 import polars as pl
 import pyarrow as pa
 
+from db_parquet.profile import WriterProfile
+
 class Sync:
     
     def __init__(
@@ -38,6 +40,8 @@ class Sync:
         tgt_object: Optional[str] = None,
 
         input: Optional[pl.DataFrame] = None,
+
+        writer_profile: Optional[WriterProfile] = None,
     ):
         """
         Initialize Sync
@@ -50,6 +54,8 @@ class Sync:
             tgt_object: Target table or file path
 
             input: Input data - can be a Python iterable (list of dicts), pandas DataFrame, or polars DataFrame
+
+            writer_profile: Parquet writer settings (default: zstd, 100_000 rows per row group)
         """
 
         self.src_conn = src_conn
@@ -60,6 +66,8 @@ class Sync:
 
         self.input = input
 
+        self.writer_profile = writer_profile or WriterProfile()
+
     def run(self):
         
         # Prepare environment
@@ -88,9 +96,4 @@ class Sync:
             return
         
         # Write to parquet
-        self.input.write_parquet(
-            self.tgt_object, 
-            compression="zstd", 
-            use_pyarrow=True, 
-            pyarrow_options={"row_group_size": 100_000}
-        )
\ No newline at end of file
+        self.input.write_parquet(self.tgt_object, **self.writer_profile.polars_options())
\ No newline at end of file
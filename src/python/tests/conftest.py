@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Paketler src/python altında; testler bu dizinden import eder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,212 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import duckdb
+import polars as pl
+import pytest
+
+import delta_parquet_manager.dialects as dialects
+from delta_parquet_manager import read_database_part
+from delta_parquet_manager.dialects import (
+    DuckDBDialect,
+    MSSQLDialect,
+    PostgresDialect,
+    RangeDialect,
+    SQLiteDialect,
+    get_dialect,
+    register_dialect,
+)
+from delta_parquet_manager.planner import RangePlanner
+
+ROWS = 2_000
+START = datetime(2024, 1, 1)
+
+
+# --- SQL üretimi ---
+
+def test_ansi_literals():
+    dialect = RangeDialect()
+    assert dialect.literal(None) == "NULL"
+    assert dialect.literal(True) == "TRUE"
+    assert dialect.literal(42) == "42"
+    assert dialect.literal(Decimal("1.50")) == "1.50"
+    assert dialect.literal("O'Brien") == "'O''Brien'"
+    assert dialect.literal(datetime(2024, 1, 2, 3, 4, 5)) == "TIMESTAMP '2024-01-02 03:04:05.000000'"
+    assert dialect.literal(date(2024, 1, 2)) == "DATE '2024-01-02'"
+    assert dialect.literal(b"\x01\xff") == "X'01ff'"
+
+
+def test_mssql_sql():
+    dialect = MSSQLDialect()
+    assert dialect.count_expression() == "COUNT_BIG(*)"
+    assert dialect.literal(True) == "1"
+    assert dialect.literal("ş'") == "N'ş'''"
+    assert dialect.literal(datetime(2024, 1, 2, 3, 4, 5)) == "CAST('2024-01-02T03:04:05.000000' AS datetime2(7))"
+    assert dialect.literal(b"\x01\xff") == "0x01ff"
+    assert dialect.literal(7) == "7"
+
+    bounds = dialect.bounds_query("SELECT * FROM t", "ID", "WHERE ID > 5")
+    assert "COUNT_BIG(*) AS Rows" in bounds
+    assert "HAVING COUNT_BIG(*) > 0" in bounds
+
+    key_hash = "CAST(CAST(HASHBYTES('MD5', CAST(ID AS nvarchar(4000))) AS binary(4)) AS bigint)"
+    assert f"WHERE {key_hash} % 10 = 0" in dialect.sample_query("SELECT * FROM t", "ID", "", 10)
+    assert f"WHERE ID > 5 AND {key_hash} % 10 = 0" in dialect.sample_query("SELECT * FROM t", "ID", "WHERE ID > 5", 10)
+    assert "CHECKSUM" not in dialect.sample_query("SELECT * FROM t", "ID", "", 10)
+
+
+def test_postgres_sql():
+    dialect = PostgresDialect()
+    assert dialect.count_expression() == "COUNT(*)"
+    assert dialect.literal(b"\x01\xff") == "'\\x01ff'::bytea"
+    assert dialect.literal(datetime(2024, 1, 2)) == "TIMESTAMP '2024-01-02 00:00:00.000000'"
+    sample = dialect.sample_query("SELECT * FROM t", "ID", "WHERE ID > 5", 4)
+    assert "ROW_NUMBER() OVER (ORDER BY ID)" in sample
+    assert "SampleRow % 4 = 0" in sample
+
+
+def test_sqlite_sql():
+    dialect = SQLiteDialect()
+    assert dialect.literal(False) == "0"
+    assert dialect.literal(datetime(2024, 1, 2, 3, 4, 5)) == "'2024-01-02 03:04:05'"
+    assert dialect.literal(datetime(2024, 1, 2, 3, 4, 5, 6)) == "'2024-01-02 03:04:05.000006'"
+    assert dialect.literal(date(2024, 1, 2)) == "'2024-01-02'"
+    bounds = dialect.bounds_query("SELECT * FROM t", "ID", "")
+    assert "ORDER BY ID DESC LIMIT 1" in bounds
+
+
+def test_duckdb_sql():
+    dialect = DuckDBDialect()
+    assert "WHERE hash(ID) % 3 = 0" in dialect.sample_query("SELECT * FROM t", "ID", "", 3)
+    assert DuckDBDialect._database("duckdb://") == ":memory:"
+    assert DuckDBDialect._database("duckdb:///data.duckdb") == "data.duckdb"
+    assert DuckDBDialect._database("duckdb:////tmp/data.duckdb") == "/tmp/data.duckdb"
+
+
+def test_get_dialect():
+    assert isinstance(get_dialect("mssql://host/db"), MSSQLDialect)
+    assert isinstance(get_dialect("postgresql+psycopg2://host/db"), PostgresDialect)
+    assert isinstance(get_dialect("postgres://host/db"), PostgresDialect)
+    assert isinstance(get_dialect("sqlite:///x.db"), SQLiteDialect)
+    assert isinstance(get_dialect("DuckDB://"), DuckDBDialect)
+    with pytest.raises(ValueError):
+        get_dialect("oracle://host/db")
+
+
+def test_register_dialect(monkeypatch):
+    monkeypatch.setattr(dialects, "_DIALECTS", dict(dialects._DIALECTS))
+
+    class MySQLDialect(RangeDialect):
+        name = "mysql"
+
+    register_dialect("MySQL", MySQLDialect())
+    assert get_dialect("mysql+pymysql://host/db").name == "mysql"
+
+    # Mevcut kayıt ezilir
+    register_dialect("sqlite", MySQLDialect())
+    assert get_dialect("sqlite:///x.db").name == "mysql"
+
+
+# --- Keyset okuma ---
+
+def _source() -> pl.DataFrame:
+    # Aralıklı anahtarlar; string anahtar tırnak içerir
+    ids = [i * 7 + (i % 3) for i in range(1, ROWS + 1)]
+    return pl.DataFrame({
+        "ID": ids,
+        "S": [f"k'{i:08d}" for i in ids],
+        "T": [START + timedelta(seconds=i) for i in ids],
+    })
+
+
+@pytest.fixture(scope="module", params=["sqlite", "duckdb", "parquet"])
+def source(request, tmp_path_factory):
+    """(db_uri, query, df) döndürür"""
+    df = _source()
+    path = tmp_path_factory.mktemp(request.param)
+
+    if request.param == "sqlite":
+        con = sqlite3.connect(path / "source.db")
+        con.execute("CREATE TABLE t (ID INTEGER PRIMARY KEY, S TEXT, T DATETIME)")
+        con.executemany(
+            "INSERT INTO t VALUES (?, ?, ?)",
+            [(i, s, t.isoformat(sep=" ")) for i, s, t in df.iter_rows()],
+        )
+        con.commit()
+        con.close()
+        return f"sqlite://{path / 'source.db'}", "SELECT * FROM t", df
+
+    if request.param == "duckdb":
+        with duckdb.connect(str(path / "source.duckdb")) as con:
+            con.execute("CREATE TABLE t AS SELECT * FROM df")
+        return f"duckdb:///{path / 'source.duckdb'}", "SELECT * FROM t", df
+
+    for i, part in enumerate(df.iter_slices(500)):
+        part.write_parquet(path / f"{i}.parquet")
+    return "duckdb://", f"SELECT * FROM '{path}/*.parquet'", df
+
+
+def _read_all(db_uri, query, column, **kwargs) -> list:
+    return list(read_database_part(db_uri, query, column, **kwargs))
+
+
+@pytest.mark.parametrize("column", ["ID", "S", "T"])
+def test_keyset_pagination(source, column):
+    db_uri, query, df = source
+    parts = _read_all(db_uri, query, column, limit=300, partition=3)
+
+    assert len(parts) > 1
+    out = pl.concat(parts)
+    assert out.height == ROWS
+    assert out["ID"].n_unique() == ROWS
+    # Parçalar order_by_column'a göre ardışık; aralıklar çakışmaz
+    for previous, current in zip(parts, parts[1:]):
+        assert previous[column].max() < current[column].min()
+
+
+@pytest.mark.parametrize("column", ["ID", "S", "T"])
+def test_resume_from_last_id(source, column):
+    db_uri, query, df = source
+    last_id = df[column].sort()[1_500]
+    out = pl.concat(_read_all(db_uri, query, column, last_id=last_id, limit=200, partition=2))
+
+    expected = df.filter(pl.col(column) > last_id)["ID"].sort()
+    assert out.height == ROWS - 1_501
+    assert out["ID"].sort().equals(expected)
+
+
+def test_resume_after_last_key_is_empty(source):
+    db_uri, query, df = source
+    assert _read_all(db_uri, query, "ID", last_id=df["ID"].max()) == []
+
+
+class IdentityHashDialect(SQLiteDialect):
+    """Eski MSSQL örneği gibi anahtarın kendisini hash olarak kullanır (CHECKSUM(int) = int)"""
+
+    def sample_query(self, query: str, column: str, resume: str, modulus: int) -> str:
+        sample_filter = f"{'AND' if resume else 'WHERE'} ABS({column} % {modulus}) = 0"
+        return f"SELECT DISTINCT {column} AS SampleKey FROM ({query}) source {resume} {sample_filter}"
+
+
+def test_planner_falls_back_to_row_number_on_strided_keys(tmp_path):
+    # Sadece tek sayılı anahtarlar; çift modulus ile hash örneği boş kalır
+    con = sqlite3.connect(tmp_path / "strided.db")
+    con.execute("CREATE TABLE t (ID INTEGER PRIMARY KEY)")
+    con.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(1, 200_000, 2)])
+    con.commit()
+    con.close()
+
+    planner = RangePlanner(f"sqlite://{tmp_path / 'strided.db'}", "SELECT * FROM t", "ID", IdentityHashDialect())
+    ranges = planner.next_ranges(1_000, 6)
+
+    assert len(planner.points) > 1_000
+    assert len(ranges) == 6
+    # Aralıklar limit kadar satırı kapsar; kalan tüm aralık tek sorguda okunmaz
+    assert ranges[0].low is None
+    assert ranges[-1].high < 2_200
+
+
+def test_unsupported_scheme():
+    with pytest.raises(ValueError):
+        _read_all("oracle://host/db", "SELECT 1", "ID")
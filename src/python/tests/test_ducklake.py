@@ -0,0 +1,190 @@
+import sqlite3
+
+import pytest
+
+from delta_parquet_manager.ducklake import STATE_TABLE, DuckLakeHistoryApplier, DuckLakeTableConfig
+
+ROWS = 3_000
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Ana tablo ve tek kayıtlı history tablosu olan SQLite kaynağı; (db_uri, sqlite bağlantısı) döndürür"""
+    con = sqlite3.connect(tmp_path / "source.db")
+    con.execute("CREATE TABLE T (ID INTEGER PRIMARY KEY, Name TEXT, Val REAL)")
+    con.execute("CREATE TABLE T_Hist (ID INTEGER, Name TEXT, Val REAL, Hist_ID INTEGER, Hist_Islem INTEGER)")
+    con.executemany("INSERT INTO T VALUES (?, ?, ?)", [(i, f"n{i}", i * 1.5) for i in range(1, ROWS + 1)])
+    con.execute("INSERT INTO T_Hist VALUES (1, 'n1', 1.5, 10, 1)")
+    con.commit()
+    yield f"sqlite://{tmp_path / 'source.db'}", con
+    con.close()
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return str(tmp_path / "catalog.duckdb")
+
+
+@pytest.fixture
+def config():
+    return DuckLakeTableConfig("T", columns=["ID", "Name", "Val"], limit=500, partition=3)
+
+
+def _add_history(con, rows):
+    con.executemany("INSERT INTO T_Hist VALUES (?, ?, ?, ?, ?)", rows)
+    con.commit()
+
+
+def _rows(applier, where=""):
+    return applier.con.execute(f"SELECT ID, Name, Val FROM lake.T {where} ORDER BY ID").fetchall()
+
+
+def test_init_then_sync(source, catalog, config):
+    db_uri, _ = source
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        metrics = applier.run(config)
+        assert metrics.labels["action"] == "init"
+        assert applier.read_state(config) == ("sync", 10)
+        assert applier.con.execute("SELECT count(*), count(DISTINCT ID), max(Hist_ID) FROM lake.T").fetchone() == (ROWS, ROWS, 10)
+
+        # Değişiklik yoksa ikinci çalıştırma init yapmaz, hiçbir şey uygulamaz
+        assert applier.run(config).labels["action"] == "sync"
+        assert applier.con.execute("SELECT count(*) FROM lake.T").fetchone()[0] == ROWS
+
+
+def test_interrupted_init_resumes(source, catalog, config):
+    db_uri, _ = source
+
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        stream = applier._stream
+        calls = []
+
+        def failing_stream(*args):
+            calls.append(1)
+            if len(calls) > 2:
+                raise RuntimeError("bağlantı koptu")
+            return stream(*args)
+
+        applier._stream = failing_stream
+        with pytest.raises(RuntimeError):
+            applier.run(config)
+        assert applier.read_state(config) == ("init", 10)
+        loaded = applier.con.execute("SELECT count(*), max(ID) FROM lake.T").fetchone()
+        assert 0 < loaded[0] < ROWS
+
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        fetched = []
+        stream = applier._stream
+
+        def counting_stream(source_query, column, planner, config):
+            chunk = stream(source_query, column, planner, config)
+            if chunk is not None:
+                fetched.append(chunk[0][0].low)
+            return chunk
+
+        applier._stream = counting_stream
+        applier.run(config)
+
+        # İlk yükleme kaldığı PK'dan devam eder; yüklenmiş satırlar tekrar okunmaz
+        assert fetched[0] == loaded[1]
+        assert applier.read_state(config) == ("sync", 10)
+        assert applier.con.execute("SELECT count(*), count(DISTINCT ID) FROM lake.T").fetchone() == (ROWS, ROWS)
+
+
+def test_merge_folds_deletes(source, catalog, config):
+    db_uri, con = source
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        applier.run(config)
+
+        _add_history(con, [
+            (5, "u5", 0.0, 11, 2),        # update
+            (6, None, None, 12, 0),       # delete
+            (ROWS + 1, "new", 1.0, 13, 1),  # insert
+            (9_999, None, None, 14, 0),   # olmayan satırın silinmesi: etkisiz
+        ])
+        applier.run(config)
+
+        assert _rows(applier, "WHERE ID IN (5, 6, 9999)") == [(5, "u5", 0.0)]
+        assert _rows(applier, f"WHERE ID = {ROWS + 1}") == [(ROWS + 1, "new", 1.0)]
+        assert applier.con.execute("SELECT count(*) FROM lake.T").fetchone()[0] == ROWS
+        assert applier.read_state(config) == ("sync", 14)
+
+
+def test_last_writer_wins_within_batch(source, catalog, config):
+    db_uri, con = source
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        applier.run(config)
+
+        _add_history(con, [
+            (5, "first", 1.0, 20, 2),
+            (5, "second", 2.0, 21, 2),
+            (7, "updated", 3.0, 22, 2),
+            (7, None, None, 23, 0),       # güncellendikten sonra silindi
+            (8, None, None, 24, 0),
+            (8, "back", 4.0, 25, 1),      # silindikten sonra tekrar eklendi
+        ])
+        applier.run(config)
+
+        assert _rows(applier, "WHERE ID IN (5, 7, 8)") == [(5, "second", 2.0), (8, "back", 4.0)]
+        assert applier.read_state(config) == ("sync", 25)
+
+
+def test_watermark_persists_across_connections(source, catalog, config):
+    db_uri, con = source
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        applier.run(config)
+        _add_history(con, [(5, "u5", 0.0, 11, 2)])
+        applier.run(config)
+
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        assert applier.read_state(config) == ("sync", 11)
+        assert applier.con.execute(
+            f"SELECT phase, hist_id FROM lake.{STATE_TABLE} WHERE table_name = 'T'"
+        ).fetchall() == [("sync", 11)]
+
+        # Watermark'tan önceki history tekrar uygulanmaz
+        con.execute("UPDATE T_Hist SET Name = 'stale' WHERE Hist_ID = 11")
+        _add_history(con, [(6, "u6", 0.0, 12, 2)])
+        applier.run(config)
+        assert _rows(applier, "WHERE ID IN (5, 6)") == [(5, "u5", 0.0), (6, "u6", 0.0)]
+        assert applier.read_state(config) == ("sync", 12)
+
+
+def test_force_init_rebuilds(source, catalog, config):
+    db_uri, con = source
+    with DuckLakeHistoryApplier(db_uri, catalog) as applier:
+        applier.run(config)
+        con.execute("DELETE FROM T WHERE ID > 100")
+        con.commit()
+        _add_history(con, [(1, "x", 0.0, 30, 2)])
+
+        assert applier.run(config, force_init=True).labels["action"] == "init"
+        assert applier.con.execute("SELECT count(*) FROM lake.T").fetchone()[0] == 100
+        assert applier.read_state(config) == ("sync", 30)
+
+
+def test_all_columns_with_reordered_history(tmp_path, catalog):
+    # Hist kolonları başta, ana tablo kolonları farklı sırada ve ek audit kolonu var
+    con = sqlite3.connect(tmp_path / "reordered.db")
+    con.execute("CREATE TABLE T (ID INTEGER PRIMARY KEY, Name TEXT, Val REAL)")
+    con.execute("CREATE TABLE T_Hist (Hist_ID INTEGER, Hist_Islem INTEGER, Val REAL, Name TEXT, ID INTEGER, ChangedBy TEXT)")
+    con.executemany("INSERT INTO T VALUES (?, ?, ?)", [(i, f"n{i}", i * 1.5) for i in range(1, 101)])
+    con.execute("INSERT INTO T_Hist VALUES (10, 1, 1.5, 'n1', 1, 'init')")
+    con.commit()
+
+    config = DuckLakeTableConfig("T", limit=50, partition=2)
+    with DuckLakeHistoryApplier(f"sqlite://{tmp_path / 'reordered.db'}", catalog) as applier:
+        applier.run(config)
+        con.executemany("INSERT INTO T_Hist VALUES (?, ?, ?, ?, ?, ?)", [
+            (11, 2, 9.0, "changed", 5, "user1"),
+            (12, 0, None, None, 6, "user1"),
+            (13, 1, 7.0, "new", 101, "user2"),
+        ])
+        con.commit()
+        applier.run(config)
+
+        assert applier.con.execute(
+            "SELECT * FROM lake.T WHERE ID IN (5, 6, 101) ORDER BY ID"
+        ).fetchall() == [(5, "changed", 9.0, 11, 2), (101, "new", 7.0, 13, 1)]
+        assert applier.read_state(config) == ("sync", 13)
+    con.close()